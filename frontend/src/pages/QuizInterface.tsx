@@ -73,7 +73,9 @@ const QuizInterface = () => {
       
       const result = await apiClient.submitAnswer({
         session_id: state.session.session_id,
-        answer: answer.trim()
+        answer: answer.trim(),
+        // One answer per question: double-submits and retries share the key
+        idempotency_key: `${state.currentQuestion.term_id}:${state.currentQuestion.question_number}`
       })
 
       setState(prev => ({
@@ -101,6 +101,10 @@ export interface QuizProgress {
 export interface AnswerSubmission {
   session_id: string
   answer: string
+  // Same key for retries of one submission; the server replays the recorded result
+  idempotency_key?: string
+  // Return up to this many upcoming questions with the result
+  prefetch?: number
 }
 
 export interface AnswerResult {
@@ -113,9 +117,18 @@ export interface AnswerResult {
   }
   progress: QuizProgress & { correct_answers: number }
   next_question?: QuizQuestion
+  upcoming_questions?: QuizQuestion[]
   quiz_completed: boolean
 }
 
+export interface QuizQuestionWindow {
+  session_id: string
+  domain_name?: string
+  questions?: QuizQuestion[]
+  progress?: QuizProgress
+  completed?: boolean
+}
+
 export interface QuizSummary {
   session_id: string
   domain_name: string
@@ -143,6 +156,11 @@ export interface QuizSummary {
     similarity_score: number
     feedback: string
   }>
+  detailed_results_page?: {
+    offset: number
+    limit: number | null
+    total: number
+  }
   actions: {
     can_restart: boolean
     can_review: boolean
@@ -260,6 +278,10 @@ class APIClient {
     })
   }
 
+  async getQuestions(sessionId: string, count: number): Promise<QuizQuestionWindow> {
+    return this.request<QuizQuestionWindow>(`/quiz/questions?session_id=${sessionId}&count=${count}`)
+  }
+
   async pauseQuiz(sessionId: string): Promise<{ session_id: string; status: string; message: string }> {
     return this.request<{ session_id: string; status: string; message: string }>('/quiz/pause', {
       method: 'POST',
@@ -14,6 +14,8 @@ from aws_cdk import (
     aws_ec2 as ec2,
     aws_iam as iam,
     aws_ecr_assets as ecr_assets,
+    aws_events as events,
+    aws_events_targets as targets,
     custom_resources as cr,
     Duration,
     CfnOutput
@@ -323,6 +325,44 @@ class BackendStack(Stack):
         )
         self.db_proxy_lambda.grant_invoke(self.answer_evaluator_lambda)
         
+        # Quiz engine scores answers with the evaluator (lexical fallback past its deadline)
+        # and re-scores provisional answers by invoking itself asynchronously
+        self.quiz_engine_lambda.add_environment(
+            "ANSWER_EVALUATOR_FUNCTION_NAME", self.answer_evaluator_lambda.function_name
+        )
+        self.answer_evaluator_lambda.grant_invoke(self.quiz_engine_lambda)
+        self.quiz_engine_lambda.add_to_role_policy(
+            iam.PolicyStatement(
+                actions=["lambda:InvokeFunction"],
+                # Name pattern instead of the function ARN to avoid a self-referencing policy
+                resources=[f"arn:aws:lambda:{self.region}:{self.account}:function:*QuizEngineFunction*"]
+            )
+        )
+        
+        # Hourly stale-session reaper (abandons idle active/paused quiz sessions in batches)
+        events.Rule(
+            self,
+            "QuizSessionReaperSchedule",
+            schedule=events.Schedule.rate(Duration.hours(1)),
+            targets=[targets.LambdaFunction(
+                self.quiz_engine_lambda,
+                event=events.RuleTargetInput.from_object({"action": "reap_stale_sessions"})
+            )],
+            description="Abandon stale quiz sessions"
+        )
+        
+        # Hourly purge of expired similarity_cache rows (the table is shared by all evaluator containers)
+        events.Rule(
+            self,
+            "SimilarityCachePurgeSchedule",
+            schedule=events.Schedule.rate(Duration.hours(1)),
+            targets=[targets.LambdaFunction(
+                self.quiz_engine_lambda,
+                event=events.RuleTargetInput.from_object({"action": "purge_similarity_cache"})
+            )],
+            description="Delete expired similarity cache entries"
+        )
+        
         # Create API Gateway
         self.api = apigateway.RestApi(
             self,
@@ -457,6 +497,15 @@ class BackendStack(Stack):
             authorization_type=apigateway.AuthorizationType.COGNITO
         )
         
+        # GET /quiz/questions - Window of upcoming questions (prefetch)
+        quiz_questions = quiz_resource.add_resource("questions")
+        quiz_questions.add_method(
+            "GET",
+            apigateway.LambdaIntegration(self.quiz_engine_lambda),
+            authorizer=authorizer,
+            authorization_type=apigateway.AuthorizationType.COGNITO
+        )
+        
         # POST /quiz/evaluate - Direct answer evaluation (for testing)
         quiz_resource.add_resource("evaluate").add_method(
             "POST",
@@ -641,6 +641,18 @@ class TutorSystemStack(Stack):
             authorization_type=apigateway.AuthorizationType.COGNITO
         )
         
+        # GET /quiz/questions - Window of upcoming questions (prefetch)
+        questions_resource = quiz_resource.add_resource(
+            "questions",
+            default_cors_preflight_options=cors_options
+        )
+        questions_resource.add_method(
+            "GET",
+            quiz_integration,
+            authorizer=self.cognito_authorizer,
+            authorization_type=apigateway.AuthorizationType.COGNITO
+        )
+        
         # POST /quiz/answer - Submit answer for current question
         answer_resource = quiz_resource.add_resource(
             "answer",
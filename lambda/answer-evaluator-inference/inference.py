@@ -1,5 +1,5 @@
 from sentence_transformers import SentenceTransformer
-from sklearn.metrics.pairwise import cosine_similarity
+import numpy as np
 import json
 
 # Load model once (outside handler for reuse across invocations)
@@ -26,8 +26,15 @@ def handler(event, context):
         "statusCode": 200,
         "similarity": 0.85
     }
+    
+    Batch input: {"pairs": [{"answer": "...", "correct_answer": "..."}, ...]}
+    Batch output: {"statusCode": 200, "similarities": [0.85, null, ...]}
+    (null for pairs with a missing answer or correct_answer)
     """
     try:
+        if 'pairs' in event:
+            return batch_inference(event['pairs'])
+        
         # Direct invocation format
         answer = event.get('answer', '').strip()
         correct_answer = event.get('correct_answer', '').strip()
@@ -42,10 +49,10 @@ def handler(event, context):
         model = load_model()
         
         # Generate embeddings
-        embeddings = model.encode([answer, correct_answer])
+        embeddings = model.encode([answer, correct_answer], normalize_embeddings=True)
         
-        # Calculate similarity
-        similarity = float(cosine_similarity([embeddings[0]], [embeddings[1]])[0][0])
+        # Calculate similarity (normalized embeddings, so cosine is the dot product)
+        similarity = float(np.dot(embeddings[0], embeddings[1]))
         
         return {
             'statusCode': 200,
@@ -58,3 +65,36 @@ def handler(event, context):
             'statusCode': 500,
             'error': str(e)
         }
+
+
+def batch_inference(pairs):
+    """Score all pairs with one encode call and a vectorized dot product"""
+    if not isinstance(pairs, list):
+        return {
+            'statusCode': 400,
+            'error': 'pairs must be a list'
+        }
+    
+    valid = []
+    for i, pair in enumerate(pairs):
+        answer = str(pair.get('answer', '')).strip() if isinstance(pair, dict) else ''
+        correct_answer = str(pair.get('correct_answer', '')).strip() if isinstance(pair, dict) else ''
+        if answer and correct_answer:
+            valid.append((i, answer, correct_answer))
+    
+    similarities = [None] * len(pairs)
+    if valid:
+        model = load_model()
+        n = len(valid)
+        embeddings = model.encode(
+            [answer for _, answer, _ in valid] + [correct for _, _, correct in valid],
+            normalize_embeddings=True
+        )
+        scores = np.einsum('ij,ij->i', embeddings[:n], embeddings[n:])
+        for (i, _, _), score in zip(valid, scores):
+            similarities[i] = float(score)
+    
+    return {
+        'statusCode': 200,
+        'similarities': similarities
+    }
@@ -1,39 +1,265 @@
 import json
+import math
 import os
+import re
+import time
 import numpy as np
 import onnxruntime as ort
-from transformers import AutoTokenizer
-from sklearn.metrics.pairwise import cosine_similarity
+from tokenizers import Tokenizer
 
 MODEL_PATH = os.environ.get('MODEL_PATH', '/opt/ml/model')
+# fp32 (default) or int8 - the INT8 file is built into the image by the Dockerfile
+MODEL_FILES = {'fp32': 'model.onnx', 'int8': 'model_int8.onnx'}
+MODEL_FILE = MODEL_FILES.get(os.environ.get('MODEL_PRECISION', 'fp32').lower(), 'model.onnx')
+
+# Session tuning - see ModelManager in src/shared/model_utils.py for the same settings
+GRAPH_OPTIMIZATION_LEVELS = {
+    'disable': ort.GraphOptimizationLevel.ORT_DISABLE_ALL,
+    'basic': ort.GraphOptimizationLevel.ORT_ENABLE_BASIC,
+    'extended': ort.GraphOptimizationLevel.ORT_ENABLE_EXTENDED,
+    'all': ort.GraphOptimizationLevel.ORT_ENABLE_ALL,
+}
+GRAPH_OPTIMIZATION = os.environ.get('ONNX_GRAPH_OPTIMIZATION', 'extended').lower()
+if GRAPH_OPTIMIZATION not in GRAPH_OPTIMIZATION_LEVELS:
+    GRAPH_OPTIMIZATION = 'extended'
+# Prebuilt by the Dockerfile; /tmp is the only writable location at runtime
+OPTIMIZED_MODEL_DIRS = [os.environ.get('ONNX_OPTIMIZED_MODEL_DIR', os.path.join(MODEL_PATH, 'optimized')),
+                        '/tmp/onnx-optimized']
+EXECUTION_MODE = os.environ.get('ONNX_EXECUTION_MODE', 'sequential').lower()
+INTER_OP_THREADS = int(os.environ.get('ONNX_INTER_OP_THREADS', 1))
+
+def _default_intra_op_threads():
+    # Lambda allocates one full vCPU per 1,769 MB of memory
+    cpus = os.cpu_count() or 1
+    memory_mb = os.environ.get('AWS_LAMBDA_FUNCTION_MEMORY_SIZE')
+    if memory_mb:
+        cpus = min(cpus, math.ceil(int(memory_mb) / 1769))
+    return max(1, cpus)
+
+INTRA_OP_THREADS = int(os.environ.get('ONNX_INTRA_OP_THREADS', 0)) or _default_intra_op_threads()
 
 # Loaded once per container
 _session = None
 _tokenizer = None
 
+def _session_options(optimization):
+    opts = ort.SessionOptions()
+    opts.intra_op_num_threads = INTRA_OP_THREADS
+    opts.inter_op_num_threads = INTER_OP_THREADS
+    opts.execution_mode = (ort.ExecutionMode.ORT_PARALLEL if EXECUTION_MODE == 'parallel'
+                           else ort.ExecutionMode.ORT_SEQUENTIAL)
+    opts.graph_optimization_level = GRAPH_OPTIMIZATION_LEVELS[optimization]
+    return opts
+
+def _create_session():
+    """Load the serialized optimized graph if present, otherwise optimize once and save it"""
+    name = f"{os.path.splitext(MODEL_FILE)[0]}.{GRAPH_OPTIMIZATION}.onnx"
+    candidates = [] if GRAPH_OPTIMIZATION == 'disable' else [os.path.join(d, name) for d in OPTIMIZED_MODEL_DIRS]
+    for path in candidates:
+        if os.path.isfile(path):
+            try:
+                return ort.InferenceSession(path, sess_options=_session_options('disable'))
+            except Exception as e:
+                print(f"Ignoring unreadable optimized graph {path}: {e}")
+
+    opts = _session_options(GRAPH_OPTIMIZATION)
+    for path in candidates:
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        except OSError:
+            continue
+        if os.access(os.path.dirname(path), os.W_OK):
+            opts.optimized_model_filepath = path
+            break
+    return ort.InferenceSession(os.path.join(MODEL_PATH, MODEL_FILE), sess_options=opts)
+
 def _load():
     global _session, _tokenizer
     if _session is None:
-        opts = ort.SessionOptions()
-        opts.intra_op_num_threads = 1
-        _session = ort.InferenceSession(os.path.join(MODEL_PATH, 'model.onnx'), sess_options=opts)
-        _tokenizer = AutoTokenizer.from_pretrained(MODEL_PATH)
+        _session = _create_session()
+        # Standalone tokenizers runtime - transformers is not installed in the image
+        _tokenizer = Tokenizer.from_file(os.path.join(MODEL_PATH, "tokenizer.json"))
+        _tokenizer.enable_truncation(max_length=128)
+        # Padding is applied per length bucket in _encode
+        _tokenizer.no_padding()
+
+# Padded tokens per session.run call - same budget as ModelManager.DEFAULT_MAX_TOKENS_PER_BATCH
+MAX_TOKENS_PER_BATCH = int(os.environ.get('ENCODE_MAX_TOKENS_PER_BATCH', 4096))
 
-def _encode(texts):
+def _timed(timings, stage, started):
+    timings[stage] = timings.get(stage, 0.0) + (time.perf_counter() - started) * 1000
+
+def _encode(texts, timings=None):
+    """
+    L2-normalized embeddings for texts, in input order. Texts are sorted by token
+    length and run in buckets padded only to their own longest member, within
+    MAX_TOKENS_PER_BATCH padded tokens per session call.
+    """
     _load()
-    enc = _tokenizer(texts, padding=True, truncation=True, max_length=128, return_tensors="np")
-    outputs = _session.run(None, {
-        "input_ids": enc["input_ids"].astype(np.int64),
-        "attention_mask": enc["attention_mask"].astype(np.int64),
-    })
-    mask = enc["attention_mask"][:, :, np.newaxis].astype(np.float32)
-    pooled = (outputs[0] * mask).sum(axis=1) / mask.sum(axis=1).clip(min=1e-9)
+    timings = timings if timings is not None else {}
+
+    started = time.perf_counter()
+    token_ids = [e.ids for e in _tokenizer.encode_batch(texts)]
+    lengths = [max(len(ids), 1) for ids in token_ids]
+    order = sorted(range(len(texts)), key=lengths.__getitem__)
+    buckets, current = [], []
+    for i in order:
+        if current and (len(current) + 1) * lengths[i] > MAX_TOKENS_PER_BATCH:
+            buckets.append(current)
+            current = []
+        current.append(i)
+    if current:
+        buckets.append(current)
+    _timed(timings, 'tokenize', started)
+
+    pooled = None
+    for bucket in buckets:
+        started = time.perf_counter()
+        seq_len = lengths[bucket[-1]]
+        input_ids = np.zeros((len(bucket), seq_len), dtype=np.int64)
+        attention_mask = np.zeros((len(bucket), seq_len), dtype=np.int64)
+        for row, i in enumerate(bucket):
+            input_ids[row, :len(token_ids[i])] = token_ids[i]
+            attention_mask[row, :lengths[i]] = 1
+        _timed(timings, 'tokenize', started)
+
+        started = time.perf_counter()
+        outputs = _session.run(None, {
+            "input_ids": input_ids,
+            "attention_mask": attention_mask,
+        })
+        _timed(timings, 'infer', started)
+
+        started = time.perf_counter()
+        mask = attention_mask[:, :, np.newaxis].astype(np.float32)
+        bucket_pooled = (outputs[0] * mask).sum(axis=1) / mask.sum(axis=1).clip(min=1e-9)
+        if pooled is None:
+            pooled = np.empty((len(texts), bucket_pooled.shape[1]), dtype=np.float32)
+        pooled[bucket] = bucket_pooled
+        _timed(timings, 'pool', started)
+
+    started = time.perf_counter()
     norms = np.linalg.norm(pooled, axis=1, keepdims=True).clip(min=1e-9)
-    return pooled / norms
+    embeddings = pooled / norms
+    _timed(timings, 'pool', started)
+    return embeddings
+
+def _similarities(pairs, timings=None):
+    """Score (answer, correct_answer) pairs with one encode of the distinct texts"""
+    timings = timings if timings is not None else {}
+    positions = {}
+    answer_rows = [positions.setdefault(a, len(positions)) for a, _ in pairs]
+    reference_rows = [positions.setdefault(c, len(positions)) for _, c in pairs]
+    embeddings = _encode(list(positions), timings)
 
-def _similarity(a, b):
-    emb = _encode([a, b])
-    return float(np.clip(cosine_similarity(emb[0:1], emb[1:2])[0][0], 0.0, 1.0))
+    started = time.perf_counter()
+    # Rows are L2-normalized, so cosine similarity is the row-wise dot product
+    scores = np.clip(np.einsum('ij,ij->i', embeddings[answer_rows], embeddings[reference_rows]), 0.0, 1.0)
+    _timed(timings, 'score', started)
+    return scores.tolist()
+
+# Evaluation cascade - mirrors src/shared/evaluation_cascade.py (src/ is not in the image build context)
+CASCADE_ENABLED = os.environ.get('EVALUATION_CASCADE', 'true').lower() not in ('false', '0', 'no')
+LEXICAL_ACCEPT = float(os.environ.get('CASCADE_LEXICAL_ACCEPT', 0.9))
+_NON_WORD = re.compile(r"[^a-z0-9]+")
+# Directional words (to, from, into, onto) stay content so reversed arguments are not accepted
+STOPWORDS = frozenset("""
+a an the and or of in on at by for with as is are was were be been being it its this that these those
+which who whom what when where how than then so such can may might will would should could do does did
+has have had their there they them he she his her we our you your i me my also very just
+""".split())
+NEGATIONS = frozenset({'not', 'no', 'never', 'none', 'nor', 'cannot', 'without', 'neither'})
+NON_ANSWERS = frozenset({
+    'idk', 'i dont know', 'i do not know', 'dont know', 'no idea', 'not sure', 'pass', 'skip',
+    'no clue', 'unknown', 'n a', 'na', 'none',
+})
+
+def _normalize(text):
+    text = text.lower().replace("n't", " not").replace("'", "")
+    return _NON_WORD.sub(' ', text).strip()
+
+def _content_sequence(normalized):
+    return [t for t in normalized.split() if t not in STOPWORDS]
+
+def _content(normalized):
+    return frozenset(_content_sequence(normalized))
+
+def _dice(a, b):
+    return 2.0 * len(a & b) / (len(a) + len(b)) if a or b else 1.0
+
+def _bigrams(sequence):
+    if len(sequence) < 2:
+        return frozenset((t,) for t in sequence)
+    return frozenset(zip(sequence, sequence[1:]))
+
+def _exact_match_tier(answer, correct_answer):
+    student = _normalize(answer)
+    if student and student == _normalize(correct_answer):
+        return 1.0
+    if not student or student in NON_ANSWERS or not _content(student):
+        return 0.0
+    return None
+
+def _lexical_tier(answer, correct_answer):
+    student_sequence = _content_sequence(_normalize(answer))
+    reference_sequence = _content_sequence(_normalize(correct_answer))
+    student, reference = frozenset(student_sequence), frozenset(reference_sequence)
+    if not student or not reference:
+        return None
+    overlap = _dice(student, reference)
+    if overlap >= LEXICAL_ACCEPT and not (student ^ reference) & NEGATIONS:
+        # Word order must match too, or swapped arguments would score 1.0
+        ordered_overlap = min(overlap, _dice(_bigrams(student_sequence), _bigrams(reference_sequence)))
+        return ordered_overlap if ordered_overlap >= LEXICAL_ACCEPT else None
+    if overlap == 0.0 and len(student) <= 1 and len(reference) >= 3:
+        return 0.0
+    return None
+
+CASCADE_TIERS = [('exact_match', _exact_match_tier), ('lexical', _lexical_tier)] if CASCADE_ENABLED else []
+
+def _results(pairs, timings):
+    """
+    Evaluate (answer, correct_answer) pairs: cascade tiers per pair, then one
+    batched model pass over every pair the tiers left undecided
+    """
+    results = [None] * len(pairs)
+    undecided = []
+    for i, (answer, correct_answer) in enumerate(pairs):
+        tier_timings = {}
+        for name, tier in CASCADE_TIERS:
+            started = time.perf_counter()
+            score = tier(answer, correct_answer)
+            tier_timings[name] = round((time.perf_counter() - started) * 1000, 3)
+            if score is not None:
+                results[i] = {'similarity': round(score, 4), 'feedback': _feedback(score),
+                              'stage': name, 'timings_ms': tier_timings}
+                break
+        else:
+            undecided.append((i, tier_timings))
+
+    if undecided:
+        started = time.perf_counter()
+        scores = _similarities([pairs[i] for i, _ in undecided], timings)
+        # Model time is shared by every pair in the batch
+        model_ms = round((time.perf_counter() - started) * 1000, 3)
+        for (i, tier_timings), score in zip(undecided, scores):
+            results[i] = {'similarity': round(score, 4), 'feedback': _feedback(score),
+                          'stage': 'model', 'timings_ms': dict(tier_timings, model=model_ms)}
+    return results
+
+def _response(payload, timings, encoded_pairs):
+    """JSON response with the tokenize/infer/pool/score breakdown as headers"""
+    stages = ('tokenize', 'infer', 'pool', 'score')
+    return {
+        'statusCode': 200,
+        'headers': {
+            'Content-Type': 'application/json',
+            'Access-Control-Allow-Origin': '*',
+            'Server-Timing': ', '.join(f"{stage};dur={timings.get(stage, 0.0):.3f}" for stage in stages),
+            'X-Model-Pairs': str(encoded_pairs),
+        },
+        'body': json.dumps(payload)
+    }
 
 def _feedback(score):
     if score >= 0.85: return "Excellent! Your answer matches the expected response."
@@ -54,24 +280,15 @@ def handler(event, context):
         if isinstance(body, str):
             body = json.loads(body)
 
+        timings = {}
         if '/batch' in path or body.get('batch'):
-            pairs = body.get('answer_pairs', [])
-            results = []
-            for p in pairs:
-                score = _similarity(p['answer'], p['correct_answer'])
-                results.append({'similarity': round(score, 4), 'feedback': _feedback(score)})
-            return {
-                'statusCode': 200,
-                'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
-                'body': json.dumps({'results': results})
-            }
-
-        score = _similarity(body['answer'], body['correct_answer'])
-        return {
-            'statusCode': 200,
-            'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
-            'body': json.dumps({'similarity': round(score, 4), 'feedback': _feedback(score)})
-        }
+            pairs = [(p['answer'], p['correct_answer']) for p in body.get('answer_pairs', [])]
+            results = _results(pairs, timings)
+            encoded = sum(1 for r in results if r['stage'] == 'model')
+            return _response({'results': results}, timings, encoded)
+
+        result = _results([(body['answer'], body['correct_answer'])], timings)[0]
+        return _response(result, timings, int(result['stage'] == 'model'))
 
     except Exception as e:
         return {'statusCode': 500, 'body': json.dumps({'error': str(e)})}
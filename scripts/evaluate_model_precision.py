@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Model Precision Regression Harness
+Scores the fp32 and INT8 similarity models on a labelled answer set and reports
+similarity deltas, threshold-decision flips and per-answer latency.
+
+Usage:
+    python scripts/evaluate_model_precision.py
+    python scripts/evaluate_model_precision.py --pairs pairs.json --threshold 0.7
+
+The pairs file is a JSON list of objects:
+    {"answer": "...", "correct_answer": "...", "is_correct": true}
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import logging
+from typing import Any, Dict, List
+
+import numpy as np
+
+# Add shared modules to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src', 'shared'))
+
+from model_utils import ModelManager
+
+# Setup logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+# Small built-in sample used when no pairs file is given
+DEFAULT_PAIRS = [
+    {"answer": "A function that modifies another function's behavior",
+     "correct_answer": "A decorator is a function that takes another function and extends its behavior without modifying it",
+     "is_correct": True},
+    {"answer": "Returns the length of an object",
+     "correct_answer": "Return the number of items in a container",
+     "is_correct": True},
+    {"answer": "Makes a method belong to the class instead of an instance",
+     "correct_answer": "Transform a method into a class method that receives the class as implicit first argument",
+     "is_correct": True},
+    {"answer": "I don't know",
+     "correct_answer": "Return an iterator that aggregates elements from each of the iterables",
+     "is_correct": False},
+    {"answer": "It prints text to the screen",
+     "correct_answer": "Return a new sorted list from the items in iterable",
+     "is_correct": False},
+    {"answer": "A loop that never ends",
+     "correct_answer": "Return the absolute value of a number",
+     "is_correct": False},
+]
+
+
+def score_pairs(manager: ModelManager, pairs: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Score each pair individually, recording similarity and latency in milliseconds"""
+    if not manager.load_model():
+        raise RuntimeError(f"Failed to load {manager.precision} model from {manager.model_path}")
+
+    # Warm up so the first measured call does not include session initialization
+    manager.calculate_similarity("warm up", "warm up")
+
+    similarities = []
+    latencies_ms = []
+    for pair in pairs:
+        start = time.perf_counter()
+        similarity = manager.calculate_similarity(pair['answer'], pair['correct_answer'])
+        latencies_ms.append((time.perf_counter() - start) * 1000)
+        similarities.append(similarity if similarity is not None else float('nan'))
+
+    return {
+        'similarities': np.array(similarities),
+        'latencies_ms': np.array(latencies_ms),
+    }
+
+
+def build_report(fp32: Dict[str, Any], int8: Dict[str, Any], pairs: List[Dict[str, Any]],
+                 threshold: float) -> Dict[str, Any]:
+    """Compare the two variants"""
+    deltas = np.abs(fp32['similarities'] - int8['similarities'])
+    fp32_decisions = fp32['similarities'] >= threshold
+    int8_decisions = int8['similarities'] >= threshold
+    labels = np.array([bool(p.get('is_correct')) for p in pairs])
+    flips = [i for i in range(len(pairs)) if fp32_decisions[i] != int8_decisions[i]]
+
+    def latency(result: Dict[str, Any]) -> Dict[str, float]:
+        return {
+            'p50_ms': round(float(np.percentile(result['latencies_ms'], 50)), 2),
+            'p99_ms': round(float(np.percentile(result['latencies_ms'], 99)), 2),
+        }
+
+    return {
+        'pairs': len(pairs),
+        'threshold': threshold,
+        'similarity_delta': {
+            'mean': round(float(np.nanmean(deltas)), 4),
+            'max': round(float(np.nanmax(deltas)), 4),
+        },
+        'decision_flips': len(flips),
+        'flipped_pairs': [pairs[i]['answer'] for i in flips],
+        'accuracy': {
+            'fp32': round(float(np.mean(fp32_decisions == labels)), 4),
+            'int8': round(float(np.mean(int8_decisions == labels)), 4),
+        },
+        'latency': {
+            'fp32': latency(fp32),
+            'int8': latency(int8),
+        },
+    }
+
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(description="Compare fp32 and INT8 similarity models")
+    parser.add_argument('--model-dir', default='./final_similarity_model_onnx',
+                        help='Directory containing model.onnx and model_int8.onnx')
+    parser.add_argument('--pairs', help='JSON file of labelled answer pairs (default: built-in sample)')
+    parser.add_argument('--threshold', type=float, default=0.7, help='Correctness threshold (default: 0.7)')
+    args = parser.parse_args()
+
+    pairs = DEFAULT_PAIRS
+    if args.pairs:
+        with open(args.pairs, 'r') as f:
+            pairs = json.load(f)
+
+    if not os.path.exists(os.path.join(args.model_dir, ModelManager.MODEL_FILES['int8'])):
+        logger.error("INT8 model not found - run scripts/quantize_onnx_model.py first")
+        sys.exit(1)
+
+    # Cache disabled so every call measures a real inference
+    fp32 = score_pairs(ModelManager(args.model_dir, cache_max_bytes=0, precision='fp32'), pairs)
+    int8 = score_pairs(ModelManager(args.model_dir, cache_max_bytes=0, precision='int8'), pairs)
+
+    print(json.dumps(build_report(fp32, int8, pairs, args.threshold), indent=2))
+
+
+if __name__ == '__main__':
+    main()
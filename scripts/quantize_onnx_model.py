@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+ONNX Model Quantization Script
+Produces a dynamically-quantized INT8 copy of the similarity model next to the
+fp32 export. Select it at runtime with MODEL_PRECISION=int8. Both files get a
+`<model>.sha256` fingerprint sidecar so ModelManager never hashes them on a
+cold start.
+
+Usage:
+    python scripts/quantize_onnx_model.py
+    python scripts/quantize_onnx_model.py --model-dir ./final_similarity_model_onnx
+    python scripts/quantize_onnx_model.py --fingerprint-only
+
+Prerequisites:
+    pip install onnxruntime onnx
+"""
+import os
+import sys
+import argparse
+import logging
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src', 'shared'))
+
+# Setup logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+def quantize_model(model_dir: str, source_name: str = 'model.onnx', output_name: str = 'model_int8.onnx') -> str:
+    """Dynamically quantize the model weights to INT8 and return the output path"""
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    source_path = os.path.join(model_dir, source_name)
+    output_path = os.path.join(model_dir, output_name)
+
+    if not os.path.exists(source_path):
+        raise FileNotFoundError(f"ONNX model not found: {source_path}")
+
+    logger.info(f"Quantizing {source_path} -> {output_path}")
+    quantize_dynamic(
+        model_input=source_path,
+        model_output=output_path,
+        weight_type=QuantType.QInt8,
+    )
+
+    source_mb = os.path.getsize(source_path) / (1024 * 1024)
+    output_mb = os.path.getsize(output_path) / (1024 * 1024)
+    logger.info(f"Done: {source_mb:.1f}MB fp32 -> {output_mb:.1f}MB int8")
+    return output_path
+
+
+def write_fingerprints(model_dir: str, names=('model.onnx', 'model_int8.onnx')) -> None:
+    """Write the .sha256 sidecar for each ONNX file present in the model directory"""
+    from model_utils import write_model_hash
+
+    for name in names:
+        path = os.path.join(model_dir, name)
+        if os.path.exists(path):
+            logger.info(f"Fingerprint {name}: {write_model_hash(path)[:16]}")
+
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(description="Build the INT8 variant of the similarity model")
+    parser.add_argument('--model-dir', default='./final_similarity_model_onnx',
+                        help='Directory containing model.onnx (default: ./final_similarity_model_onnx)')
+    parser.add_argument('--output-name', default='model_int8.onnx',
+                        help='Output filename inside the model directory (default: model_int8.onnx)')
+    parser.add_argument('--fingerprint-only', action='store_true',
+                        help='Only (re)write the .sha256 fingerprints, e.g. after re-exporting model.onnx')
+    args = parser.parse_args()
+
+    try:
+        if not args.fingerprint_only:
+            quantize_model(args.model_dir, output_name=args.output_name)
+        write_fingerprints(args.model_dir, ('model.onnx', args.output_name))
+    except Exception as e:
+        logger.error(f"Quantization failed: {e}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
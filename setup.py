@@ -40,9 +40,9 @@ setup(
         "ml": [
             "torch>=2.0.0",
             "transformers>=4.30.0",
+            "tokenizers>=0.15.0",
             "sentence-transformers>=2.2.0",
             "numpy>=1.24.0",
-            "scikit-learn>=1.3.0",
         ]
     },
     entry_points={
@@ -11,12 +11,22 @@ from response_utils import create_response, handle_error
 from auth_utils import extract_user_from_cognito_event
 from model_utils import get_model_manager, initialize_model
 from evaluation_config import EvaluationConfig, FeedbackTemplates, get_evaluation_config
+from db_proxy_client import DBProxyClient
+from embedding_store import get_reference_embedding
+from evaluation_cascade import get_evaluation_cascade
+from similarity_cache import create_similarity_cache
 
 logger = logging.getLogger(__name__)
 
+# Initialize DB Proxy client (used for precomputed reference embeddings)
+db_proxy = DBProxyClient(os.environ.get('DB_PROXY_FUNCTION_NAME'))
+
 # Get evaluation configuration
 EVAL_CONFIG = get_evaluation_config()
 
+# Cross-container cache of model scores, consulted after the cheap cascade tiers
+similarity_cache = create_similarity_cache(db_proxy, lambda: get_model_manager().model_version)
+
 # Initialize model on Lambda container startup
 try:
     initialize_model()
@@ -52,6 +62,10 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         
     except Exception as e:
         return handle_error(e)
+    finally:
+        # The sandbox is frozen once we return; land cache write-backs first
+        if similarity_cache is not None:
+            similarity_cache.flush(timeout=similarity_cache.DEFAULT_FLUSH_TIMEOUT_SECONDS)
 
 
 def handle_evaluate_answer(event: Dict[str, Any], user_id: str) -> Dict[str, Any]:
@@ -61,6 +75,7 @@ def handle_evaluate_answer(event: Dict[str, Any], user_id: str) -> Dict[str, Any
         body = json.loads(event.get('body', '{}'))
         student_answer = body.get('student_answer', '').strip()
         correct_answer = body.get('correct_answer', '').strip()
+        term_id = body.get('term_id')  # Optional - enables the stored reference embedding
         threshold_raw = body.get('threshold', EVAL_CONFIG['default_threshold'])
         
         # Validate threshold before converting to float
@@ -85,8 +100,8 @@ def handle_evaluate_answer(event: Dict[str, Any], user_id: str) -> Dict[str, Any
         if not EvaluationConfig.validate_text_length(correct_answer):
             return create_response(400, {'error': f'correct_answer too long (max {EvaluationConfig.MAX_TEXT_LENGTH} characters)'})
         
-        # Evaluate the answer
-        evaluation_result = evaluate_answer(student_answer, correct_answer, threshold)
+        # Evaluate the answer (the term's stored embedding is used if the model tier runs)
+        evaluation_result = evaluate_answer(student_answer, correct_answer, threshold, term_id)
         
         if evaluation_result is None:
             return create_response(503, {'error': 'Answer evaluation service temporarily unavailable'})
@@ -181,6 +196,7 @@ def handle_health_check() -> Dict[str, Any]:
         return create_response(200, {
             'status': 'healthy' if is_healthy else 'unhealthy',
             'model_info': model_info,
+            'similarity_cache': similarity_cache.stats() if similarity_cache else None,
             'service': 'answer-evaluation'
         })
         
@@ -193,7 +209,8 @@ def handle_health_check() -> Dict[str, Any]:
         })
 
 
-def evaluate_answer(student_answer: str, correct_answer: str, threshold: float = 0.7) -> Optional[Dict[str, Any]]:
+def evaluate_answer(student_answer: str, correct_answer: str, threshold: float = 0.7,
+                    term_id: Optional[str] = None) -> Optional[Dict[str, Any]]:
     """
     Evaluate a student answer against the correct answer using semantic similarity
     
@@ -201,20 +218,29 @@ def evaluate_answer(student_answer: str, correct_answer: str, threshold: float =
         student_answer: The student's submitted answer
         correct_answer: The correct/expected answer
         threshold: Similarity threshold for determining correctness (0.6, 0.7, 0.8)
+        term_id: Term whose precomputed definition embedding stands in for
+            correct_answer; only looked up if the model tier is reached
     
     Returns:
         Dictionary with evaluation results or None if evaluation fails
     """
     try:
-        model_manager = get_model_manager()
+        def model_similarity() -> Optional[float]:
+            model_manager = get_model_manager()
+            reference_embedding = get_reference_embedding(db_proxy, term_id, correct_answer) if term_id else None
+            if reference_embedding is not None:
+                return model_manager.calculate_similarity_to_reference(student_answer, reference_embedding)
+            return model_manager.calculate_similarity(student_answer, correct_answer)
         
-        # Calculate semantic similarity
-        similarity_score = model_manager.calculate_similarity(student_answer, correct_answer)
+        # Exact matches and clear-cut answers are decided without the model
+        cascade_result = get_evaluation_cascade(similarity_cache).evaluate(student_answer, correct_answer, threshold, model_similarity)
         
-        if similarity_score is None:
+        if cascade_result is None:
             logger.error("Failed to calculate similarity score")
             return None
         
+        similarity_score = cascade_result['similarity_score']
+        
         # Determine if answer is correct based on threshold
         is_correct = similarity_score >= threshold
         
@@ -226,7 +252,9 @@ def evaluate_answer(student_answer: str, correct_answer: str, threshold: float =
             'is_correct': is_correct,
             'feedback': feedback,
             'threshold': threshold,
-            'correct_answer': correct_answer
+            'correct_answer': correct_answer,
+            'evaluation_stage': cascade_result['stage'],
+            'stage_timings_ms': cascade_result['timings_ms']
         }
         
     except Exception as e:
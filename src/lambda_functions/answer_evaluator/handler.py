@@ -17,6 +17,11 @@ logger.setLevel(os.environ.get('LOG_LEVEL', 'INFO'))
 lambda_client = boto3.client('lambda')
 INFERENCE_FUNCTION_NAME = os.environ.get('INFERENCE_FUNCTION_NAME')
 
+# Batch inference chunking. Synchronous invoke payloads are capped at 6MB;
+# the pair cap bounds inference memory and duration per call.
+INFERENCE_MAX_PAYLOAD_BYTES = int(os.environ.get('INFERENCE_MAX_PAYLOAD_BYTES', 5 * 1024 * 1024))
+INFERENCE_MAX_BATCH_PAIRS = int(os.environ.get('INFERENCE_MAX_BATCH_PAIRS', 256))
+
 def lambda_handler(event, context):
     """
     Business logic handler - routes requests and applies thresholds
@@ -137,47 +142,45 @@ def handle_batch_evaluation(body):
         
         logger.info(f"Batch evaluation: {len(answer_pairs)} pairs")
         
-        results = []
+        results = [None] * len(answer_pairs)
+        valid = []
         for i, pair in enumerate(answer_pairs):
             if not isinstance(pair, dict) or 'answer' not in pair or 'correct_answer' not in pair:
-                results.append({
+                results[i] = {
                     'error': True,
                     'message': f'Invalid pair format at index {i}'
-                })
+                }
                 continue
-            
-            # Invoke inference Lambda
+            valid.append((i, {
+                'answer': str(pair['answer']).strip(),
+                'correct_answer': str(pair['correct_answer']).strip()
+            }))
+        
+        # One inference invocation per chunk instead of one per pair
+        for chunk in chunk_pairs(valid):
             try:
-                response = lambda_client.invoke(
-                    FunctionName=INFERENCE_FUNCTION_NAME,
-                    InvocationType='RequestResponse',
-                    Payload=json.dumps({
-                        'answer': pair['answer'].strip(),
-                        'correct_answer': pair['correct_answer'].strip()
-                    })
-                )
-                
-                result = json.loads(response['Payload'].read())
-                
-                if result.get('statusCode') == 200:
-                    similarity = result['similarity']
-                    feedback = generate_feedback(similarity, domain_id)
-                    results.append({
-                        'similarity': round(similarity, 4),
-                        'feedback': feedback,
-                        'error': False
-                    })
-                else:
-                    results.append({
+                similarities = invoke_batch_inference([pair for _, pair in chunk])
+            except Exception as e:
+                logger.error(f"Batch inference error for {len(chunk)} pairs: {e}")
+                for i, _ in chunk:
+                    results[i] = {
+                        'error': True,
+                        'message': str(e)
+                    }
+                continue
+            
+            for (i, _), similarity in zip(chunk, similarities):
+                if similarity is None:
+                    results[i] = {
                         'error': True,
                         'message': 'Inference failed'
-                    })
-            except Exception as e:
-                logger.error(f"Batch item {i} error: {e}")
-                results.append({
-                    'error': True,
-                    'message': str(e)
-                })
+                    }
+                else:
+                    results[i] = {
+                        'similarity': round(similarity, 4),
+                        'feedback': generate_feedback(similarity, domain_id),
+                        'error': False
+                    }
         
         logger.info(f"Batch evaluation complete: {len(results)} results")
         
@@ -201,6 +204,54 @@ def handle_batch_evaluation(body):
         }
 
 
+def chunk_pairs(indexed_pairs):
+    """
+    Split (index, pair) tuples into chunks that fit one inference invocation
+    
+    A chunk closes when adding the next pair would exceed INFERENCE_MAX_PAYLOAD_BYTES
+    of serialized pairs or INFERENCE_MAX_BATCH_PAIRS pairs.
+    """
+    chunks = []
+    current, current_bytes = [], 0
+    for item in indexed_pairs:
+        # +2 covers the separator and array brackets around the serialized pair
+        size = len(json.dumps(item[1])) + 2
+        if current and (current_bytes + size > INFERENCE_MAX_PAYLOAD_BYTES
+                        or len(current) >= INFERENCE_MAX_BATCH_PAIRS):
+            chunks.append(current)
+            current, current_bytes = [], 0
+        current.append(item)
+        current_bytes += size
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def invoke_batch_inference(pairs):
+    """
+    Score a chunk of answer pairs with a single inference invocation
+    
+    Returns:
+        List of similarities aligned with pairs (None for pairs the model rejected)
+    """
+    response = lambda_client.invoke(
+        FunctionName=INFERENCE_FUNCTION_NAME,
+        InvocationType='RequestResponse',
+        Payload=json.dumps({'pairs': pairs})
+    )
+    
+    result = json.loads(response['Payload'].read())
+    
+    if result.get('statusCode') != 200:
+        raise RuntimeError(f"Inference failed: {result.get('error')}")
+    
+    similarities = result.get('similarities', [])
+    if len(similarities) != len(pairs):
+        raise RuntimeError(f"Inference returned {len(similarities)} results for {len(pairs)} pairs")
+    
+    return similarities
+
+
 def handle_health_check():
     """Health check - verifies inference Lambda is accessible"""
     try:
@@ -22,12 +22,15 @@ from response_utils import (
 )
 from auth_utils import extract_user_from_cognito_event
 from authorization_utils import validate_api_access, AuthorizationError
+from embedding_store import store_term_embeddings
+from identity_cache import get_identity_resolver
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
 # Initialize DB Proxy client
 db_proxy = DBProxyClient(os.environ.get('DB_PROXY_FUNCTION_NAME'))
+identity_resolver = get_identity_resolver(db_proxy)
 
 
 def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
@@ -52,15 +55,14 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         
         cognito_sub = user_info['user_id']
         
-        # Look up database user ID from cognito_sub
-        user_query = "SELECT id FROM users WHERE cognito_sub = %s;"
-        user_result = db_proxy.execute_query_one(user_query, [cognito_sub])
+        # Look up database user ID from cognito_sub (cached per container)
+        identity = identity_resolver.resolve(cognito_sub, user_info.get('groups'))
         
-        if not user_result:
+        if not identity:
             logger.error(f"User not found in database for cognito_sub: {cognito_sub}")
             return create_error_response(404, "User not found in database")
         
-        user_id = user_result[0]
+        user_id = identity['user_id']
         logger.info(f"Resolved database user_id: {user_id}")
         
         if http_method == 'POST':
@@ -436,6 +438,7 @@ def process_batch_upload_transaction(batch_data: Dict[str, Any], user_id: str) -
         domains_skipped = 0
         processing_summary = []
         failed_domains = []
+        new_terms = []  # (term_id, definition) for embedding precomputation
         
         # Process each domain in the batch
         for domain_index, domain in enumerate(batch_data.get('domains', [])):
@@ -563,6 +566,7 @@ def process_batch_upload_transaction(batch_data: Dict[str, Any], user_id: str) -
                         
                         domain_terms_created += 1
                         terms_created += 1
+                        new_terms.append((term_id, term_definition))
                         
                     except Exception as term_error:
                         logger.error(f"Error processing term {term_index} in domain '{domain_name}': {str(term_error)}")
@@ -600,8 +604,12 @@ def process_batch_upload_transaction(batch_data: Dict[str, Any], user_id: str) -
                 # Continue with other domains instead of failing entire batch
                 continue
         
+        # Precompute definition embeddings for all new terms in one encode pass
+        embeddings_stored = store_term_embeddings(db_proxy, new_terms)
+        
         # Return results
-        logger.info(f"Batch upload completed: {domains_created} domains, {terms_created} terms created")
+        logger.info(f"Batch upload completed: {domains_created} domains, {terms_created} terms created, "
+                    f"{embeddings_stored} embeddings stored")
         
         return {
             'success': True,
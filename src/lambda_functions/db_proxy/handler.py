@@ -13,12 +13,16 @@ from uuid import UUID
 # Add shared modules to path
 sys.path.append('/opt/python')
 
-from database import get_db_cursor, execute_query, execute_query_one, health_check
+from database import get_db_cursor, execute_query, execute_query_one, health_check, resolve_row_factory
 import logging
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
+# Result encodings: 'rows' (value arrays), 'dict' (one object per row) or
+# 'columnar' (column names once, then value arrays)
+RESULT_FORMATS = ('rows', 'dict', 'columnar')
+
 
 def json_serial(obj):
     """JSON serializer for objects not serializable by default json code"""
@@ -31,17 +35,55 @@ def json_serial(obj):
     raise TypeError(f"Type {type(obj)} not serializable")
 
 
+def result_format_of(spec):
+    """Result encoding requested by an event or batch statement"""
+    result_format = spec.get('result_format') or ('dict' if spec.get('return_dict') else 'rows')
+    if result_format not in RESULT_FORMATS:
+        raise ValueError(f"Unknown result_format: {result_format}")
+    return result_format
+
+
+def run_statement(cursor, query, params, result_format, one=False):
+    """
+    Execute one statement on an open cursor and encode its result
+
+    Column names come from this execution's cursor description, so statements
+    with RETURNING run exactly once.
+    """
+    cursor.row_factory = resolve_row_factory('dict' if result_format == 'dict' else None)
+    cursor.execute(query, tuple(params) if params else None)
+    
+    if cursor.description is None:
+        return {'result': None if one else [], 'row_count': cursor.rowcount}
+    
+    payload = {}
+    if result_format == 'columnar':
+        payload['columns'] = [column.name for column in cursor.description]
+    if one:
+        payload['result'] = cursor.fetchone()
+    else:
+        rows = cursor.fetchall()
+        payload['result'] = rows
+        payload['row_count'] = len(rows)
+    return payload
+
+
 def lambda_handler(event, context):
     """
     Handle database operations from other Lambdas
     
     Event format:
     {
-        "operation": "execute_query" | "execute_query_one" | "health_check" | "execute_many",
+        "operation": "execute_query" | "execute_query_one" | "health_check" | "execute_many" | "execute_batch",
         "query": "SELECT * FROM users WHERE email = %s",
         "params": ["user@example.com"],  # Optional
-        "return_dict": true  # Optional, return rows as dicts instead of tuples
+        "return_dict": true,  # Optional, return rows as dicts instead of tuples
+        "result_format": "columnar"  # Optional, "rows" | "dict" | "columnar"
     }
+    
+    execute_batch runs "statements" (a list of {"query", "params", "one",
+    "return_dict", "result_format"}) in one transaction and returns one
+    result per statement; any failure rolls back the whole batch.
     """
     try:
         operation = event.get('operation')
@@ -67,7 +109,6 @@ def lambda_handler(event, context):
         elif operation == 'execute_query':
             query = event.get('query')
             params = event.get('params')
-            return_dict = event.get('return_dict', False)
             
             if not query:
                 return {
@@ -75,7 +116,18 @@ def lambda_handler(event, context):
                     'body': json.dumps({'error': 'Missing query parameter'})
                 }
             
-            result = execute_query(query, tuple(params) if params else None)
+            result_format = result_format_of(event)
+            if result_format == 'columnar':
+                with get_db_cursor() as cursor:
+                    payload = run_statement(cursor, query, params, result_format)
+                return {
+                    'statusCode': 200,
+                    'body': json.dumps(payload, default=json_serial)
+                }
+            
+            # Dict rows come from the same execution (no second query for column names)
+            result = execute_query(query, tuple(params) if params else None,
+                                   row_factory='dict' if result_format == 'dict' else None)
             
             # Handle case where result is an integer (INSERT/UPDATE/DELETE row count)
             if isinstance(result, int):
@@ -87,14 +139,6 @@ def lambda_handler(event, context):
                     }, default=json_serial)
                 }
             
-            # Convert to dict if requested
-            if return_dict and result:
-                # Get column names from cursor description
-                with get_db_cursor() as cursor:
-                    cursor.execute(query, tuple(params) if params else None)
-                    columns = [desc[0] for desc in cursor.description]
-                    result = [dict(zip(columns, row)) for row in result]
-            
             return {
                 'statusCode': 200,
                 'body': json.dumps({
@@ -107,7 +151,6 @@ def lambda_handler(event, context):
         elif operation == 'execute_query_one':
             query = event.get('query')
             params = event.get('params')
-            return_dict = event.get('return_dict', False)
             
             if not query:
                 return {
@@ -115,14 +158,17 @@ def lambda_handler(event, context):
                     'body': json.dumps({'error': 'Missing query parameter'})
                 }
             
-            result = execute_query_one(query, tuple(params) if params else None)
-            
-            # Convert to dict if requested
-            if return_dict and result:
+            result_format = result_format_of(event)
+            if result_format == 'columnar':
                 with get_db_cursor() as cursor:
-                    cursor.execute(query, tuple(params) if params else None)
-                    columns = [desc[0] for desc in cursor.description]
-                    result = dict(zip(columns, result))
+                    payload = run_statement(cursor, query, params, result_format, one=True)
+                return {
+                    'statusCode': 200,
+                    'body': json.dumps(payload, default=json_serial)
+                }
+            
+            result = execute_query_one(query, tuple(params) if params else None,
+                                       row_factory='dict' if result_format == 'dict' else None)
             
             return {
                 'statusCode': 200,
@@ -154,12 +200,52 @@ def lambda_handler(event, context):
                 }, default=json_serial)
             }
         
+        # Execute several statements in one transaction and one invocation
+        elif operation == 'execute_batch':
+            statements = event.get('statements')
+            
+            if not statements or not all(isinstance(s, dict) and s.get('query') for s in statements):
+                return {
+                    'statusCode': 400,
+                    'body': json.dumps({'error': 'Missing statements parameter or statement query'})
+                }
+            
+            formats = [result_format_of(statement) for statement in statements]
+            results = []
+            try:
+                # The cursor context commits once at the end and rolls back on any failure
+                with get_db_cursor() as cursor:
+                    for statement, result_format in zip(statements, formats):
+                        results.append(run_statement(cursor, statement['query'], statement.get('params'),
+                                                     result_format, one=bool(statement.get('one'))))
+            except Exception as e:
+                logger.error(f"Batch statement {len(results)} failed: {e}", exc_info=True)
+                return {
+                    'statusCode': 500,
+                    'body': json.dumps({
+                        'error': 'Database operation failed',
+                        'message': str(e),
+                        'statement_index': len(results)
+                    }, default=json_serial)
+                }
+            
+            return {
+                'statusCode': 200,
+                'body': json.dumps({'results': results}, default=json_serial)
+            }
+        
         else:
             return {
                 'statusCode': 400,
                 'body': json.dumps({'error': f'Unknown operation: {operation}'})
             }
     
+    except ValueError as e:
+        return {
+            'statusCode': 400,
+            'body': json.dumps({'error': str(e)})
+        }
+    
     except Exception as e:
         logger.error(f"Database proxy error: {e}", exc_info=True)
         return {
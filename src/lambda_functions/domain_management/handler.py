@@ -11,14 +11,42 @@ from typing import Dict, Any
 # Add shared modules to path
 sys.path.append('/opt/python')
 
-from db_proxy_client import DBProxyClient
+from db_proxy_client import DBProxyClient, register_query
 from response_utils import create_success_response, create_created_response, create_error_response
+from embedding_store import store_term_embeddings
+from identity_cache import get_identity_resolver
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
 # Initialize DB Proxy client
 db_proxy = DBProxyClient(os.environ.get('DB_PROXY_FUNCTION_NAME'))
+identity_resolver = get_identity_resolver(db_proxy)
+
+# Hot queries, prepared per connection on first use
+OWNED_DOMAIN_QUERY = register_query(
+    'domains.owned_by_user',
+    "SELECT id FROM tree_nodes WHERE id = %s AND user_id = %s AND node_type = 'domain'"
+)
+DOMAIN_LIST_QUERY = register_query('domains.list_for_user', """
+    SELECT 
+        d.id,
+        d.data,
+        d.metadata,
+        d.created_at,
+        d.updated_at,
+        COUNT(t.id) as term_count
+    FROM tree_nodes d
+    LEFT JOIN tree_nodes t ON t.parent_id = d.id AND t.node_type = 'term'
+    WHERE (d.user_id = %s OR d.is_public = true) AND d.node_type = 'domain'
+    GROUP BY d.id, d.data, d.metadata, d.created_at, d.updated_at
+    ORDER BY d.created_at DESC
+""")
+INSERT_TERM_QUERY = register_query('terms.insert', """
+    INSERT INTO tree_nodes (user_id, parent_id, node_type, data)
+    VALUES (%s, %s, 'term', %s)
+    RETURNING id, data, created_at
+""")
 
 
 def lambda_handler(event, context):
@@ -45,17 +73,13 @@ def lambda_handler(event, context):
         if not cognito_sub:
             return create_error_response(401, 'Unauthorized - No user identity found')
         
-        # Get user_id from database
-        user_result = db_proxy.execute_query(
-            "SELECT id FROM users WHERE cognito_sub = %s",
-            params=[cognito_sub],
-            return_dict=True
-        )
+        # Get user_id (cached per container)
+        identity = identity_resolver.resolve_event(event)
         
-        if not user_result or len(user_result) == 0:
+        if not identity:
             return create_error_response(404, 'User not found')
         
-        user_id = user_result[0]['id']
+        user_id = identity['user_id']
         
         # Route to appropriate handler
         if http_method == 'POST' and path.endswith('/domains'):
@@ -153,20 +177,7 @@ def handle_get_domains(user_id):
     """Get all domains for user"""
     try:
         domains = db_proxy.execute_query(
-            """
-            SELECT 
-                d.id,
-                d.data,
-                d.metadata,
-                d.created_at,
-                d.updated_at,
-                COUNT(t.id) as term_count
-            FROM tree_nodes d
-            LEFT JOIN tree_nodes t ON t.parent_id = d.id AND t.node_type = 'term'
-            WHERE (d.user_id = %s OR d.is_public = true) AND d.node_type = 'domain'
-            GROUP BY d.id, d.data, d.metadata, d.created_at, d.updated_at
-            ORDER BY d.created_at DESC
-            """,
+            DOMAIN_LIST_QUERY,
             params=[user_id],
             return_dict=True
         )
@@ -250,7 +261,7 @@ def handle_update_domain(event, user_id):
         
         # Verify ownership
         existing = db_proxy.execute_query(
-            "SELECT id FROM tree_nodes WHERE id = %s AND user_id = %s AND node_type = 'domain'",
+            OWNED_DOMAIN_QUERY,
             params=[domain_id, user_id],
             return_dict=True
         )
@@ -330,7 +341,7 @@ def handle_delete_domain(event, user_id):
         
         # Verify ownership
         existing = db_proxy.execute_query(
-            "SELECT id FROM tree_nodes WHERE id = %s AND user_id = %s AND node_type = 'domain'",
+            OWNED_DOMAIN_QUERY,
             params=[domain_id, user_id],
             return_dict=True
         )
@@ -367,7 +378,7 @@ def handle_add_terms(event, user_id):
         
         # Verify domain ownership
         domain = db_proxy.execute_query(
-            "SELECT id FROM tree_nodes WHERE id = %s AND user_id = %s AND node_type = 'domain'",
+            OWNED_DOMAIN_QUERY,
             params=[domain_id, user_id],
             return_dict=True
         )
@@ -389,11 +400,7 @@ def handle_add_terms(event, user_id):
             })
             
             result = db_proxy.execute_query(
-                """
-                INSERT INTO tree_nodes (user_id, parent_id, node_type, data)
-                VALUES (%s, %s, 'term', %s)
-                RETURNING id, data, created_at
-                """,
+                INSERT_TERM_QUERY,
                 params=[user_id, domain_id, term_json],
                 return_dict=True
             )
@@ -407,6 +414,9 @@ def handle_add_terms(event, user_id):
                     'created_at': t['created_at']
                 })
         
+        # Precompute definition embeddings so evaluation only encodes student answers
+        store_term_embeddings(db_proxy, [(t['id'], t['definition']) for t in created_terms])
+        
         return create_created_response({
             'message': f'{len(created_terms)} terms added successfully',
             'terms': created_terms
@@ -427,7 +437,7 @@ def handle_get_terms(event, user_id):
         
         # Verify domain ownership
         domain = db_proxy.execute_query(
-            "SELECT id FROM tree_nodes WHERE id = %s AND user_id = %s AND node_type = 'domain'",
+            OWNED_DOMAIN_QUERY,
             params=[domain_id, user_id],
             return_dict=True
         )
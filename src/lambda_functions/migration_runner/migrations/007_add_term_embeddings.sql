@@ -0,0 +1,8 @@
+-- Migration: Store precomputed definition embeddings on term nodes
+-- Embeddings are little-endian float16 vectors tagged with the model version
+-- that produced them, so a model upgrade invalidates them without a rewrite.
+-- Date: 2026-10-16
+
+ALTER TABLE tree_nodes
+ADD COLUMN IF NOT EXISTS definition_embedding BYTEA,
+ADD COLUMN IF NOT EXISTS embedding_model_version VARCHAR(64);
@@ -0,0 +1,16 @@
+-- Migration: Shared similarity cache for answer evaluation
+-- Scores are keyed by sha256(model version, normalized answer, normalized reference),
+-- so a model upgrade stops matching old rows; expires_at bounds their lifetime. The
+-- quiz engine's hourly purge_similarity_cache event deletes expired rows, and
+-- SimilarityCache.purge() also drops other-version rows on demand.
+-- Date: 2026-10-16
+
+CREATE TABLE IF NOT EXISTS similarity_cache (
+    cache_key CHAR(64) PRIMARY KEY,
+    similarity REAL NOT NULL CHECK (similarity BETWEEN 0.0 AND 1.0),
+    model_version VARCHAR(64) NOT NULL,
+    expires_at TIMESTAMP WITH TIME ZONE NOT NULL,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_similarity_cache_expires_at ON similarity_cache(expires_at);
@@ -0,0 +1,11 @@
+-- Migration: Track provisional (lexical fallback) answer evaluations
+-- When the semantic evaluator misses the submit-answer deadline the quiz engine
+-- stores the lexical score as provisional and re-scores it in the background.
+-- Date: 2026-10-16
+
+ALTER TABLE progress_records
+ADD COLUMN IF NOT EXISTS evaluation_method VARCHAR(20) NOT NULL DEFAULT 'semantic',
+ADD COLUMN IF NOT EXISTS is_provisional BOOLEAN NOT NULL DEFAULT FALSE;
+
+CREATE INDEX IF NOT EXISTS idx_progress_records_provisional
+ON progress_records(created_at) WHERE is_provisional;
@@ -0,0 +1,21 @@
+-- Migration: Per-user spaced-repetition schedule
+-- One row per (user, term), advanced on every graded answer. Adaptive quizzes
+-- read the due queue through idx_term_schedules_due instead of scanning
+-- progress_records.
+-- Date: 2026-10-16
+
+CREATE TABLE IF NOT EXISTS term_schedules (
+    user_id UUID REFERENCES users(id) ON DELETE CASCADE NOT NULL,
+    term_id UUID REFERENCES tree_nodes(id) ON DELETE CASCADE NOT NULL,
+    domain_id UUID REFERENCES tree_nodes(id) ON DELETE CASCADE NOT NULL,
+    ease REAL NOT NULL DEFAULT 2.5,
+    interval_days REAL NOT NULL DEFAULT 0,
+    repetitions INTEGER NOT NULL DEFAULT 0,
+    lapses INTEGER NOT NULL DEFAULT 0,
+    due_at TIMESTAMP WITH TIME ZONE NOT NULL,
+    last_reviewed_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (user_id, term_id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_term_schedules_due
+ON term_schedules(user_id, domain_id, due_at);
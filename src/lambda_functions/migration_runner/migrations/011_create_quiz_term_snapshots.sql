@@ -0,0 +1,33 @@
+-- Migration: Seeded question order over shared domain snapshots
+-- Sessions store a snapshot version plus an affine permutation (stride, offset)
+-- instead of the full term_order list; the nth question is one primary-key
+-- lookup. Snapshots are shared by every session over the same domain version.
+-- Date: 2026-10-16
+
+CREATE TABLE IF NOT EXISTS quiz_term_snapshots (
+    domain_id UUID REFERENCES tree_nodes(id) ON DELETE CASCADE NOT NULL,
+    version VARCHAR(32) NOT NULL,
+    term_position INTEGER NOT NULL,
+    term_id UUID REFERENCES tree_nodes(id) ON DELETE CASCADE NOT NULL,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (domain_id, version, term_position)
+);
+
+-- Term for question idx of a session. Sessions created before this migration
+-- (and adaptive sessions) carry an explicit term_order list.
+CREATE OR REPLACE FUNCTION quiz_session_term(session_data JSONB, session_domain UUID, idx INTEGER, total INTEGER)
+RETURNS UUID
+LANGUAGE SQL STABLE
+AS $$
+    SELECT CASE
+        WHEN session_data->'term_order' IS NOT NULL THEN (session_data->'term_order'->>idx)::uuid
+        WHEN idx < 0 OR idx >= total THEN NULL
+        ELSE (
+            SELECT s.term_id FROM quiz_term_snapshots s
+            WHERE s.domain_id = session_domain
+              AND s.version = session_data->>'snapshot'
+              AND s.term_position = mod((session_data->>'stride')::bigint * idx
+                                        + (session_data->>'offset')::bigint, total)
+        )
+    END
+$$;
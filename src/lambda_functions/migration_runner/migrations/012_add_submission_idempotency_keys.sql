@@ -0,0 +1,10 @@
+-- Migration: Idempotent answer submission
+-- Clients send an idempotency key per submission; a retry finds the stored
+-- progress record and replays its result instead of recording a second answer.
+-- Date: 2026-10-16
+
+ALTER TABLE progress_records
+ADD COLUMN IF NOT EXISTS idempotency_key VARCHAR(64);
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_progress_records_idempotency
+ON progress_records(session_id, idempotency_key) WHERE idempotency_key IS NOT NULL;
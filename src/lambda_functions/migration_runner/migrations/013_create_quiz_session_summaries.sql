@@ -0,0 +1,19 @@
+-- Migration: Materialized quiz completion summaries
+-- Written once when a session completes (and refreshed if a provisional answer
+-- is re-scored afterwards); the summary endpoint is then one primary-key read.
+-- Date: 2026-10-16
+
+CREATE TABLE IF NOT EXISTS quiz_session_summaries (
+    session_id UUID PRIMARY KEY REFERENCES quiz_sessions(id) ON DELETE CASCADE,
+    user_id UUID REFERENCES users(id) ON DELETE CASCADE NOT NULL,
+    domain_name TEXT,
+    total_questions INTEGER NOT NULL,
+    total_attempts INTEGER NOT NULL,
+    correct_count INTEGER NOT NULL,
+    average_similarity NUMERIC(4,3) NOT NULL,
+    started_at TIMESTAMP WITH TIME ZONE,
+    completed_at TIMESTAMP WITH TIME ZONE,
+    total_seconds INTEGER NOT NULL DEFAULT 0,
+    detailed_results JSONB NOT NULL DEFAULT '[]',
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
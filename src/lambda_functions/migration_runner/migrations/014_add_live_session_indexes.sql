@@ -0,0 +1,28 @@
+-- Migration: Live-session partial indexes and activity tracking
+-- Only active/paused sessions are ever looked up by user+domain or reaped, so
+-- the indexes cover those rows alone and stay small as completed and abandoned
+-- history grows. last_activity_at drives the stale-session reaper.
+-- Date: 2026-10-16
+
+ALTER TABLE quiz_sessions
+ADD COLUMN IF NOT EXISTS last_activity_at TIMESTAMP WITH TIME ZONE;
+
+UPDATE quiz_sessions
+SET last_activity_at = COALESCE(paused_at, started_at, CURRENT_TIMESTAMP)
+WHERE last_activity_at IS NULL;
+
+ALTER TABLE quiz_sessions
+ALTER COLUMN last_activity_at SET DEFAULT CURRENT_TIMESTAMP,
+ALTER COLUMN last_activity_at SET NOT NULL;
+
+-- "Active session for user+domain" (start, restart)
+CREATE INDEX IF NOT EXISTS idx_quiz_sessions_live_user_domain
+ON quiz_sessions(user_id, domain_id) WHERE status IN ('active', 'paused');
+
+-- Reaper keyset scan, oldest activity first
+CREATE INDEX IF NOT EXISTS idx_quiz_sessions_live_activity
+ON quiz_sessions(last_activity_at, id) WHERE status IN ('active', 'paused');
+
+-- idx_quiz_sessions_status stays: completed-session listing and progress
+-- queries filter on non-live statuses, which the partial indexes above do not
+-- cover, and the schema validator expects it.
@@ -0,0 +1,28 @@
+-- Migration: Prunable quiz term snapshots
+-- Each (domain, version) snapshot gets a parent row that start-quiz upserts,
+-- touching last_used_at under a row lock, and the snapshot rows cascade from
+-- it. The hourly reaper deletes parents that no active/paused session uses and
+-- that have not been started from recently, so snapshots of completed and
+-- reaped sessions do not accumulate. A start racing the prune either waits for
+-- the delete and rewrites the snapshot, or touches the parent first and the
+-- delete re-checks last_used_at and skips it.
+-- Date: 2026-10-17
+
+CREATE TABLE IF NOT EXISTS quiz_term_snapshot_versions (
+    domain_id UUID REFERENCES tree_nodes(id) ON DELETE CASCADE NOT NULL,
+    version VARCHAR(32) NOT NULL,
+    last_used_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP NOT NULL,
+    PRIMARY KEY (domain_id, version)
+);
+
+INSERT INTO quiz_term_snapshot_versions (domain_id, version)
+SELECT DISTINCT domain_id, version FROM quiz_term_snapshots
+ON CONFLICT DO NOTHING;
+
+ALTER TABLE quiz_term_snapshots
+DROP CONSTRAINT IF EXISTS quiz_term_snapshots_version_fkey;
+
+ALTER TABLE quiz_term_snapshots
+ADD CONSTRAINT quiz_term_snapshots_version_fkey
+FOREIGN KEY (domain_id, version) REFERENCES quiz_term_snapshot_versions(domain_id, version)
+ON DELETE CASCADE;
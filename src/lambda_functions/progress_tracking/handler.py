@@ -14,12 +14,14 @@ sys.path.append('/opt/python')
 
 from db_proxy_client import DBProxyClient
 from response_utils import create_success_response, create_error_response
+from identity_cache import get_identity_resolver
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
 # Initialize DB Proxy client
 db_proxy = DBProxyClient(os.environ.get('DB_PROXY_FUNCTION_NAME'))
+identity_resolver = get_identity_resolver(db_proxy)
 
 
 def lambda_handler(event, context):
@@ -40,17 +42,13 @@ def lambda_handler(event, context):
         if not cognito_sub:
             return create_error_response(401, 'Unauthorized - No user identity found')
         
-        # Get user_id from database
-        user_result = db_proxy.execute_query(
-            "SELECT id FROM users WHERE cognito_sub = %s",
-            params=[cognito_sub],
-            return_dict=True
-        )
+        # Get user_id (cached per container)
+        identity = identity_resolver.resolve_event(event)
         
-        if not user_result or len(user_result) == 0:
+        if not identity:
             return create_error_response(404, 'User not found')
         
-        user_id = user_result[0]['id']
+        user_id = identity['user_id']
         
         # Route to appropriate handler
         if http_method == 'GET' and '/dashboard' in path:
@@ -6,37 +6,268 @@ import json
 import os
 import uuid
 import logging
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
 from typing import Dict, Any, List, Optional
-from datetime import datetime
 
 # Add /opt/python to path for Lambda layer modules
 import sys
 sys.path.append('/opt/python')
 
 import boto3
+from botocore.config import Config
 from response_utils import create_response, handle_error
 from auth_utils import extract_user_from_cognito_event
-from db_proxy_client import DBProxyClient
+from db_proxy_client import DBProxyClient, register_query
+from circuit_breaker import CircuitBreaker, CircuitOpenError
+from identity_cache import get_identity_resolver, parse_group_claims
+from spaced_repetition import answer_quality, review, SECONDS_PER_DAY
+from question_order import snapshot_version, new_order, term_position
+from session_reaper import reap_stale_sessions, prune_term_snapshots
+from similarity_cache import purge_expired as purge_similarity_cache
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
 # Initialize DB Proxy client
 db_proxy = DBProxyClient(os.environ.get('DB_PROXY_FUNCTION_NAME'))
+identity_resolver = get_identity_resolver(db_proxy)
 
 # Initialize Lambda client for Answer Evaluator invocation
 lambda_client = boto3.client('lambda')
 ANSWER_EVALUATOR_FUNCTION_NAME = os.environ.get('ANSWER_EVALUATOR_FUNCTION_NAME')
 
+# Submit-answer evaluation budget. API Gateway gives up at 29s, so the semantic
+# evaluator gets at most EVALUATOR_DEADLINE_SECONDS (and never the Lambda's last
+# DEADLINE_SAFETY_MARGIN_SECONDS) before the lexical score is used instead.
+EVALUATOR_DEADLINE_SECONDS = float(os.environ.get('EVALUATOR_DEADLINE_SECONDS', 3.0))
+DEADLINE_SAFETY_MARGIN_SECONDS = 2.0
+ANSWER_THRESHOLD = 0.7
 
-def invoke_answer_evaluator(student_answer: str, correct_answer: str, threshold: float = 0.7) -> Dict:
+# No retries and a read timeout just past the deadline so abandoned calls free their thread
+evaluator_client = boto3.client('lambda', config=Config(
+    connect_timeout=2,
+    read_timeout=EVALUATOR_DEADLINE_SECONDS + 1,
+    retries={'max_attempts': 0}
+))
+evaluator_breaker = CircuitBreaker(
+    'answer-evaluator',
+    failure_threshold=int(os.environ.get('EVALUATOR_BREAKER_FAILURES', 3)),
+    reset_timeout=float(os.environ.get('EVALUATOR_BREAKER_RESET_SECONDS', 30))
+)
+_evaluator_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix='answer-evaluator')
+
+QUIZ_MODES = ('sequential', 'adaptive')
+IDEMPOTENCY_KEY_MAX_LENGTH = 64
+
+# Completion summary, computed in SQL from the session's progress records.
+# Upserts so a re-scored provisional answer can refresh it; sessions that are
+# not completed produce no row.
+MATERIALIZE_SUMMARY_QUERY = register_query('quiz.materialize_summary', """
+    INSERT INTO quiz_session_summaries (session_id, user_id, domain_name, total_questions, total_attempts,
+                                        correct_count, average_similarity, started_at, completed_at,
+                                        total_seconds, detailed_results)
+    SELECT qs.id, qs.user_id, dn.data->>'name', qs.total_questions,
+           COUNT(pr.id), COUNT(pr.id) FILTER (WHERE pr.is_correct),
+           COALESCE(AVG(COALESCE(pr.similarity_score, 0)), 0),
+           qs.started_at, qs.completed_at,
+           COALESCE(EXTRACT(EPOCH FROM qs.completed_at - qs.started_at)::int, 0),
+           COALESCE(jsonb_agg(jsonb_build_object(
+               'term', tn.data->>'term',
+               'student_answer', pr.student_answer,
+               'correct_answer', pr.correct_answer,
+               'is_correct', pr.is_correct,
+               'similarity_score', ROUND(COALESCE(pr.similarity_score, 0), 2),
+               'feedback', pr.feedback
+           ) ORDER BY pr.created_at) FILTER (WHERE pr.id IS NOT NULL), '[]'::jsonb)
+    FROM quiz_sessions qs
+    JOIN tree_nodes dn ON dn.id = qs.domain_id
+    LEFT JOIN (progress_records pr JOIN tree_nodes tn ON tn.id = pr.term_id) ON pr.session_id = qs.id
+    WHERE qs.id = %s AND qs.status = 'completed'
+    GROUP BY qs.id, dn.data
+    ON CONFLICT (session_id) DO UPDATE
+    SET total_attempts = EXCLUDED.total_attempts, correct_count = EXCLUDED.correct_count,
+        average_similarity = EXCLUDED.average_similarity, detailed_results = EXCLUDED.detailed_results
+""")
+ADAPTIVE_SESSION_SIZE = int(os.environ.get('ADAPTIVE_SESSION_SIZE', 20))
+
+# Background re-score of a provisional answer. The record is locked and only
+# updated while still provisional, and the session's correct count moves in the
+# same statement, so a duplicate or concurrent delivery returns no row and
+# changes nothing.
+RESCORE_ANSWER_QUERY = register_query('quiz.rescore_answer', """
+    WITH previous AS (
+        SELECT id, is_correct FROM progress_records
+        WHERE id = %(progress_record_id)s AND is_provisional = TRUE
+        FOR UPDATE
+    ),
+    rescored AS (
+        UPDATE progress_records pr
+        SET similarity_score = %(similarity_score)s, is_correct = %(is_correct)s, feedback = %(feedback)s,
+            evaluation_method = 'semantic', is_provisional = FALSE
+        FROM previous
+        WHERE pr.id = previous.id AND pr.is_provisional = TRUE
+        RETURNING previous.is_correct AS was_correct
+    ),
+    session AS (
+        UPDATE quiz_sessions
+        SET correct_answers = correct_answers + CASE WHEN %(is_correct)s THEN 1 ELSE -1 END
+        WHERE id = %(session_id)s
+          AND EXISTS (SELECT 1 FROM rescored WHERE was_correct IS DISTINCT FROM %(is_correct)s)
+    )
+    SELECT was_correct FROM rescored
+""")
+
+# Adaptive question order: due reviews first (oldest due first, via
+# idx_term_schedules_due), then never-seen terms, then the soonest upcoming
+# reviews. Every branch is index-driven and stops at the session size, so the
+# cost does not grow with the learner's answer history. New terms have no due
+# date, so the outer sort falls through to created_at (then id) to keep them in
+# creation order; the ids also break ties between equal due dates.
+ADAPTIVE_TERMS_QUERY = register_query('quiz.adaptive_terms', """
+    SELECT q.term_id AS id, t.data->>'term' AS term, t.data->>'definition' AS definition
+    FROM (
+        (SELECT term_id, due_at, 0 AS bucket FROM term_schedules
+         WHERE user_id = %(user_id)s AND domain_id = %(domain_id)s AND due_at <= NOW()
+         ORDER BY due_at, term_id LIMIT %(limit)s)
+        UNION ALL
+        (SELECT t.id, NULL::timestamptz, 1 FROM tree_nodes t
+         WHERE t.parent_id = %(domain_id)s AND t.node_type = 'term'
+           AND NOT EXISTS (
+               SELECT 1 FROM term_schedules s WHERE s.user_id = %(user_id)s AND s.term_id = t.id
+           )
+         ORDER BY t.created_at, t.id LIMIT %(limit)s)
+        UNION ALL
+        (SELECT term_id, due_at, 2 FROM term_schedules
+         WHERE user_id = %(user_id)s AND domain_id = %(domain_id)s AND due_at > NOW()
+         ORDER BY due_at, term_id LIMIT %(limit)s)
+    ) q
+    JOIN tree_nodes t ON t.id = q.term_id
+    ORDER BY q.bucket, q.due_at, t.created_at, q.term_id
+    LIMIT %(limit)s
+""")
+
+# Question windows for prefetching clients: at most MAX_PREFETCH_QUESTIONS
+# upcoming prompts per request, never definitions.
+MAX_PREFETCH_QUESTIONS = int(os.environ.get('MAX_PREFETCH_QUESTIONS', 20))
+
+# Upcoming questions of session {s} from its current index, as one JSONB array.
+# Each question is a quiz_session_term() primary-key lookup; takes the window
+# size as its only parameter.
+UPCOMING_QUESTIONS_SQL = """
+    SELECT COALESCE(jsonb_agg(jsonb_build_object(
+               'term_id', w.term_id,
+               'term', wt.data->>'term',
+               'question_number', w.idx + 1,
+               'total_questions', {s}.total_questions
+           ) ORDER BY w.idx), '[]'::jsonb)
+    FROM (
+        SELECT idx, quiz_session_term({s}.session_data, {s}.domain_id, idx, {s}.total_questions) AS term_id
+        FROM generate_series({s}.current_term_index,
+                             LEAST({s}.current_term_index + %s, {s}.total_questions) - 1) AS idx
+    ) w
+    JOIN tree_nodes wt ON wt.id = w.term_id
+"""
+
+# Submit read: session state, current term, its schedule and any earlier
+# submission with the request's idempotency key
+SUBMIT_READ_QUERY = register_query('quiz.submit_read', """
+    SELECT qs.status, qs.current_term_index, qs.total_questions, qs.correct_answers, qs.domain_id,
+           cur.term_id, tn.data->>'term' AS term,
+           tn.data->>'definition' AS definition,
+           ts.ease, ts.interval_days, ts.repetitions,
+           prior.id AS prior_id, prior.is_correct AS prior_is_correct,
+           prior.similarity_score AS prior_similarity_score, prior.feedback AS prior_feedback,
+           prior.correct_answer AS prior_correct_answer, prior.is_provisional AS prior_is_provisional,
+           prior.evaluation_method AS prior_evaluation_method
+    FROM quiz_sessions qs
+    CROSS JOIN LATERAL (
+        SELECT quiz_session_term(qs.session_data, qs.domain_id,
+                                 qs.current_term_index, qs.total_questions) AS term_id
+    ) cur
+    LEFT JOIN tree_nodes tn ON tn.id = cur.term_id
+    LEFT JOIN term_schedules ts
+        ON ts.user_id = qs.user_id AND ts.term_id = tn.id
+    LEFT JOIN progress_records prior
+        ON prior.session_id = qs.id AND prior.idempotency_key = %s
+    WHERE qs.id = %s AND qs.user_id = %s
+""")
+
+# Submit write: advance, record, reschedule and return the next question (and
+# the prefetch window) in one statement
+SUBMIT_ANSWER_QUERY = register_query('quiz.submit_answer', """
+    WITH advanced AS (
+        UPDATE quiz_sessions
+        SET current_term_index = current_term_index + 1,
+            correct_answers = correct_answers + %s,
+            last_activity_at = CURRENT_TIMESTAMP,
+            status = CASE WHEN current_term_index + 1 >= total_questions
+                          THEN 'completed' ELSE status END,
+            completed_at = CASE WHEN current_term_index + 1 >= total_questions
+                                THEN CURRENT_TIMESTAMP ELSE completed_at END
+        WHERE id = %s AND user_id = %s AND status = 'active' AND current_term_index = %s
+        RETURNING domain_id, current_term_index, total_questions, correct_answers, status, session_data
+    ),
+    recorded AS (
+        INSERT INTO progress_records (user_id, term_id, session_id, student_answer, correct_answer,
+                                      is_correct, similarity_score, feedback,
+                                      evaluation_method, is_provisional, idempotency_key)
+        SELECT %s::uuid, %s::uuid, %s::uuid, %s, %s, %s, %s, %s, %s, %s, %s FROM advanced
+        RETURNING id
+    ),
+    rescheduled AS (
+        INSERT INTO term_schedules (user_id, term_id, domain_id, ease, interval_days,
+                                    repetitions, lapses, due_at, last_reviewed_at)
+        SELECT %s::uuid, %s::uuid, %s::uuid, %s, %s, %s, %s,
+               NOW() + make_interval(secs => %s), NOW()
+        FROM advanced
+        ON CONFLICT (user_id, term_id) DO UPDATE
+        SET ease = EXCLUDED.ease, interval_days = EXCLUDED.interval_days,
+            repetitions = EXCLUDED.repetitions, lapses = term_schedules.lapses + EXCLUDED.lapses,
+            due_at = EXCLUDED.due_at, last_reviewed_at = EXCLUDED.last_reviewed_at
+    )
+    SELECT a.current_term_index, a.total_questions, a.correct_answers,
+           a.status = 'completed' AS completed, r.id AS progress_record_id,
+           nt.id AS next_term_id, nt.data->>'term' AS next_term,
+           CASE WHEN %s > 0 THEN (""" + UPCOMING_QUESTIONS_SQL.format(s='a') + """) END AS upcoming_questions
+    FROM advanced a
+    CROSS JOIN recorded r
+    LEFT JOIN tree_nodes nt
+        ON nt.id = quiz_session_term(a.session_data, a.domain_id, a.current_term_index, a.total_questions)
+""")
+
+# Session and its current question
+NEXT_QUESTION_QUERY = register_query('quiz.next_question', """
+    SELECT qs.id, qs.status, qs.current_term_index, qs.total_questions, 
+           tn.data->>'name' as domain_name, cur.term_id, term.data->>'term' as term
+    FROM quiz_sessions qs
+    JOIN tree_nodes tn ON qs.domain_id = tn.id
+    CROSS JOIN LATERAL (
+        SELECT quiz_session_term(qs.session_data, qs.domain_id,
+                                 qs.current_term_index, qs.total_questions) AS term_id
+    ) cur
+    LEFT JOIN tree_nodes term ON term.id = cur.term_id
+    WHERE qs.id = %s AND qs.user_id = %s
+""")
+
+# Session and its next questions (window size, then session and user)
+QUESTION_WINDOW_QUERY = register_query('quiz.question_window', """
+    SELECT qs.status, qs.current_term_index, qs.total_questions, tn.data->>'name' as domain_name,
+           (""" + UPCOMING_QUESTIONS_SQL.format(s='qs') + """) AS questions
+    FROM quiz_sessions qs
+    JOIN tree_nodes tn ON qs.domain_id = tn.id
+    WHERE qs.id = %s AND qs.user_id = %s
+""")
+
+
+def invoke_answer_evaluator(student_answer: str, correct_answer: str, threshold: float = 0.7,
+                            client: Any = None) -> Dict:
     """Invoke Answer Evaluator Lambda"""
     payload = {
         'answer': student_answer,
         'correct_answer': correct_answer
     }
     
-    response = lambda_client.invoke(
+    response = (client or lambda_client).invoke(
         FunctionName=ANSWER_EVALUATOR_FUNCTION_NAME,
         InvocationType='RequestResponse',
         Payload=json.dumps(payload)
@@ -50,11 +281,205 @@ def invoke_answer_evaluator(student_answer: str, correct_answer: str, threshold:
     return json.loads(body) if isinstance(body, str) else body
 
 
+def evaluate_with_deadline(student_answer: str, correct_answer: str, context: Any = None) -> Optional[float]:
+    """
+    Semantic similarity from the Answer Evaluator within the request deadline
+    
+    Returns:
+        Similarity score, or None when the evaluator timed out, failed or the
+        circuit breaker is open (callers fall back to the lexical score)
+    """
+    if not ANSWER_EVALUATOR_FUNCTION_NAME:
+        return None
+    
+    deadline = EVALUATOR_DEADLINE_SECONDS
+    if context is not None and hasattr(context, 'get_remaining_time_in_millis'):
+        deadline = min(deadline, context.get_remaining_time_in_millis() / 1000.0 - DEADLINE_SAFETY_MARGIN_SECONDS)
+    if deadline <= 0:
+        return None
+    
+    def timed_invoke():
+        future = _evaluator_pool.submit(
+            invoke_answer_evaluator, student_answer, correct_answer, ANSWER_THRESHOLD, evaluator_client
+        )
+        return future.result(timeout=deadline)
+    
+    try:
+        result = evaluator_breaker.call(timed_invoke)
+        return float(result['similarity'])
+    except CircuitOpenError:
+        logger.info("Answer Evaluator circuit open, using lexical score")
+    except FutureTimeoutError:
+        logger.warning(f"Answer Evaluator exceeded {deadline:.2f}s deadline, using lexical score")
+    except Exception as e:
+        logger.warning(f"Answer Evaluator failed, using lexical score: {str(e)}")
+    return None
+
+
+def queue_rescore(progress_record_id: str, session_id: str, student_answer: str, correct_answer: str) -> bool:
+    """Queue a background semantic re-score of a provisional answer (async self-invocation)"""
+    function_name = os.environ.get('AWS_LAMBDA_FUNCTION_NAME')
+    if not function_name or not ANSWER_EVALUATOR_FUNCTION_NAME:
+        return False
+    try:
+        lambda_client.invoke(
+            FunctionName=function_name,
+            InvocationType='Event',
+            Payload=json.dumps({
+                'action': 'rescore_answer',
+                'progress_record_id': str(progress_record_id),
+                'session_id': str(session_id),
+                'student_answer': student_answer,
+                'correct_answer': correct_answer
+            })
+        )
+        return True
+    except Exception as e:
+        logger.error(f"Failed to queue re-score for progress record {progress_record_id}: {str(e)}")
+        return False
+
+
+def handle_rescore_answer(event: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Re-score a provisional answer with the semantic evaluator and update its
+    progress record (and the session's correct count if the verdict changed)
+    """
+    progress_record_id = event['progress_record_id']
+    student_answer = event['student_answer']
+    correct_answer = event['correct_answer']
+    
+    # Async invocations have the full Lambda timeout, so no deadline here;
+    # failures propagate out of lambda_handler so Lambda's async retry policy re-runs them
+    result = invoke_answer_evaluator(student_answer, correct_answer, ANSWER_THRESHOLD)
+    similarity_score = float(result['similarity'])
+    is_correct = similarity_score >= ANSWER_THRESHOLD
+    feedback = build_feedback(is_correct, similarity_score, correct_answer)
+    
+    rescored = db_proxy.execute_query_one(RESCORE_ANSWER_QUERY, {
+        'progress_record_id': progress_record_id, 'session_id': event['session_id'],
+        'similarity_score': similarity_score, 'is_correct': is_correct, 'feedback': feedback
+    }, return_dict=True)
+    if not rescored:
+        # Already re-scored (duplicate async delivery) or removed with its session
+        return {'statusCode': 200, 'rescored': False}
+    
+    # Re-scores can land after the session completed; keep its summary current
+    db_proxy.execute_query(MATERIALIZE_SUMMARY_QUERY, (event['session_id'],))
+    
+    logger.info(f"Re-scored progress record {progress_record_id}: similarity={similarity_score:.4f}")
+    return {'statusCode': 200, 'rescored': True, 'is_correct': is_correct}
+
+
+def get_idempotency_key(event: Dict[str, Any], body: Dict[str, Any]) -> Optional[str]:
+    """Client submission key from the Idempotency-Key header or the request body"""
+    headers = {k.lower(): v for k, v in (event.get('headers') or {}).items()}
+    key = headers.get('idempotency-key') or body.get('idempotency_key')
+    return str(key) if key else None
+
+
+def parse_prefetch_count(value: Any, default: int) -> int:
+    """Question window size from a request; ValueError unless 0..MAX_PREFETCH_QUESTIONS"""
+    if value is None or value == '':
+        return default
+    count = int(value)
+    if count < 0 or count > MAX_PREFETCH_QUESTIONS:
+        raise ValueError(f'count must be between 0 and {MAX_PREFETCH_QUESTIONS}')
+    return count
+
+
+def submission_response(session_id: str, evaluation: Dict[str, Any], state: Dict[str, Any]) -> Dict[str, Any]:
+    """Submit-answer response from an evaluation and the session state after it"""
+    new_index = state['current_term_index']
+    total_questions = state['total_questions']
+    quiz_completed = bool(state['completed'])
+    
+    next_question = None
+    if not quiz_completed and state['next_term_id']:
+        next_question = {
+            'term_id': str(state['next_term_id']),
+            'term': state['next_term'],
+            'question_number': new_index + 1,
+            'total_questions': total_questions
+        }
+    
+    response = {
+        'session_id': session_id,
+        'evaluation': evaluation,
+        'progress': {
+            'current_index': new_index,
+            'total_questions': total_questions,
+            'correct_answers': state['correct_answers'],
+            'completed': quiz_completed
+        },
+        'next_question': next_question,
+        'quiz_completed': quiz_completed
+    }
+    # Piggybacked window (starts with next_question) when the client asked for one
+    upcoming = state.get('upcoming_questions')
+    if upcoming is not None:
+        if isinstance(upcoming, str):
+            upcoming = json.loads(upcoming)
+        response['upcoming_questions'] = [] if quiz_completed else upcoming
+    return create_response(200, response)
+
+
+def replay_submission(session_id: str, current: Dict[str, Any]) -> Dict[str, Any]:
+    """Response for a retried submission, rebuilt from its stored progress record"""
+    evaluation = {
+        'is_correct': current['prior_is_correct'],
+        'similarity_score': round(float(current['prior_similarity_score'] or 0), 2),
+        'feedback': current['prior_feedback'],
+        'correct_answer': current['prior_correct_answer'],
+        'provisional': bool(current['prior_is_provisional']),
+        'evaluation_method': current['prior_evaluation_method']
+    }
+    return submission_response(session_id, evaluation, {
+        'current_term_index': current['current_term_index'],
+        'total_questions': current['total_questions'],
+        'correct_answers': current['correct_answers'],
+        'completed': current['status'] == 'completed',
+        'next_term_id': current['term_id'],
+        'next_term': current['term']
+    })
+
+
+def materialize_summary(session_id: str) -> None:
+    """Persist a completed session's summary; failures are left for the summary read to retry"""
+    try:
+        db_proxy.execute_query(MATERIALIZE_SUMMARY_QUERY, (session_id,))
+    except Exception as e:
+        logger.warning(f"Failed to materialize summary for session {session_id}: {str(e)}")
+
+
+def build_feedback(is_correct: bool, similarity_score: float, correct_answer: str) -> str:
+    """Feedback message for a submitted answer"""
+    if is_correct:
+        return "Correct! Well done."
+    elif similarity_score >= 0.5:
+        return f"Close, but not quite right. The correct answer is: {correct_answer}"
+    return f"Incorrect. The correct answer is: {correct_answer}"
+
+
 def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     """
     Main handler for quiz engine operations
     """
+    # Internal async re-score (never routed through API Gateway); raised errors
+    # fail the invocation so Lambda retries it instead of dropping the re-score
+    if 'httpMethod' not in event and event.get('action') == 'rescore_answer':
+        return handle_rescore_answer(event)
+    
     try:
+        # Scheduled maintenance (never routed through API Gateway)
+        if 'httpMethod' not in event and event.get('action') == 'reap_stale_sessions':
+            budget = None
+            if hasattr(context, 'get_remaining_time_in_millis'):
+                budget = context.get_remaining_time_in_millis() / 1000.0 - DEADLINE_SAFETY_MARGIN_SECONDS
+            result = reap_stale_sessions(time_budget_seconds=budget)
+            return {'statusCode': 200, **result, 'snapshots_pruned': prune_term_snapshots()}
+        if 'httpMethod' not in event and event.get('action') == 'purge_similarity_cache':
+            return {'statusCode': 200, 'purged': purge_similarity_cache(db_proxy)}
+        
         http_method = event.get('httpMethod')
         path = event.get('path', '')
         
@@ -63,21 +488,20 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         if not auth_result['valid']:
             return create_response(401, {'error': 'Unauthorized'})
         
-        # Get database user ID from cognito_sub
+        # Get database user ID from cognito_sub (cached per container)
         cognito_sub = auth_result['user_id']  # This is actually the Cognito sub
-        user_query = "SELECT id FROM users WHERE cognito_sub = %s"
-        user_result = db_proxy.execute_query_one(user_query, (cognito_sub,), return_dict=True)
+        identity = identity_resolver.resolve(cognito_sub, parse_group_claims(auth_result['claims']))
         
-        if not user_result:
+        if not identity:
             return create_response(404, {'error': 'User not found in database'})
         
-        user_id = user_result['id']  # This is the database user ID
+        user_id = identity['user_id']  # This is the database user ID
         
         if http_method == 'POST':
             if '/quiz/start' in path:
                 return handle_start_quiz(event, user_id)
             elif '/quiz/answer' in path:
-                return handle_submit_answer(event, user_id)
+                return handle_submit_answer(event, user_id, context)
             elif '/quiz/pause' in path:
                 return handle_pause_quiz(event, user_id)
             elif '/quiz/resume' in path:
@@ -85,7 +509,9 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
             elif '/quiz/restart' in path:
                 return handle_restart_quiz(event, user_id)
         elif http_method == 'GET':
-            if '/quiz/question' in path:
+            if '/quiz/questions' in path:
+                return handle_get_questions(event, user_id)
+            elif '/quiz/question' in path:
                 return handle_get_next_question(event, user_id)
             elif '/quiz/complete' in path:
                 return handle_complete_quiz(event, user_id)
@@ -107,10 +533,19 @@ def handle_start_quiz(event: Dict[str, Any], user_id: str) -> Dict[str, Any]:
         # Parse request body
         body = json.loads(event.get('body', '{}'))
         domain_id = body.get('domain_id')
+        mode = body.get('mode', 'sequential')
+        shuffle = bool(body.get('shuffle', False))
         
         if not domain_id:
             return create_response(400, {'error': 'domain_id is required'})
         
+        if mode not in QUIZ_MODES:
+            return create_response(400, {'error': f"mode must be one of: {', '.join(QUIZ_MODES)}"})
+        
+        seed = body.get('seed')
+        if seed is not None and (isinstance(seed, bool) or not isinstance(seed, int)):
+            return create_response(400, {'error': 'seed must be an integer'})
+        
         # Validate domain exists and belongs to user or is public
         domain_query = """
             SELECT id, data->>'name' as name, user_id, is_public
@@ -134,7 +569,7 @@ def handle_start_quiz(event: Dict[str, Any], user_id: str) -> Dict[str, Any]:
             SELECT id, data->>'term' as term, data->>'definition' as definition
             FROM tree_nodes 
             WHERE parent_id = %s AND node_type = 'term'
-            ORDER BY created_at
+            ORDER BY created_at, id
         """
         terms_result = db_proxy.execute_query(terms_query, (domain_id,), return_dict=True)
         
@@ -143,7 +578,8 @@ def handle_start_quiz(event: Dict[str, Any], user_id: str) -> Dict[str, Any]:
         
         # Check for existing active session
         existing_session_query = """
-            SELECT id, current_term_index, total_questions, session_data
+            SELECT id, current_term_index, total_questions, session_data->>'mode' AS mode,
+                   quiz_session_term(session_data, domain_id, current_term_index, total_questions) AS term_id
             FROM quiz_sessions 
             WHERE user_id = %s AND domain_id = %s AND status = 'active'
         """
@@ -154,11 +590,11 @@ def handle_start_quiz(event: Dict[str, Any], user_id: str) -> Dict[str, Any]:
             session_id = existing_session['id']
             current_index = existing_session['current_term_index']
             total_questions = existing_session['total_questions']
-            session_data = existing_session['session_data'] or {}
             
-            # Get current question
-            if current_index < len(terms_result):
-                current_term = terms_result[current_index]
+            # Get current question (the session's order need not follow domain order)
+            terms_by_id = {str(term['id']): term for term in terms_result}
+            current_term = terms_by_id.get(str(existing_session['term_id']))
+            if current_term:
                 current_question = {
                     'term_id': str(current_term['id']),
                     'term': current_term['term'],
@@ -171,6 +607,7 @@ def handle_start_quiz(event: Dict[str, Any], user_id: str) -> Dict[str, Any]:
             return create_response(200, {
                 'session_id': str(session_id),
                 'status': 'resumed',
+                'mode': existing_session['mode'] or 'sequential',
                 'domain_name': domain_result['name'],
                 'current_question': current_question,
                 'progress': {
@@ -182,25 +619,64 @@ def handle_start_quiz(event: Dict[str, Any], user_id: str) -> Dict[str, Any]:
         
         # Create new quiz session
         session_id = str(uuid.uuid4())
-        total_questions = len(terms_result)
-        
-        # Prepare session data with term order
-        session_data = {
-            'term_order': [str(term['id']) for term in terms_result],
-            'domain_name': domain_result['name']
-        }
         
-        # Insert new session
         insert_session_query = """
             INSERT INTO quiz_sessions (id, user_id, domain_id, status, current_term_index, total_questions, session_data)
             VALUES (%s, %s, %s, 'active', 0, %s, %s)
         """
-        db_proxy.execute_query(insert_session_query, (
-            session_id, user_id, domain_id, total_questions, json.dumps(session_data)
-        ))
+        
+        if mode == 'adaptive':
+            # Adaptive order is picked per user, so the (session-sized) list is stored
+            terms_result = db_proxy.execute_query(ADAPTIVE_TERMS_QUERY, {
+                'user_id': user_id, 'domain_id': domain_id, 'limit': ADAPTIVE_SESSION_SIZE
+            }, return_dict=True) or terms_result
+            total_questions = len(terms_result)
+            session_data = {
+                'term_order': [str(term['id']) for term in terms_result],
+                'domain_name': domain_result['name'],
+                'mode': mode
+            }
+            first_term = terms_result[0]
+            db_proxy.execute_query(insert_session_query, (
+                session_id, user_id, domain_id, total_questions, json.dumps(session_data)
+            ))
+        else:
+            # Snapshot version of the domain's term list plus a seeded permutation;
+            # the snapshot rows are written once per domain version and shared.
+            # Upserting the version row locks it and marks it used, so the
+            # reaper's prune cannot drop the snapshot under this session.
+            term_ids = [str(term['id']) for term in terms_result]
+            total_questions = len(term_ids)
+            version = snapshot_version(term_ids)
+            order = new_order(total_questions, shuffle=shuffle, seed=seed)
+            session_data = {
+                'snapshot': version,
+                **order,
+                'domain_name': domain_result['name'],
+                'mode': mode
+            }
+            first_term = terms_result[term_position(order, 0, total_questions)]
+            db_proxy.execute_query(f"""
+                WITH head AS (
+                    INSERT INTO quiz_term_snapshot_versions (domain_id, version)
+                    VALUES (%s, %s)
+                    ON CONFLICT (domain_id, version) DO UPDATE SET last_used_at = CURRENT_TIMESTAMP
+                    RETURNING xmax = 0 AS created
+                ),
+                snapshot AS (
+                    INSERT INTO quiz_term_snapshots (domain_id, version, term_position, term_id)
+                    SELECT %s::uuid, %s, t.ord - 1, t.term_id
+                    FROM head, unnest(%s::uuid[]) WITH ORDINALITY AS t(term_id, ord)
+                    WHERE head.created
+                    ON CONFLICT DO NOTHING
+                )
+                {insert_session_query}
+            """, (
+                domain_id, version, domain_id, version, term_ids,
+                session_id, user_id, domain_id, total_questions, json.dumps(session_data)
+            ))
         
         # Get first question
-        first_term = terms_result[0]
         current_question = {
             'term_id': str(first_term['id']),
             'term': first_term['term'],
@@ -211,6 +687,7 @@ def handle_start_quiz(event: Dict[str, Any], user_id: str) -> Dict[str, Any]:
         return create_response(200, {
             'session_id': session_id,
             'status': 'started',
+            'mode': mode,
             'domain_name': domain_result['name'],
             'current_question': current_question,
             'progress': {
@@ -227,13 +704,14 @@ def handle_start_quiz(event: Dict[str, Any], user_id: str) -> Dict[str, Any]:
         return handle_error(e)
 
 
-def handle_submit_answer(event: Dict[str, Any], user_id: str) -> Dict[str, Any]:
+def handle_submit_answer(event: Dict[str, Any], user_id: str, context: Any = None) -> Dict[str, Any]:
     """Handle answer submission and evaluation"""
     try:
         # Parse request body
         body = json.loads(event.get('body', '{}'))
         session_id = body.get('session_id')
         student_answer = body.get('answer', '').strip()
+        idempotency_key = get_idempotency_key(event, body)
         
         if not session_id:
             return create_response(400, {'error': 'session_id is required'})
@@ -241,142 +719,100 @@ def handle_submit_answer(event: Dict[str, Any], user_id: str) -> Dict[str, Any]:
         if not student_answer:
             return create_response(400, {'error': 'answer is required'})
         
-        # Verify session exists and belongs to user
-        session_query = """
-            SELECT qs.id, qs.status, qs.current_term_index, qs.total_questions, 
-                   qs.session_data, qs.correct_answers, tn.data->>'name' as domain_name
-            FROM quiz_sessions qs
-            JOIN tree_nodes tn ON qs.domain_id = tn.id
-            WHERE qs.id = %s AND qs.user_id = %s
-        """
-        session_result = db_proxy.execute_query_one(session_query, (session_id, user_id), return_dict=True)
+        if idempotency_key and len(idempotency_key) > IDEMPOTENCY_KEY_MAX_LENGTH:
+            return create_response(400, {
+                'error': f'idempotency_key must be at most {IDEMPOTENCY_KEY_MAX_LENGTH} characters'
+            })
         
-        if not session_result:
+        try:
+            prefetch = parse_prefetch_count(body.get('prefetch'), 0)
+        except (TypeError, ValueError):
+            return create_response(400, {
+                'error': f'prefetch must be an integer between 0 and {MAX_PREFETCH_QUESTIONS}'
+            })
+        
+        # One read: session state, the current term and its review schedule, and any
+        # earlier submission with this idempotency key
+        current_params = (idempotency_key, session_id, user_id)
+        current = db_proxy.execute_query_one(SUBMIT_READ_QUERY, current_params, return_dict=True)
+        
+        if not current:
             return create_response(404, {'error': 'Quiz session not found'})
         
-        current_status = session_result['status']
-        current_index = session_result['current_term_index']
-        total_questions = session_result['total_questions']
-        session_data = session_result['session_data'] or {}
-        correct_answers = session_result['correct_answers']
-        domain_name = session_result['domain_name']
+        # Client retry of a submission that was already recorded
+        if current['prior_id']:
+            return replay_submission(session_id, current)
+        
+        current_status = current['status']
+        current_index = current['current_term_index']
         
         if current_status != 'active':
             return create_response(400, {'error': f'Cannot submit answer for quiz in {current_status} state'})
         
         # Check if quiz is already completed
-        if current_index >= total_questions:
+        if current_index >= current['total_questions']:
             return create_response(400, {'error': 'Quiz is already completed'})
         
-        # Get current term details
-        term_order = session_data.get('term_order', [])
-        if current_index >= len(term_order):
+        if not current['term_id']:
             return create_response(400, {'error': 'No current question available'})
         
-        term_id = term_order[current_index]
-        
-        # Get term details for evaluation
-        term_query = """
-            SELECT data->>'term' as term, data->>'definition' as definition
-            FROM tree_nodes 
-            WHERE id = %s
-        """
-        term_result = db_proxy.execute_query_one(term_query, (term_id,), return_dict=True)
-        
-        if not term_result:
+        if current['definition'] is None:
             return create_response(404, {'error': 'Current question not found'})
         
-        term_text = term_result['term']
-        correct_answer = term_result['definition']
-        
-        # Evaluate the answer using semantic similarity
-        # For now, we'll use a simple evaluation - full integration with answer evaluation service
-        # would require making HTTP calls to the evaluation Lambda
-        
-        # Simple evaluation logic (placeholder for full semantic evaluation)
-        similarity_score = calculate_simple_similarity(student_answer.lower(), correct_answer.lower())
-        threshold = 0.7  # Default threshold
-        is_correct = similarity_score >= threshold
-        
-        # Generate feedback
-        if is_correct:
-            feedback = "Correct! Well done."
-        elif similarity_score >= 0.5:
-            feedback = f"Close, but not quite right. The correct answer is: {correct_answer}"
-        else:
-            feedback = f"Incorrect. The correct answer is: {correct_answer}"
-        
-        # Record the progress
-        progress_query = """
-            INSERT INTO progress_records (user_id, term_id, session_id, student_answer, correct_answer, 
-                                        is_correct, similarity_score, feedback)
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-        """
-        db_proxy.execute_query(progress_query, (
+        term_id = current['term_id']
+        correct_answer = current['definition']
+        
+        # Evaluate with the semantic evaluator under the request deadline; on timeout,
+        # failure or an open circuit use the lexical score and re-score in the background
+        similarity_score = evaluate_with_deadline(student_answer, correct_answer, context)
+        provisional = similarity_score is None
+        if provisional:
+            similarity_score = calculate_simple_similarity(student_answer.lower(), correct_answer.lower())
+        is_correct = similarity_score >= ANSWER_THRESHOLD
+        feedback = build_feedback(is_correct, similarity_score, correct_answer)
+        
+        # Advance the term's spaced-repetition schedule from its stored state
+        schedule = review(answer_quality(similarity_score, ANSWER_THRESHOLD),
+                          current['ease'], current['interval_days'], current['repetitions'])
+        
+        # One write: advance the session (only from the index that was evaluated, so a
+        # concurrent submit of the same question matches no row), record the answer,
+        # reschedule the term and return the next question, all in a single statement and commit
+        submitted = db_proxy.execute_query_one(SUBMIT_ANSWER_QUERY, (
+            1 if is_correct else 0, session_id, user_id, current_index,
             user_id, term_id, session_id, student_answer, correct_answer,
-            is_correct, similarity_score, feedback
-        ))
-        
-        # Update session progress
-        new_correct_answers = correct_answers + (1 if is_correct else 0)
-        new_index = current_index + 1
-        
-        # Check if quiz is completed
-        quiz_completed = new_index >= total_questions
-        
-        if quiz_completed:
-            # Mark session as completed
-            update_session_query = """
-                UPDATE quiz_sessions 
-                SET current_term_index = %s, correct_answers = %s, status = 'completed', completed_at = CURRENT_TIMESTAMP
-                WHERE id = %s
-            """
-            db_proxy.execute_query(update_session_query, (new_index, new_correct_answers, session_id))
-        else:
-            # Update session progress
-            update_session_query = """
-                UPDATE quiz_sessions 
-                SET current_term_index = %s, correct_answers = %s
-                WHERE id = %s
-            """
-            db_proxy.execute_query(update_session_query, (new_index, new_correct_answers, session_id))
-        
-        # Prepare next question if not completed
-        next_question = None
-        if not quiz_completed and new_index < len(term_order):
-            next_term_id = term_order[new_index]
-            next_term_query = """
-                SELECT data->>'term' as term
-                FROM tree_nodes 
-                WHERE id = %s
-            """
-            next_term_result = db_proxy.execute_query_one(next_term_query, (next_term_id,), return_dict=True)
-            
-            if next_term_result:
-                next_question = {
-                    'term_id': next_term_id,
-                    'term': next_term_result['term'],
-                    'question_number': new_index + 1,
-                    'total_questions': total_questions
-                }
-        
-        return create_response(200, {
-            'session_id': session_id,
-            'evaluation': {
-                'is_correct': is_correct,
-                'similarity_score': round(similarity_score, 2),
-                'feedback': feedback,
-                'correct_answer': correct_answer
-            },
-            'progress': {
-                'current_index': new_index,
-                'total_questions': total_questions,
-                'correct_answers': new_correct_answers,
-                'completed': quiz_completed
-            },
-            'next_question': next_question,
-            'quiz_completed': quiz_completed
-        })
+            is_correct, similarity_score, feedback,
+            'lexical' if provisional else 'semantic', provisional, idempotency_key,
+            user_id, term_id, current['domain_id'], schedule['ease'], schedule['interval_days'],
+            schedule['repetitions'], 1 if schedule['lapsed'] else 0,
+            schedule['interval_days'] * SECONDS_PER_DAY,
+            prefetch, prefetch
+        ), return_dict=True)
+        
+        if not submitted:
+            # Lost the race for this question. The conditional advance blocked on the
+            # winner's row lock, so if the winner was a retry of this same submission
+            # its record is committed and visible now.
+            if idempotency_key:
+                current = db_proxy.execute_query_one(SUBMIT_READ_QUERY, current_params, return_dict=True)
+                if current and current['prior_id']:
+                    return replay_submission(session_id, current)
+            return create_response(409, {'error': 'Question was already answered or the session changed'})
+        
+        if submitted['completed']:
+            materialize_summary(session_id)
+        
+        if provisional:
+            queue_rescore(submitted['progress_record_id'], session_id, student_answer, correct_answer)
+        
+        return submission_response(session_id, {
+            'is_correct': is_correct,
+            'similarity_score': round(similarity_score, 2),
+            'feedback': feedback,
+            'correct_answer': correct_answer,
+            'provisional': provisional,
+            'evaluation_method': 'lexical' if provisional else 'semantic'
+        }, submitted)
         
     except json.JSONDecodeError:
         return create_response(400, {'error': 'Invalid JSON in request body'})
@@ -462,14 +898,7 @@ def handle_get_next_question(event: Dict[str, Any], user_id: str) -> Dict[str, A
             return create_response(400, {'error': 'session_id is required'})
         
         # Verify session exists and belongs to user
-        session_query = """
-            SELECT qs.id, qs.status, qs.current_term_index, qs.total_questions, 
-                   qs.session_data, tn.data->>'name' as domain_name
-            FROM quiz_sessions qs
-            JOIN tree_nodes tn ON qs.domain_id = tn.id
-            WHERE qs.id = %s AND qs.user_id = %s
-        """
-        session_result = db_proxy.execute_query_one(session_query, (session_id, user_id), return_dict=True)
+        session_result = db_proxy.execute_query_one(NEXT_QUESTION_QUERY, (session_id, user_id), return_dict=True)
         
         if not session_result:
             return create_response(404, {'error': 'Quiz session not found'})
@@ -477,7 +906,6 @@ def handle_get_next_question(event: Dict[str, Any], user_id: str) -> Dict[str, A
         current_status = session_result['status']
         current_index = session_result['current_term_index']
         total_questions = session_result['total_questions']
-        session_data = session_result['session_data'] or {}
         domain_name = session_result['domain_name']
         
         if current_status != 'active':
@@ -491,31 +919,17 @@ def handle_get_next_question(event: Dict[str, Any], user_id: str) -> Dict[str, A
                 'message': 'Quiz completed'
             })
         
-        # Get current question
-        term_order = session_data.get('term_order', [])
-        if current_index < len(term_order):
-            term_id = term_order[current_index]
-            
-            # Get term details
-            term_query = """
-                SELECT data->>'term' as term, data->>'definition' as definition
-                FROM tree_nodes 
-                WHERE id = %s
-            """
-            term_result = db_proxy.execute_query_one(term_query, (term_id,), return_dict=True)
-            
-            if term_result:
-                current_question = {
-                    'term_id': term_id,
-                    'term': term_result['term'],
-                    'question_number': current_index + 1,
-                    'total_questions': total_questions
-                }
-            else:
-                return create_response(404, {'error': 'Question not found'})
-        else:
+        # Get current question (resolved with the session lookup)
+        if session_result['term'] is None:
             return create_response(404, {'error': 'Question not found'})
         
+        current_question = {
+            'term_id': str(session_result['term_id']),
+            'term': session_result['term'],
+            'question_number': current_index + 1,
+            'total_questions': total_questions
+        }
+        
         return create_response(200, {
             'session_id': session_id,
             'domain_name': domain_name,
@@ -532,6 +946,63 @@ def handle_get_next_question(event: Dict[str, Any], user_id: str) -> Dict[str, A
         return handle_error(e)
 
 
+def handle_get_questions(event: Dict[str, Any], user_id: str) -> Dict[str, Any]:
+    """Handle GET /quiz/questions - the next `count` questions of a session in one call"""
+    try:
+        query_params = event.get('queryStringParameters') or {}
+        session_id = query_params.get('session_id')
+        
+        if not session_id:
+            return create_response(400, {'error': 'session_id is required'})
+        
+        try:
+            count = parse_prefetch_count(query_params.get('count'), MAX_PREFETCH_QUESTIONS)
+        except (TypeError, ValueError):
+            return create_response(400, {
+                'error': f'count must be an integer between 0 and {MAX_PREFETCH_QUESTIONS}'
+            })
+        
+        # Session lookup (primary key) and the question window in one statement
+        session_result = db_proxy.execute_query_one(
+            QUESTION_WINDOW_QUERY, (count, session_id, user_id), return_dict=True)
+        
+        if not session_result:
+            return create_response(404, {'error': 'Quiz session not found'})
+        
+        current_status = session_result['status']
+        current_index = session_result['current_term_index']
+        total_questions = session_result['total_questions']
+        
+        if current_status != 'active':
+            return create_response(400, {'error': f'Cannot get questions for quiz in {current_status} state'})
+        
+        if current_index >= total_questions:
+            return create_response(200, {
+                'session_id': session_id,
+                'completed': True,
+                'message': 'Quiz completed'
+            })
+        
+        questions = session_result['questions'] or []
+        if isinstance(questions, str):
+            questions = json.loads(questions)
+        
+        return create_response(200, {
+            'session_id': session_id,
+            'domain_name': session_result['domain_name'],
+            'questions': questions,
+            'progress': {
+                'current_index': current_index,
+                'total_questions': total_questions,
+                'completed': False
+            }
+        })
+        
+    except Exception as e:
+        logger.error(f"Error getting questions: {str(e)}")
+        return handle_error(e)
+
+
 def handle_pause_quiz(event: Dict[str, Any], user_id: str) -> Dict[str, Any]:
     """Handle pausing quiz session"""
     try:
@@ -561,7 +1032,7 @@ def handle_pause_quiz(event: Dict[str, Any], user_id: str) -> Dict[str, Any]:
         # Update session to paused
         update_query = """
             UPDATE quiz_sessions 
-            SET status = 'paused', paused_at = CURRENT_TIMESTAMP
+            SET status = 'paused', paused_at = CURRENT_TIMESTAMP, last_activity_at = CURRENT_TIMESTAMP
             WHERE id = %s
         """
         db_proxy.execute_query(update_query, (session_id,))
@@ -592,9 +1063,14 @@ def handle_resume_quiz(event: Dict[str, Any], user_id: str) -> Dict[str, Any]:
         # Verify session exists and belongs to user
         session_query = """
             SELECT qs.id, qs.status, qs.current_term_index, qs.total_questions, 
-                   qs.session_data, tn.data->>'name' as domain_name
+                   tn.data->>'name' as domain_name, cur.term_id, term.data->>'term' as term
             FROM quiz_sessions qs
             JOIN tree_nodes tn ON qs.domain_id = tn.id
+            CROSS JOIN LATERAL (
+                SELECT quiz_session_term(qs.session_data, qs.domain_id,
+                                         qs.current_term_index, qs.total_questions) AS term_id
+            ) cur
+            LEFT JOIN tree_nodes term ON term.id = cur.term_id
             WHERE qs.id = %s AND qs.user_id = %s
         """
         session_result = db_proxy.execute_query_one(session_query, (session_id, user_id), return_dict=True)
@@ -605,7 +1081,6 @@ def handle_resume_quiz(event: Dict[str, Any], user_id: str) -> Dict[str, Any]:
         current_status = session_result['status']
         current_index = session_result['current_term_index']
         total_questions = session_result['total_questions']
-        session_data = session_result['session_data'] or {}
         domain_name = session_result['domain_name']
         
         if current_status != 'paused':
@@ -618,35 +1093,20 @@ def handle_resume_quiz(event: Dict[str, Any], user_id: str) -> Dict[str, Any]:
         # Update session to active
         update_query = """
             UPDATE quiz_sessions 
-            SET status = 'active', paused_at = NULL
+            SET status = 'active', paused_at = NULL, last_activity_at = CURRENT_TIMESTAMP
             WHERE id = %s
         """
         db_proxy.execute_query(update_query, (session_id,))
         
-        # Get current question
-        term_order = session_data.get('term_order', [])
-        if current_index < len(term_order):
-            term_id = term_order[current_index]
-            
-            # Get term details
-            term_query = """
-                SELECT data->>'term' as term, data->>'definition' as definition
-                FROM tree_nodes 
-                WHERE id = %s
-            """
-            term_result = db_proxy.execute_query_one(term_query, (term_id,), return_dict=True)
-            
-            if term_result:
-                current_question = {
-                    'term_id': term_id,
-                    'term': term_result['term'],
-                    'question_number': current_index + 1,
-                    'total_questions': total_questions
-                }
-            else:
-                current_question = None
-        else:
-            current_question = None
+        # Get current question (resolved with the session lookup)
+        current_question = None
+        if session_result['term'] is not None:
+            current_question = {
+                'term_id': str(session_result['term_id']),
+                'term': session_result['term'],
+                'question_number': current_index + 1,
+                'total_questions': total_questions
+            }
         
         return create_response(200, {
             'session_id': session_id,
@@ -677,87 +1137,68 @@ def handle_complete_quiz(event: Dict[str, Any], user_id: str) -> Dict[str, Any]:
         if not session_id:
             return create_response(400, {'error': 'session_id is required'})
         
-        # Verify session exists and belongs to user
-        session_query = """
-            SELECT qs.id, qs.status, qs.current_term_index, qs.total_questions, 
-                   qs.correct_answers, qs.started_at, qs.completed_at, qs.session_data,
-                   tn.data->>'name' as domain_name
-            FROM quiz_sessions qs
-            JOIN tree_nodes tn ON qs.domain_id = tn.id
-            WHERE qs.id = %s AND qs.user_id = %s
-        """
-        session_result = db_proxy.execute_query_one(session_query, (session_id, user_id), return_dict=True)
-        
-        if not session_result:
-            return create_response(404, {'error': 'Quiz session not found'})
-        
-        current_status = session_result['status']
-        current_index = session_result['current_term_index']
-        total_questions = session_result['total_questions']
-        correct_answers = session_result['correct_answers']
-        started_at = session_result['started_at']
-        completed_at = session_result['completed_at']
-        session_data = session_result['session_data'] or {}
-        domain_name = session_result['domain_name']
-        
-        # Check if quiz is completed
-        if current_status != 'completed':
-            # If quiz is not completed but all questions are answered, mark as completed
-            if current_index >= total_questions:
-                update_query = """
-                    UPDATE quiz_sessions 
-                    SET status = 'completed', completed_at = CURRENT_TIMESTAMP
-                    WHERE id = %s
-                """
-                db_proxy.execute_query(update_query, (session_id,))
-                completed_at = datetime.now()
-            else:
-                return create_response(400, {'error': 'Quiz is not yet completed'})
-        
-        # Get detailed progress records for this session
-        progress_query = """
-            SELECT pr.term_id, pr.student_answer, pr.correct_answer, pr.is_correct, 
-                   pr.similarity_score, pr.feedback, pr.created_at,
-                   tn.data->>'term' as term
-            FROM progress_records pr
-            JOIN tree_nodes tn ON pr.term_id = tn.id
-            WHERE pr.session_id = %s
-            ORDER BY pr.created_at
+        # Optional paging of detailed_results (all results by default)
+        try:
+            offset = max(int(query_params.get('offset') or 0), 0)
+            limit = int(query_params['limit']) if query_params.get('limit') else None
+        except ValueError:
+            return create_response(400, {'error': 'offset and limit must be integers'})
+        if limit is not None and limit <= 0:
+            return create_response(400, {'error': 'limit must be positive'})
+        
+        # Completed sessions never change, so the summary is read from its materialized row
+        summary_query = """
+            SELECT s.domain_name, s.total_questions, s.total_attempts, s.correct_count,
+                   s.average_similarity, s.completed_at, s.total_seconds,
+                   jsonb_array_length(s.detailed_results) AS detailed_results_total,
+                   (SELECT COALESCE(jsonb_agg(d.result ORDER BY d.position), '[]'::jsonb)
+                    FROM jsonb_array_elements(s.detailed_results) WITH ORDINALITY AS d(result, position)
+                    WHERE d.position > %s AND (%s::int IS NULL OR d.position <= %s + %s::int)
+                   ) AS detailed_results
+            FROM quiz_session_summaries s
+            WHERE s.session_id = %s AND s.user_id = %s
         """
-        progress_results = db_proxy.execute_query(progress_query, (session_id,), return_dict=True)
-        
-        # Calculate performance metrics
-        total_attempts = len(progress_results)
-        correct_count = sum(1 for record in progress_results if record['is_correct'])
-        incorrect_count = total_attempts - correct_count
-        
-        if total_attempts > 0:
-            accuracy_percentage = (correct_count / total_attempts) * 100
-            average_similarity = sum(record['similarity_score'] or 0 for record in progress_results) / total_attempts
-        else:
-            accuracy_percentage = 0
-            average_similarity = 0
-        
-        # Calculate time taken
-        if started_at and completed_at:
-            time_taken_seconds = (completed_at - started_at).total_seconds()
-            time_taken_minutes = int(time_taken_seconds // 60)
-            time_taken_seconds = int(time_taken_seconds % 60)
-        else:
-            time_taken_minutes = 0
-            time_taken_seconds = 0
-        
-        # Prepare detailed results
-        detailed_results = []
-        for record in progress_results:
-            detailed_results.append({
-                'term': record['term'],
-                'student_answer': record['student_answer'],
-                'correct_answer': record['correct_answer'],
-                'is_correct': record['is_correct'],
-                'similarity_score': round(record['similarity_score'] or 0, 2),
-                'feedback': record['feedback']
-            })
+        summary_params = (offset, limit, offset, limit, session_id, user_id)
+        summary = db_proxy.execute_query_one(summary_query, summary_params, return_dict=True)
+        
+        if not summary:
+            # Not materialized yet (completed before summaries existed, or the
+            # write at completion failed): check the session and build it now
+            session_query = """
+                SELECT status, current_term_index, total_questions
+                FROM quiz_sessions
+                WHERE id = %s AND user_id = %s
+            """
+            session_result = db_proxy.execute_query_one(session_query, (session_id, user_id), return_dict=True)
+            
+            if not session_result:
+                return create_response(404, {'error': 'Quiz session not found'})
+            
+            if session_result['status'] != 'completed':
+                # If quiz is not completed but all questions are answered, mark as completed
+                if session_result['current_term_index'] >= session_result['total_questions']:
+                    update_query = """
+                        UPDATE quiz_sessions 
+                        SET status = 'completed', completed_at = CURRENT_TIMESTAMP
+                        WHERE id = %s
+                    """
+                    db_proxy.execute_query(update_query, (session_id,))
+                else:
+                    return create_response(400, {'error': 'Quiz is not yet completed'})
+            
+            db_proxy.execute_query(MATERIALIZE_SUMMARY_QUERY, (session_id,))
+            summary = db_proxy.execute_query_one(summary_query, summary_params, return_dict=True)
+            if not summary:
+                return create_response(404, {'error': 'Quiz summary not found'})
+        
+        total_attempts = summary['total_attempts']
+        correct_count = summary['correct_count']
+        accuracy_percentage = (correct_count / total_attempts) * 100 if total_attempts > 0 else 0
+        total_seconds = summary['total_seconds']
+        completed_at = summary['completed_at']
+        detailed_results = summary['detailed_results']
+        if isinstance(detailed_results, str):
+            detailed_results = json.loads(detailed_results)
         
         # Generate performance summary
         if accuracy_percentage >= 90:
@@ -778,24 +1219,29 @@ def handle_complete_quiz(event: Dict[str, Any], user_id: str) -> Dict[str, Any]:
         
         quiz_summary = {
             'session_id': session_id,
-            'domain_name': domain_name,
+            'domain_name': summary['domain_name'],
             'status': 'completed',
             'completion_time': completed_at.isoformat() if completed_at else None,
             'performance': {
-                'total_questions': total_questions,
+                'total_questions': summary['total_questions'],
                 'correct_answers': correct_count,
-                'incorrect_answers': incorrect_count,
+                'incorrect_answers': total_attempts - correct_count,
                 'accuracy_percentage': round(accuracy_percentage, 1),
-                'average_similarity_score': round(average_similarity, 2),
+                'average_similarity_score': round(float(summary['average_similarity']), 2),
                 'performance_level': performance_level,
                 'performance_message': performance_message
             },
             'timing': {
-                'time_taken_minutes': time_taken_minutes,
-                'time_taken_seconds': time_taken_seconds,
-                'total_seconds': int((completed_at - started_at).total_seconds()) if started_at and completed_at else 0
+                'time_taken_minutes': total_seconds // 60,
+                'time_taken_seconds': total_seconds % 60,
+                'total_seconds': total_seconds
             },
             'detailed_results': detailed_results,
+            'detailed_results_page': {
+                'offset': offset,
+                'limit': limit,
+                'total': summary['detailed_results_total']
+            },
             'actions': {
                 'can_restart': can_restart,
                 'can_review': True
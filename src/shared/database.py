@@ -5,7 +5,10 @@ Uses AWS Secrets Manager + KMS for secure credential management
 import os
 import json
 import boto3
+import threading
+import weakref
 import psycopg
+from psycopg.rows import tuple_row, dict_row, namedtuple_row, class_row
 from psycopg_pool import ConnectionPool
 from typing import Optional, Dict, Any
 from contextlib import contextmanager
@@ -20,6 +23,120 @@ import logging
 logger = logging.getLogger(__name__)
 
 
+# Rows are built by psycopg's row makers instead of zipping cursor.description
+# over fetched tuples in Python
+ROW_FACTORIES = {
+    'tuple': tuple_row,
+    'dict': dict_row,
+    'namedtuple': namedtuple_row,
+}
+
+def resolve_row_factory(row_factory: Any = None) -> Any:
+    """
+    psycopg row factory for a name ('tuple', 'dict', 'namedtuple'), a class or
+    an existing row factory
+
+    A class is built with keyword arguments named after the result columns
+    (psycopg class_row), so __slots__ classes and dataclasses avoid a per-row dict.
+    """
+    if row_factory is None:
+        return tuple_row
+    if isinstance(row_factory, str):
+        try:
+            return ROW_FACTORIES[row_factory]
+        except KeyError:
+            raise ValueError(f"Unknown row factory: {row_factory}") from None
+    if isinstance(row_factory, type):
+        return class_row(row_factory)
+    return row_factory
+
+
+class NamedQuery(str):
+    """SQL text registered under a name; executed as a per-connection prepared statement"""
+    name: str = ''
+
+
+class QueryRegistry:
+    """
+    Named hot-path queries
+
+    Handlers register their SQL once at import time and pass the returned
+    NamedQuery wherever they would pass SQL text. The first execution on each
+    pooled connection prepares it server-side (psycopg prepare=True), so later
+    executions on that connection skip parse and planning. Counts are per
+    container: 'prepares' is server-side parses, 'executions' all runs.
+    """
+
+    def __init__(self):
+        self._queries: Dict[str, NamedQuery] = {}
+        self._counts: Dict[str, Dict[str, int]] = {}
+        self._prepared: 'weakref.WeakKeyDictionary[Any, set]' = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+
+    def register(self, name: str, sql: str) -> NamedQuery:
+        """Register sql under name; re-registering the same text is a no-op"""
+        with self._lock:
+            existing = self._queries.get(name)
+            if existing is not None:
+                if str(existing) != sql:
+                    raise ValueError(f"Query {name} is already registered with different SQL")
+                return existing
+            query = NamedQuery(sql)
+            query.name = name
+            self._queries[name] = query
+            self._counts[name] = {'executions': 0, 'prepares': 0}
+            return query
+
+    def __getitem__(self, name: str) -> NamedQuery:
+        return self._queries[name]
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._queries
+
+    def record(self, connection: Any, query: NamedQuery) -> None:
+        """Count an execution, and a prepare on the query's first use on this connection"""
+        with self._lock:
+            counts = self._counts[query.name]
+            counts['executions'] += 1
+            prepared = self._prepared.setdefault(connection, set())
+            if query.name not in prepared:
+                prepared.add(query.name)
+                counts['prepares'] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            queries = {name: dict(counts) for name, counts in self._counts.items()}
+        executions = sum(c['executions'] for c in queries.values())
+        prepares = sum(c['prepares'] for c in queries.values())
+        return {
+            'queries': queries,
+            'executions': executions,
+            'prepares': prepares,
+            'reuse_rate': round(1 - prepares / executions, 4) if executions else 0.0,
+        }
+
+
+query_registry = QueryRegistry()
+
+
+def register_query(name: str, sql: str) -> NamedQuery:
+    """Register a hot query in the container-wide registry"""
+    return query_registry.register(name, sql)
+
+
+def query_stats() -> Dict[str, Any]:
+    """Execution and prepare counts of registered queries"""
+    return query_registry.stats()
+
+
+def execute_statement(cursor: Any, query: str, params: Any = None) -> Any:
+    """cursor.execute(), preparing registered queries on first use per connection"""
+    if isinstance(query, NamedQuery):
+        query_registry.record(cursor.connection, query)
+        return cursor.execute(query, params, prepare=True)
+    return cursor.execute(query, params)
+
+
 class DatabaseManager:
     """Manages database connections with connection pooling for Lambda functions"""
     
@@ -145,10 +262,10 @@ class DatabaseManager:
             yield connection
     
     @contextmanager
-    def get_cursor(self):
+    def get_cursor(self, row_factory: Any = None):
         """Get a database cursor with automatic connection management"""
         with self.get_connection() as connection:
-            cursor = connection.cursor()
+            cursor = connection.cursor(row_factory=resolve_row_factory(row_factory))
             try:
                 yield cursor
                 connection.commit()
@@ -186,25 +303,25 @@ def get_db_connection():
     return db_manager.get_connection()
 
 
-def get_db_cursor():
+def get_db_cursor(row_factory: Any = None):
     """Get database cursor context manager"""
-    return db_manager.get_cursor()
+    return db_manager.get_cursor(row_factory)
 
 
-def execute_query(query: str, params: tuple = None) -> Any:
+def execute_query(query: str, params: tuple = None, row_factory: Any = None) -> Any:
     """Execute a query and return results"""
-    with get_db_cursor() as cursor:
-        cursor.execute(query, params)
+    with get_db_cursor(row_factory) as cursor:
+        execute_statement(cursor, query, params)
         # Check if query returns rows (SELECT, INSERT/UPDATE/DELETE with RETURNING)
         if cursor.description is not None:
             return cursor.fetchall()
         return cursor.rowcount
 
 
-def execute_query_one(query: str, params: tuple = None) -> Any:
+def execute_query_one(query: str, params: tuple = None, row_factory: Any = None) -> Any:
     """Execute a query and return single result"""
-    with get_db_cursor() as cursor:
-        cursor.execute(query, params)
+    with get_db_cursor(row_factory) as cursor:
+        execute_statement(cursor, query, params)
         # Check if query returns rows (SELECT, INSERT/UPDATE/DELETE with RETURNING)
         if cursor.description is not None:
             return cursor.fetchone()
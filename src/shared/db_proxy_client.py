@@ -2,7 +2,9 @@
 Simple database client wrapper for Lambda functions.
 Replaces the missing db_proxy_client module with direct database connections.
 """
-from shared.database import get_db_connection
+from shared.database import (
+    get_db_connection, resolve_row_factory, execute_statement, register_query, query_stats
+)
 
 
 class DBProxyClient:
@@ -12,34 +14,36 @@ class DBProxyClient:
         """Initialize client (function_name ignored - using direct connection)."""
         self.function_name = function_name
     
-    def execute_query(self, query, params=None, return_dict=False):
+    @staticmethod
+    def _row_factory(return_dict, row_factory):
+        """row_factory ('tuple', 'dict', 'namedtuple', a class or a psycopg row factory) wins over return_dict."""
+        return resolve_row_factory(row_factory or ('dict' if return_dict else None))
+    
+    def execute_query(self, query, params=None, return_dict=False, row_factory=None):
         """Execute a query and return all results."""
         with get_db_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute(query, params or [])
+            cursor = conn.cursor(row_factory=self._row_factory(return_dict, row_factory))
+            execute_statement(cursor, query, params or [])
 
             if query.strip().upper().startswith('SELECT'):
-                if return_dict:
-                    columns = [desc[0] for desc in cursor.description]
-                    results = [dict(zip(columns, row)) for row in cursor.fetchall()]
-                else:
-                    results = cursor.fetchall()
+                results = cursor.fetchall()
             else:
                 results = []
 
             cursor.close()
             return results
 
-    def execute_query_one(self, query, params=None, return_dict=False):
+    def execute_query_one(self, query, params=None, return_dict=False, row_factory=None):
         """Execute a query and return one result."""
         with get_db_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute(query, params or [])
+            cursor = conn.cursor(row_factory=self._row_factory(return_dict, row_factory))
+            execute_statement(cursor, query, params or [])
 
             result = cursor.fetchone()
-            if result and return_dict:
-                columns = [desc[0] for desc in cursor.description]
-                result = dict(zip(columns, result))
 
             cursor.close()
             return result
+
+    def query_stats(self):
+        """Execution and prepare counts of registered queries (see register_query)."""
+        return query_stats()
@@ -0,0 +1,124 @@
+"""
+Reference Embedding Store
+Persists term definition embeddings alongside their tree_nodes rows so answer
+evaluation only has to encode the student answer.
+"""
+import logging
+from typing import Any, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def _get_model_utils():
+    """Import model_utils lazily - Lambdas without the ML stack simply skip encoding."""
+    try:
+        import model_utils
+        return model_utils
+    except ImportError as e:
+        logger.info(f"Model utilities unavailable, embeddings deferred to evaluation: {e}")
+        return None
+
+
+def compute_reference_embeddings(texts: List[str]) -> Optional[Tuple[List[bytes], str]]:
+    """
+    Encode reference texts into their storage form
+
+    Returns:
+        (serialized embeddings, model version) or None if the model is unavailable
+    """
+    model_utils = _get_model_utils()
+    if model_utils is None or not texts:
+        return None
+
+    model_manager = model_utils.get_model_manager()
+    embeddings = model_manager.encode_batch(texts)
+    if embeddings is None:
+        return None
+
+    return [model_utils.serialize_embedding(e) for e in embeddings], model_manager.model_version
+
+
+def _write_embeddings(db_proxy: Any, term_ids: List[str], embeddings: List[bytes], model_version: str) -> None:
+    db_proxy.execute_query(
+        """
+        UPDATE tree_nodes AS t
+        SET definition_embedding = v.embedding, embedding_model_version = %s
+        FROM unnest(%s::uuid[], %s::bytea[]) AS v(id, embedding)
+        WHERE t.id = v.id
+        """,
+        params=[model_version, [str(term_id) for term_id in term_ids], embeddings]
+    )
+
+
+def store_term_embeddings(db_proxy: Any, terms: List[Tuple[str, str]]) -> int:
+    """
+    Compute and persist definition embeddings for freshly written terms
+
+    Args:
+        db_proxy: DBProxyClient used by the calling handler
+        terms: List of (term_id, definition) tuples
+
+    Returns:
+        Number of terms whose embedding was stored (0 when encoding was deferred)
+    """
+    if not terms:
+        return 0
+
+    try:
+        computed = compute_reference_embeddings([definition for _, definition in terms])
+        if computed is None:
+            return 0
+
+        embeddings, model_version = computed
+        _write_embeddings(db_proxy, [term_id for term_id, _ in terms], embeddings, model_version)
+        return len(embeddings)
+
+    except Exception as e:
+        # Embeddings are an optimization; the evaluator backfills anything missing
+        logger.warning(f"Failed to store term embeddings: {e}")
+        return 0
+
+
+def get_reference_embedding(db_proxy: Any, term_id: str, reference_text: str) -> Optional[Any]:
+    """
+    Get the definition embedding for a term, backfilling it if missing or stale
+
+    The stored embedding is only used when reference_text matches the stored
+    definition, so callers can never score against (or persist) a mismatched text.
+
+    Returns:
+        float32 embedding vector, or None if the caller should encode both texts
+    """
+    model_utils = _get_model_utils()
+    if model_utils is None:
+        return None
+
+    try:
+        row = db_proxy.execute_query_one(
+            """
+            SELECT data->>'definition', definition_embedding, embedding_model_version
+            FROM tree_nodes
+            WHERE id = %s AND node_type = 'term'
+            """,
+            params=[term_id]
+        )
+        if not row or row[0] is None or row[0].strip() != reference_text:
+            return None
+
+        model_manager = model_utils.get_model_manager()
+        if row[1] is not None and row[2] == model_manager.model_version:
+            return model_utils.deserialize_embedding(bytes(row[1]))
+
+        # Terms written by Lambdas without the model, or by an older model version
+        embeddings = model_manager.encode_batch([reference_text])
+        if embeddings is None:
+            return None
+
+        _write_embeddings(
+            db_proxy, [term_id], [model_utils.serialize_embedding(embeddings[0])], model_manager.model_version
+        )
+        return embeddings[0]
+
+    except Exception as e:
+        logger.warning(f"Failed to get reference embedding for term {term_id}: {e}")
+        return None
@@ -0,0 +1,205 @@
+"""
+Tiered Evaluation Cascade
+Decides trivial answers with cheap checks before falling back to the ONNX model:
+normalized exact match / non-answers first, then lexical overlap with confident
+accept/reject bands, and the model only for the ambiguous middle.
+"""
+import os
+import re
+import time
+import logging
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Dict, FrozenSet, List, Optional
+
+logger = logging.getLogger(__name__)
+
+_NON_WORD = re.compile(r"[^a-z0-9]+")
+
+# Dropped before lexical comparison. Negations and directional words (to, from,
+# into, onto) are deliberately kept as content: they carry the meaning that
+# distinguishes "converts an integer to a string" from its reverse.
+STOPWORDS = frozenset("""
+a an the and or of in on at by for with as is are was were be been being it its this that these those
+which who whom what when where how than then so such can may might will would should could do does did
+has have had their there they them he she his her we our you your i me my also very just
+""".split())
+
+NEGATIONS = frozenset({'not', 'no', 'never', 'none', 'nor', 'cannot', 'without', 'neither'})
+
+# Answers that say nothing, after normalization
+NON_ANSWERS = frozenset({
+    'idk', 'i dont know', 'i do not know', 'dont know', 'no idea', 'not sure', 'pass', 'skip',
+    'no clue', 'unknown', 'n a', 'na', 'none',
+})
+
+
+def normalize_answer(text: str) -> str:
+    """Lowercase, expand n't, and reduce to space-separated alphanumeric words"""
+    text = text.lower().replace("n't", " not").replace("'", "")
+    return _NON_WORD.sub(' ', text).strip()
+
+
+def content_tokens(normalized: str) -> FrozenSet[str]:
+    return frozenset(content_sequence(normalized))
+
+
+def content_sequence(normalized: str) -> List[str]:
+    """Content words in answer order"""
+    return [t for t in normalized.split() if t not in STOPWORDS]
+
+
+def dice(a: FrozenSet, b: FrozenSet) -> float:
+    return 2.0 * len(a & b) / (len(a) + len(b)) if a or b else 1.0
+
+
+def content_bigrams(sequence: List[str]) -> FrozenSet:
+    """Adjacent content-word pairs; a single word stands in for itself"""
+    if len(sequence) < 2:
+        return frozenset((t,) for t in sequence)
+    return frozenset(zip(sequence, sequence[1:]))
+
+
+class CascadeTier(ABC):
+    """
+    One stage of the cascade. score() returns a similarity when the tier is
+    confident about the outcome at this threshold, or None to defer.
+    """
+
+    name = 'tier'
+
+    @abstractmethod
+    def score(self, student_answer: str, correct_answer: str, threshold: float) -> Optional[float]:
+        """Similarity if this tier can decide the answer, None to defer to the next tier"""
+
+    def record(self, student_answer: str, correct_answer: str, similarity: float) -> None:
+        """Called with the model's score for answers no tier decided"""
+
+
+class NormalizedMatchTier(CascadeTier):
+    """Exact copies of the reference score 1.0; empty answers and non-answers score 0.0"""
+
+    name = 'exact_match'
+
+    def score(self, student_answer: str, correct_answer: str, threshold: float) -> Optional[float]:
+        student = normalize_answer(student_answer)
+        if student and student == normalize_answer(correct_answer):
+            return 1.0
+        if not student or student in NON_ANSWERS or not content_tokens(student):
+            return 0.0
+        return None
+
+
+class LexicalOverlapTier(CascadeTier):
+    """
+    Dice overlap of content words and of their adjacent pairs. Near-copies of
+    the reference (both overlaps at or above accept_threshold, same negations)
+    are accepted with the lower overlap as the score, so reordered answers such
+    as swapped arguments or a reversed direction go to the model. A short answer
+    sharing no content words with a full definition is rejected. Everything in
+    between goes to the model.
+    """
+
+    name = 'lexical'
+
+    DEFAULT_ACCEPT_THRESHOLD = 0.9
+    # Reject only tiny answers against sentence-length references; longer
+    # zero-overlap answers may be paraphrases and need the model
+    REJECT_MAX_ANSWER_TOKENS = 1
+    REJECT_MIN_REFERENCE_TOKENS = 3
+
+    def __init__(self, accept_threshold: Optional[float] = None):
+        self.accept_threshold = accept_threshold if accept_threshold is not None else float(
+            os.environ.get('CASCADE_LEXICAL_ACCEPT', self.DEFAULT_ACCEPT_THRESHOLD))
+
+    def score(self, student_answer: str, correct_answer: str, threshold: float) -> Optional[float]:
+        student_sequence = content_sequence(normalize_answer(student_answer))
+        reference_sequence = content_sequence(normalize_answer(correct_answer))
+        student, reference = frozenset(student_sequence), frozenset(reference_sequence)
+        if not student or not reference:
+            return None
+
+        overlap = dice(student, reference)
+        if overlap >= max(self.accept_threshold, threshold) and not (student ^ reference) & NEGATIONS:
+            ordered_overlap = min(overlap, dice(content_bigrams(student_sequence),
+                                                content_bigrams(reference_sequence)))
+            if ordered_overlap >= max(self.accept_threshold, threshold):
+                return ordered_overlap
+            return None
+        if (overlap == 0.0 and len(student) <= self.REJECT_MAX_ANSWER_TOKENS
+                and len(reference) >= self.REJECT_MIN_REFERENCE_TOKENS):
+            return 0.0
+        return None
+
+
+class SimilarityCacheTier(CascadeTier):
+    """Serves previously computed model scores from a SimilarityCache and writes new ones back"""
+
+    name = 'cache'
+
+    def __init__(self, similarity_cache: Any):
+        self.similarity_cache = similarity_cache
+
+    def score(self, student_answer: str, correct_answer: str, threshold: float) -> Optional[float]:
+        return self.similarity_cache.get(student_answer, correct_answer)
+
+    def record(self, student_answer: str, correct_answer: str, similarity: float) -> None:
+        self.similarity_cache.put(student_answer, correct_answer, similarity)
+
+
+class EvaluationCascade:
+    """Runs tiers in order and falls back to the model scorer for undecided answers"""
+
+    MODEL_STAGE = 'model'
+
+    def __init__(self, tiers: Optional[List[CascadeTier]] = None):
+        self.tiers = tiers if tiers is not None else [NormalizedMatchTier(), LexicalOverlapTier()]
+
+    def evaluate(self, student_answer: str, correct_answer: str, threshold: float,
+                 model_scorer: Callable[[], Optional[float]]) -> Optional[Dict[str, Any]]:
+        """
+        Score an answer with the first tier that decides it
+
+        Returns:
+            {'similarity_score', 'stage', 'timings_ms'} or None if the model fails
+        """
+        timings: Dict[str, float] = {}
+        for tier in self.tiers:
+            started = time.perf_counter()
+            try:
+                score = tier.score(student_answer, correct_answer, threshold)
+            except Exception as e:
+                logger.warning(f"Cascade tier {tier.name} failed, deferring: {e}")
+                score = None
+            timings[tier.name] = round((time.perf_counter() - started) * 1000, 3)
+            if score is not None:
+                return {'similarity_score': score, 'stage': tier.name, 'timings_ms': timings}
+
+        started = time.perf_counter()
+        score = model_scorer()
+        timings[self.MODEL_STAGE] = round((time.perf_counter() - started) * 1000, 3)
+        if score is None:
+            return None
+        for tier in self.tiers:
+            try:
+                tier.record(student_answer, correct_answer, score)
+            except Exception as e:
+                logger.warning(f"Cascade tier {tier.name} failed to record score: {e}")
+        return {'similarity_score': score, 'stage': self.MODEL_STAGE, 'timings_ms': timings}
+
+
+_evaluation_cascade: Optional[EvaluationCascade] = None
+
+def get_evaluation_cascade(similarity_cache: Optional[Any] = None) -> EvaluationCascade:
+    """
+    Cascade configured from the environment; EVALUATION_CASCADE=false skips the
+    heuristic tiers. A similarity cache, if given on first use, becomes the last
+    tier before the model (exact scores, so it applies either way).
+    """
+    global _evaluation_cascade
+    if _evaluation_cascade is None:
+        enabled = os.environ.get('EVALUATION_CASCADE', 'true').lower() not in ('false', '0', 'no')
+        tiers: List[CascadeTier] = [NormalizedMatchTier(), LexicalOverlapTier()] if enabled else []
+        if similarity_cache is not None:
+            tiers.append(SimilarityCacheTier(similarity_cache))
+        _evaluation_cascade = EvaluationCascade(tiers)
+    return _evaluation_cascade
@@ -0,0 +1,147 @@
+"""
+Identity Cache
+Per-container cache of Cognito sub -> database user resolution so authenticated
+handlers skip the `SELECT id FROM users WHERE cognito_sub = %s` round trip on
+warm invocations.
+"""
+import os
+import time
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+from db_proxy_client import register_query
+
+logger = logging.getLogger(__name__)
+
+USER_ID_BY_SUB_QUERY = register_query('users.id_by_cognito_sub', "SELECT id FROM users WHERE cognito_sub = %s")
+
+
+def parse_group_claims(claims: Dict[str, Any]) -> Optional[List[str]]:
+    """cognito:groups from authorizer claims (comma-separated string or list), None if absent"""
+    groups = claims.get('cognito:groups')
+    if groups is None:
+        return None
+    if isinstance(groups, str):
+        return [g for g in groups.strip('[]').replace(' ', ',').split(',') if g]
+    return list(groups)
+
+
+class IdentityResolver:
+    """
+    TTL-bounded LRU of cognito_sub -> {'user_id', 'cognito_sub', 'groups'}
+
+    Unknown subs are cached as negative entries with a much shorter TTL, since
+    the post-confirmation trigger may create the user from another container
+    moments after a first (failed) lookup. Group claims from the current token
+    always replace cached groups; cached groups are only served when a request
+    carries none.
+
+    Entries live in one container only and nothing invalidates them across
+    containers. No handler changes an existing sub -> user_id mapping (profile
+    updates leave both alone, sign-ups insert with ON CONFLICT DO NOTHING), so
+    only out-of-band deletes or re-links go stale: they keep resolving to the
+    old user_id for up to ttl_seconds (IDENTITY_CACHE_TTL_SECONDS, capped at
+    MAX_TTL_SECONDS) in every warm container that cached them.
+    """
+
+    DEFAULT_TTL_SECONDS = 60
+    MAX_TTL_SECONDS = 300
+    DEFAULT_NEGATIVE_TTL_SECONDS = 10
+    DEFAULT_MAX_ENTRIES = 1024
+
+    _MISSING = object()
+
+    def __init__(self, db_proxy: Any, ttl_seconds: Optional[float] = None,
+                 negative_ttl_seconds: Optional[float] = None, max_entries: Optional[int] = None):
+        self.db_proxy = db_proxy
+        self.ttl_seconds = min(self.MAX_TTL_SECONDS, ttl_seconds if ttl_seconds is not None else float(
+            os.environ.get('IDENTITY_CACHE_TTL_SECONDS', self.DEFAULT_TTL_SECONDS)))
+        self.negative_ttl_seconds = negative_ttl_seconds if negative_ttl_seconds is not None else float(
+            os.environ.get('IDENTITY_CACHE_NEGATIVE_TTL_SECONDS', self.DEFAULT_NEGATIVE_TTL_SECONDS))
+        self.max_entries = max_entries or int(
+            os.environ.get('IDENTITY_CACHE_MAX_ENTRIES', self.DEFAULT_MAX_ENTRIES))
+        self._entries: 'OrderedDict[str, tuple]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def resolve(self, cognito_sub: str, groups: Optional[List[str]] = None) -> Optional[Dict[str, Any]]:
+        """
+        Database identity for a Cognito sub
+
+        Returns:
+            {'user_id', 'cognito_sub', 'groups'} or None if no user has this sub
+        """
+        cached = self._lookup(cognito_sub)
+        if cached is self._MISSING:
+            self.misses += 1
+            row = self.db_proxy.execute_query_one(USER_ID_BY_SUB_QUERY, (cognito_sub,))
+            cached = {'user_id': row[0], 'cognito_sub': cognito_sub, 'groups': []} if row else None
+            self._store(cognito_sub, cached)
+        else:
+            self.hits += 1
+
+        if cached is None:
+            return None
+        if groups is not None and groups != cached['groups']:
+            cached = dict(cached, groups=list(groups))
+            self._store(cognito_sub, cached)
+        return dict(cached)
+
+    def resolve_event(self, event: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """resolve() for the Cognito authorizer claims of an API Gateway event (None without a sub)"""
+        claims = event.get('requestContext', {}).get('authorizer', {}).get('claims', {}) or {}
+        cognito_sub = claims.get('sub')
+        if not cognito_sub:
+            return None
+        return self.resolve(cognito_sub, parse_group_claims(claims))
+
+    def invalidate(self, cognito_sub: str) -> None:
+        """Drop a sub from this container's cache; other containers keep it until its TTL expires"""
+        with self._lock:
+            self._entries.pop(cognito_sub, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def _lookup(self, cognito_sub: str) -> Any:
+        with self._lock:
+            entry = self._entries.get(cognito_sub)
+            if entry is None:
+                return self._MISSING
+            value, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._entries[cognito_sub]
+                return self._MISSING
+            self._entries.move_to_end(cognito_sub)
+            return value
+
+    def _store(self, cognito_sub: str, value: Optional[Dict[str, Any]]) -> None:
+        ttl = self.ttl_seconds if value is not None else self.negative_ttl_seconds
+        with self._lock:
+            self._entries[cognito_sub] = (value, time.monotonic() + ttl)
+            self._entries.move_to_end(cognito_sub)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+_identity_resolver: Optional[IdentityResolver] = None
+
+def get_identity_resolver(db_proxy: Any) -> IdentityResolver:
+    """Container-wide resolver; the first caller's db_proxy is used for lookups"""
+    global _identity_resolver
+    if _identity_resolver is None:
+        _identity_resolver = IdentityResolver(db_proxy)
+    return _identity_resolver
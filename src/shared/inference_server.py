@@ -0,0 +1,249 @@
+"""
+Micro-batching Inference Server
+Coalesces concurrent encode requests into batched ModelManager calls so the
+ONNX session runs one wide batch instead of many two-text batches.
+
+Runs as a sidecar or long-lived container in front of the answer evaluator:
+    python src/shared/inference_server.py --port 8080
+
+Routes:
+    GET  /health      - model info and batching stats
+    POST /similarity  - {"answer": "...", "correct_answer": "..."} -> {"similarity": 0.85}
+    POST /batch       - {"pairs": [{"answer": ..., "correct_answer": ...}]} -> {"similarities": [...]}
+"""
+import os
+import json
+import time
+import asyncio
+import argparse
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from model_utils import ModelManager, pairwise_similarity
+
+logger = logging.getLogger(__name__)
+
+
+class MicroBatcher:
+    """
+    Asyncio request queue in front of ModelManager.encode_batch
+
+    The worker takes the first queued request, keeps collecting requests until
+    max_batch_size texts are gathered or max_wait_ms has passed since the first
+    one arrived, then encodes them in a single call on a worker thread and
+    resolves each request's future with its own rows.
+    """
+
+    DEFAULT_MAX_BATCH_SIZE = 64
+    DEFAULT_MAX_WAIT_MS = 5.0
+
+    def __init__(self, model_manager: ModelManager, max_batch_size: Optional[int] = None,
+                 max_wait_ms: Optional[float] = None):
+        self.model_manager = model_manager
+        self.max_batch_size = max_batch_size or int(
+            os.environ.get('INFERENCE_MAX_BATCH_SIZE', self.DEFAULT_MAX_BATCH_SIZE))
+        if max_wait_ms is None:
+            max_wait_ms = float(os.environ.get('INFERENCE_MAX_WAIT_MS', self.DEFAULT_MAX_WAIT_MS))
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self.requests = 0
+        self.batches = 0
+        self.texts = 0
+
+    async def start(self) -> None:
+        if self._worker is None:
+            self._queue = asyncio.Queue()
+            self._worker = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+
+    async def encode(self, texts: List[str]) -> np.ndarray:
+        """Encode texts as part of the next coalesced batch"""
+        await self.start()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((list(texts), future))
+        return await future
+
+    async def similarity(self, text1: str, text2: str) -> float:
+        embeddings = await self.encode([text1, text2])
+        return float(pairwise_similarity(embeddings[0:1], embeddings[1:2])[0])
+
+    async def batch_similarity(self, answers: List[str], correct_answers: List[str]) -> List[float]:
+        embeddings = await self.encode(answers + correct_answers)
+        n = len(answers)
+        return pairwise_similarity(embeddings[:n], embeddings[n:]).tolist()
+
+    async def _collect(self) -> List[Tuple[List[str], asyncio.Future]]:
+        batch = [await self._queue.get()]
+        size = len(batch[0][0])
+        deadline = asyncio.get_running_loop().time() + self.max_wait
+        while size < self.max_batch_size:
+            timeout = deadline - asyncio.get_running_loop().time()
+            try:
+                item = self._queue.get_nowait() if timeout <= 0 else await asyncio.wait_for(self._queue.get(), timeout)
+            except (asyncio.QueueEmpty, asyncio.TimeoutError):
+                break
+            batch.append(item)
+            size += len(item[0])
+        return batch
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect()
+            texts = [text for item_texts, _ in batch for text in item_texts]
+            try:
+                # encode_batch is CPU-bound; keep the event loop free to accept requests
+                embeddings = await loop.run_in_executor(None, self.model_manager.encode_batch, texts)
+                error = None if embeddings is not None else RuntimeError("Model encoding failed")
+            except Exception as e:
+                embeddings, error = None, e
+
+            self.requests += len(batch)
+            self.batches += 1
+            self.texts += len(texts)
+
+            offset = 0
+            for item_texts, future in batch:
+                if not future.done():
+                    if error is not None:
+                        future.set_exception(error)
+                    else:
+                        future.set_result(embeddings[offset:offset + len(item_texts)])
+                offset += len(item_texts)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'requests': self.requests,
+            'batches': self.batches,
+            'texts': self.texts,
+            'mean_batch_texts': round(self.texts / self.batches, 2) if self.batches else 0.0,
+            'queued': self._queue.qsize() if self._queue else 0,
+            'max_batch_size': self.max_batch_size,
+            'max_wait_ms': self.max_wait * 1000.0,
+        }
+
+
+class InferenceServer:
+    """Minimal HTTP/1.1 JSON front end for MicroBatcher (keep-alive, no extra dependencies)"""
+
+    MAX_BODY_BYTES = 1024 * 1024
+
+    def __init__(self, batcher: MicroBatcher):
+        self.batcher = batcher
+
+    async def handle_request(self, method: str, path: str, body: Dict[str, Any]) -> Tuple[int, Dict[str, Any]]:
+        if method == 'GET' and path == '/health':
+            return 200, {
+                'status': 'healthy',
+                'model': self.batcher.model_manager.get_model_info(),
+                'batching': self.batcher.stats(),
+            }
+
+        if method == 'POST' and path == '/similarity':
+            answer = str(body.get('answer', '')).strip()
+            correct_answer = str(body.get('correct_answer', '')).strip()
+            if not answer or not correct_answer:
+                return 400, {'error': 'Both answer and correct_answer are required'}
+            return 200, {'similarity': await self.batcher.similarity(answer, correct_answer)}
+
+        if method == 'POST' and path == '/batch':
+            pairs = body.get('pairs')
+            if not isinstance(pairs, list) or not pairs:
+                return 400, {'error': 'pairs must be a non-empty list'}
+            answers = [str(p.get('answer', '')).strip() for p in pairs]
+            correct_answers = [str(p.get('correct_answer', '')).strip() for p in pairs]
+            return 200, {'similarities': await self.batcher.batch_similarity(answers, correct_answers)}
+
+        return 404, {'error': f'No route for {method} {path}'}
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, path, _ = request_line.decode('latin-1').split(' ', 2)
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+
+                length = int(headers.get('content-length', 0))
+                started = time.perf_counter()
+                if length > self.MAX_BODY_BYTES:
+                    status, payload = 413, {'error': 'Request body too large'}
+                else:
+                    raw = await reader.readexactly(length) if length else b''
+                    try:
+                        body = json.loads(raw) if raw else {}
+                        status, payload = await self.handle_request(method.upper(), path.split('?', 1)[0], body)
+                    except (ValueError, AttributeError) as e:
+                        status, payload = 400, {'error': f'Invalid request: {e}'}
+                    except Exception as e:
+                        logger.error(f"Inference request failed: {e}")
+                        status, payload = 500, {'error': 'Inference failed'}
+
+                data = json.dumps(payload).encode()
+                keep_alive = headers.get('connection', '').lower() != 'close' and length <= self.MAX_BODY_BYTES
+                writer.write(
+                    f"HTTP/1.1 {status} {'OK' if status == 200 else 'Error'}\r\n"
+                    f"Content-Type: application/json\r\n"
+                    f"Content-Length: {len(data)}\r\n"
+                    f"X-Inference-Time-Ms: {(time.perf_counter() - started) * 1000:.2f}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode() + data
+                )
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host: str, port: int) -> asyncio.AbstractServer:
+        await self.batcher.start()
+        return await asyncio.start_server(self.handle_connection, host, port)
+
+
+async def _serve_forever(host: str, port: int, batcher: MicroBatcher) -> None:
+    server = await InferenceServer(batcher).serve(host, port)
+    logger.info(f"Inference server listening on {host}:{port} "
+                f"(max batch {batcher.max_batch_size}, max wait {batcher.max_wait * 1000:.1f}ms)")
+    async with server:
+        await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Micro-batching similarity inference server")
+    parser.add_argument('--host', default=os.environ.get('INFERENCE_HOST', '0.0.0.0'))
+    parser.add_argument('--port', type=int, default=int(os.environ.get('INFERENCE_PORT', 8080)))
+    parser.add_argument('--max-batch-size', type=int, default=None, help="Texts per batched session call")
+    parser.add_argument('--max-wait-ms', type=float, default=None, help="How long to wait for a batch to fill")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    model_manager = ModelManager()
+    if not model_manager.load_model():
+        raise SystemExit("Failed to load model")
+
+    batcher = MicroBatcher(model_manager, args.max_batch_size, args.max_wait_ms)
+    asyncio.run(_serve_forever(args.host, args.port, batcher))
+
+
+if __name__ == '__main__':
+    main()
@@ -4,16 +4,20 @@ Handles model loading, caching, and vector encoding for semantic similarity
 using onnxruntime instead of sentence_transformers/torch.
 """
 import os
+import re
+import math
+import hashlib
 import logging
-from typing import List, Optional
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
 import numpy as np
-from sklearn.metrics.pairwise import cosine_similarity
 
 logger = logging.getLogger(__name__)
 
 # Lazy imports - only loaded when model is actually used
 _ort = None
 _tokenizers = None
+_auto_tokenizer = None
 
 def _get_ort():
     global _ort
@@ -22,47 +26,375 @@ def _get_ort():
         _ort = ort
     return _ort
 
-def _get_tokenizer_lib():
+def _get_fast_tokenizer_lib():
+    """Standalone `tokenizers` runtime - avoids the transformers import graph on cold start."""
     global _tokenizers
     if _tokenizers is None:
-        from transformers import AutoTokenizer
-        _tokenizers = AutoTokenizer
+        from tokenizers import Tokenizer
+        _tokenizers = Tokenizer
     return _tokenizers
 
+def _get_tokenizer_lib():
+    global _auto_tokenizer
+    if _auto_tokenizer is None:
+        from transformers import AutoTokenizer
+        _auto_tokenizer = AutoTokenizer
+    return _auto_tokenizer
+
+
+# Lambda allocates CPU in proportion to memory, one full vCPU per 1,769 MB
+LAMBDA_MB_PER_VCPU = 1769
+
+def _default_intra_op_threads() -> int:
+    """Threads matching the vCPUs the function actually gets, not the host's core count."""
+    cpus = os.cpu_count() or 1
+    memory_mb = os.environ.get('AWS_LAMBDA_FUNCTION_MEMORY_SIZE')
+    if memory_mb:
+        cpus = min(cpus, math.ceil(int(memory_mb) / LAMBDA_MB_PER_VCPU))
+    return max(1, cpus)
+
+
+# File content hashes by (path, size, mtime); model files are hashed once per container
+_content_hashes: Dict[tuple, str] = {}
+
+# Build-time fingerprint next to each ONNX file, in sha256sum format
+MODEL_HASH_SUFFIX = '.sha256'
+
+def _file_content_hash(path: str) -> str:
+    """SHA-256 of a file's bytes, streamed so large ONNX files are never held in memory."""
+    stat = os.stat(path)
+    key = (path, stat.st_size, stat.st_mtime_ns)
+    if key not in _content_hashes:
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                digest.update(chunk)
+        _content_hashes[key] = digest.hexdigest()
+    return _content_hashes[key]
+
+def model_content_hash(onnx_path: str) -> str:
+    """
+    SHA-256 of an ONNX model, read from the `<model>.sha256` sidecar written at
+    build time; the file itself is only hashed (once per process) without one.
+    """
+    try:
+        with open(onnx_path + MODEL_HASH_SUFFIX, 'r') as f:
+            recorded = f.read().split()
+        if recorded and len(recorded[0]) == 64:
+            return recorded[0].lower()
+    except OSError:
+        pass
+    logger.info(f"No build-time fingerprint for {onnx_path}, hashing the model file")
+    return _file_content_hash(onnx_path)
+
+def write_model_hash(onnx_path: str) -> str:
+    """Write the `<model>.sha256` sidecar for an ONNX file (run at build time) and return the hash."""
+    content_hash = _file_content_hash(onnx_path)
+    with open(onnx_path + MODEL_HASH_SUFFIX, 'w') as f:
+        f.write(f"{content_hash}  {os.path.basename(onnx_path)}\n")
+    return content_hash
+
+
+class FastTokenizer:
+    """
+    Minimal callable wrapper around a `tokenizers.Tokenizer` loaded from tokenizer.json.
+
+    Mirrors the subset of the transformers tokenizer call that ModelManager uses
+    (unpadded input_ids, truncated to max_length); padding happens per length
+    bucket in ModelManager._run_model.
+    """
+
+    def __init__(self, tokenizer: Any, max_length: int):
+        self._tokenizer = tokenizer
+        # tokenizer.json carries the export-time settings (pad to batch longest, truncate at 512)
+        self._tokenizer.no_padding()
+        self._tokenizer.enable_truncation(max_length=max_length)
+
+    @classmethod
+    def from_file(cls, tokenizer_file: str, max_length: int) -> 'FastTokenizer':
+        Tokenizer = _get_fast_tokenizer_lib()
+        return cls(Tokenizer.from_file(tokenizer_file), max_length)
+
+    def __call__(self, texts: List[str], **_: Any) -> Dict[str, List[List[int]]]:
+        encodings = self._tokenizer.encode_batch(texts)
+        return {"input_ids": [enc.ids for enc in encodings]}
+
+
+# Similarity kernels. Embeddings from ModelManager are L2-normalized, so cosine
+# similarity is a plain dot product; scores are clipped to [0, 1].
+
+def pairwise_similarity(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Row-wise similarity of two equally shaped embedding matrices: result[i] = a[i] . b[i]"""
+    return np.clip(np.einsum('ij,ij->i', a, b), 0.0, 1.0)
+
+
+def one_to_many_similarity(query: np.ndarray, candidates: np.ndarray) -> np.ndarray:
+    """Similarity of a single embedding against each row of candidates"""
+    return np.clip(candidates @ query, 0.0, 1.0)
+
+
+def similarity_matrix(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """All-pairs similarity: result[i, j] = a[i] . b[j]"""
+    return np.clip(a @ b.T, 0.0, 1.0)
+
+
+# Reference embeddings are persisted as little-endian float16 to halve storage
+EMBEDDING_STORAGE_DTYPE = '<f2'
+
+
+def serialize_embedding(embedding: np.ndarray) -> bytes:
+    """Pack a single embedding vector into its compact storage form."""
+    return np.asarray(embedding, dtype=EMBEDDING_STORAGE_DTYPE).tobytes()
+
+
+def deserialize_embedding(blob: bytes) -> np.ndarray:
+    """Unpack a stored embedding back into a float32 vector."""
+    return np.frombuffer(blob, dtype=EMBEDDING_STORAGE_DTYPE).astype(np.float32)
+
+
+class EmbeddingCache:
+    """
+    Byte-budgeted LRU of text embeddings, keyed by a hash of model version and
+    normalized text so a model change never serves stale vectors.
+    """
+
+    # Approximate per-entry bookkeeping cost (key digest + OrderedDict node)
+    ENTRY_OVERHEAD_BYTES = 128
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries: 'OrderedDict[bytes, np.ndarray]' = OrderedDict()
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(model_version: str, normalized_text: str) -> bytes:
+        return hashlib.sha256(f"{model_version}\x00{normalized_text}".encode('utf-8')).digest()
+
+    def get(self, key: bytes) -> Optional[np.ndarray]:
+        embedding = self._entries.get(key)
+        if embedding is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return embedding
+
+    def put(self, key: bytes, embedding: np.ndarray) -> None:
+        size = embedding.nbytes + self.ENTRY_OVERHEAD_BYTES
+        if size > self.max_bytes:
+            return
+        if key in self._entries:
+            self._entries.move_to_end(key)
+            return
+        self._entries[key] = embedding
+        self.current_bytes += size
+        while self.current_bytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self.current_bytes -= evicted.nbytes + self.ENTRY_OVERHEAD_BYTES
+            self.evictions += 1
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.current_bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'bytes': self.current_bytes,
+            'max_bytes': self.max_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
 
 class ModelManager:
     """Manages the ONNX model with caching and error handling"""
 
-    def __init__(self, model_path: Optional[str] = None):
+    # Default cache budget; ~3KB per 768-dim float32 embedding gives ~10k entries
+    DEFAULT_CACHE_MAX_BYTES = 32 * 1024 * 1024
+
+    MAX_SEQ_LENGTH = 128
+    # Padded tokens per session.run call; bounds attention cost and peak memory
+    DEFAULT_MAX_TOKENS_PER_BATCH = 4096
+    PAD_TOKEN_ID = 0  # [PAD] in the DistilBERT vocab; padded positions are masked anyway
+
+    # ONNX file per MODEL_PRECISION; int8 is produced by scripts/quantize_onnx_model.py
+    MODEL_FILES = {
+        'fp32': 'model.onnx',
+        'int8': 'model_int8.onnx',
+    }
+
+    # ONNX_GRAPH_OPTIMIZATION values -> onnxruntime.GraphOptimizationLevel members
+    GRAPH_OPTIMIZATION_LEVELS = {
+        'disable': 'ORT_DISABLE_ALL',
+        'basic': 'ORT_ENABLE_BASIC',
+        'extended': 'ORT_ENABLE_EXTENDED',
+        'all': 'ORT_ENABLE_ALL',
+    }
+    # Used when the model directory is read-only (Lambda layers, /opt in images)
+    FALLBACK_OPTIMIZED_MODEL_DIR = '/tmp/onnx-optimized'
+
+    def __init__(self, model_path: Optional[str] = None, cache_max_bytes: Optional[int] = None,
+                 max_tokens_per_batch: Optional[int] = None, precision: Optional[str] = None):
         self.model_path = model_path or os.environ.get('MODEL_PATH', './final_similarity_model_onnx')
+        self.precision = (precision or os.environ.get('MODEL_PRECISION', 'fp32')).lower()
+        if self.precision not in self.MODEL_FILES:
+            logger.warning(f"Unknown MODEL_PRECISION '{self.precision}', using fp32")
+            self.precision = 'fp32'
         self._session = None
         self._tokenizer = None
         self._model_loaded = False
+        self._model_version: Optional[str] = None
+        if cache_max_bytes is None:
+            cache_max_bytes = int(os.environ.get('EMBEDDING_CACHE_MAX_BYTES', self.DEFAULT_CACHE_MAX_BYTES))
+        self._cache = EmbeddingCache(cache_max_bytes) if cache_max_bytes > 0 else None
+        self.max_tokens_per_batch = max_tokens_per_batch or int(
+            os.environ.get('ENCODE_MAX_TOKENS_PER_BATCH', self.DEFAULT_MAX_TOKENS_PER_BATCH))
+
+        # 'extended' by default: 'all' adds layout transforms that make the serialized
+        # graph specific to the CPU it was optimized on
+        self.graph_optimization = os.environ.get('ONNX_GRAPH_OPTIMIZATION', 'extended').lower()
+        if self.graph_optimization not in self.GRAPH_OPTIMIZATION_LEVELS:
+            logger.warning(f"Unknown ONNX_GRAPH_OPTIMIZATION '{self.graph_optimization}', using extended")
+            self.graph_optimization = 'extended'
+        self.optimized_model_dir = os.environ.get(
+            'ONNX_OPTIMIZED_MODEL_DIR', os.path.join(self.model_path, 'optimized'))
+        self.intra_op_threads = int(os.environ.get('ONNX_INTRA_OP_THREADS', 0)) or _default_intra_op_threads()
+        self.inter_op_threads = int(os.environ.get('ONNX_INTER_OP_THREADS', 1))
+        self.execution_mode = os.environ.get('ONNX_EXECUTION_MODE', 'sequential').lower()
+        self._optimized_graph_loaded = False
+
+    @property
+    def model_version(self) -> str:
+        """
+        Identifier of the model weights, used to invalidate persisted embeddings.
+        Taken from MODEL_VERSION when set, otherwise fingerprinted from the model
+        config and the ONNX content hash (the build-time sidecar, see model_content_hash).
+        """
+        if self._model_version is None:
+            self._model_version = os.environ.get('MODEL_VERSION') or self._fingerprint_model()
+        return self._model_version
+
+    def _fingerprint_model(self) -> str:
+        digest = hashlib.sha256()
+        try:
+            with open(os.path.join(self.model_path, 'config.json'), 'rb') as f:
+                digest.update(f.read())
+            onnx_path = self._onnx_path()
+            digest.update(os.path.basename(onnx_path).encode())
+            digest.update(model_content_hash(onnx_path).encode())
+        except OSError:
+            return 'unknown'
+        return digest.hexdigest()[:16]
+
+    def _onnx_path(self) -> str:
+        """ONNX file for the selected precision, falling back to fp32 if it was not built."""
+        onnx_path = os.path.join(self.model_path, self.MODEL_FILES[self.precision])
+        if self.precision != 'fp32' and not os.path.exists(onnx_path):
+            logger.warning(f"{self.precision} model not found at {onnx_path}, falling back to fp32")
+            self.precision = 'fp32'
+            onnx_path = os.path.join(self.model_path, self.MODEL_FILES['fp32'])
+        return onnx_path
 
     def load_model(self) -> bool:
         if self._model_loaded:
             return True
         try:
-            onnx_path = os.path.join(self.model_path, 'model.onnx')
+            onnx_path = self._onnx_path()
             if not os.path.exists(onnx_path):
                 logger.error(f"ONNX model not found: {onnx_path}")
                 return False
 
-            ort = _get_ort()
-            opts = ort.SessionOptions()
-            opts.intra_op_num_threads = 1
-            self._session = ort.InferenceSession(onnx_path, sess_options=opts)
+            self._session = self._create_session(_get_ort(), onnx_path)
 
-            AutoTokenizer = _get_tokenizer_lib()
-            self._tokenizer = AutoTokenizer.from_pretrained(self.model_path)
+            self._tokenizer = self._load_tokenizer()
 
             self._model_loaded = True
-            logger.info("ONNX model loaded successfully")
+            logger.info(f"ONNX model loaded successfully ({self.precision})")
             return True
         except Exception as e:
             logger.error(f"Failed to load model: {e}")
             return False
 
+    def _session_options(self, ort: Any, optimization: str) -> Any:
+        opts = ort.SessionOptions()
+        opts.intra_op_num_threads = self.intra_op_threads
+        opts.inter_op_num_threads = self.inter_op_threads
+        opts.execution_mode = (ort.ExecutionMode.ORT_PARALLEL if self.execution_mode == 'parallel'
+                               else ort.ExecutionMode.ORT_SEQUENTIAL)
+        opts.graph_optimization_level = getattr(
+            ort.GraphOptimizationLevel, self.GRAPH_OPTIMIZATION_LEVELS[optimization])
+        return opts
+
+    def _optimized_model_paths(self, onnx_path: str) -> List[str]:
+        """
+        Candidate locations of the serialized optimized graph, preferred first.
+        The file name carries the optimization level and MODEL_VERSION or the
+        source model's content hash (build-time sidecar, see model_content_hash)
+        so replaced weights or a changed level never load a stale graph.
+        """
+        if self.graph_optimization == 'disable' or not self.optimized_model_dir:
+            return []
+        model_version = os.environ.get('MODEL_VERSION')
+        if model_version:
+            source_hash = re.sub(r'[^A-Za-z0-9_-]', '_', model_version)
+        else:
+            try:
+                source_hash = model_content_hash(onnx_path)[:16]
+            except OSError:
+                return []
+        stem = os.path.splitext(os.path.basename(onnx_path))[0]
+        name = f"{stem}.{self.graph_optimization}.{source_hash}.onnx"
+        dirs = [self.optimized_model_dir, self.FALLBACK_OPTIMIZED_MODEL_DIR]
+        return [os.path.join(d, name) for d in dict.fromkeys(dirs)]
+
+    def _create_session(self, ort: Any, onnx_path: str) -> Any:
+        """
+        Create the inference session, reusing a previously optimized graph when
+        one exists and otherwise optimizing once and serializing the result.
+        """
+        candidates = self._optimized_model_paths(onnx_path)
+        for optimized_path in candidates:
+            if not os.path.isfile(optimized_path):
+                continue
+            try:
+                # Already optimized - skip graph optimization entirely
+                session = ort.InferenceSession(optimized_path, sess_options=self._session_options(ort, 'disable'))
+                self._optimized_graph_loaded = True
+                return session
+            except Exception as e:
+                logger.warning(f"Ignoring unreadable optimized graph {optimized_path}: {e}")
+
+        opts = self._session_options(ort, self.graph_optimization)
+        for optimized_path in candidates:
+            try:
+                os.makedirs(os.path.dirname(optimized_path), exist_ok=True)
+            except OSError:
+                continue
+            if os.access(os.path.dirname(optimized_path), os.W_OK):
+                opts.optimized_model_filepath = optimized_path
+                break
+        self._optimized_graph_loaded = False
+        return ort.InferenceSession(onnx_path, sess_options=opts)
+
+    def _load_tokenizer(self) -> Any:
+        """Load tokenizer.json with the `tokenizers` runtime, falling back to transformers."""
+        tokenizer_file = os.path.join(self.model_path, 'tokenizer.json')
+        if os.path.exists(tokenizer_file):
+            try:
+                return FastTokenizer.from_file(tokenizer_file, self.MAX_SEQ_LENGTH)
+            except Exception as e:
+                logger.warning(f"Fast tokenizer unavailable, falling back to transformers: {e}")
+
+        AutoTokenizer = _get_tokenizer_lib()
+        return AutoTokenizer.from_pretrained(self.model_path)
+
     def _mean_pool(self, token_embeddings: np.ndarray, attention_mask: np.ndarray) -> np.ndarray:
         """Mean pooling over token embeddings, respecting attention mask."""
         mask = attention_mask[:, :, np.newaxis].astype(np.float32)
@@ -78,26 +410,97 @@ class ModelManager:
             return None
         try:
             cleaned = [' '.join(t.strip().split()) for t in texts]
-            enc = self._tokenizer(cleaned, padding=True, truncation=True,
-                                  max_length=128, return_tensors="np")
-            outputs = self._session.run(None, {
-                "input_ids": enc["input_ids"].astype(np.int64),
-                "attention_mask": enc["attention_mask"].astype(np.int64),
-            })
-            embeddings = self._mean_pool(outputs[0], enc["attention_mask"])
-            # L2 normalize
-            norms = np.linalg.norm(embeddings, axis=1, keepdims=True).clip(min=1e-9)
-            return embeddings / norms
+            # Batch grading repeats the same definition (and common answers) many
+            # times; encode each distinct text once and scatter rows back by index
+            positions: Dict[str, int] = {}
+            inverse = [positions.setdefault(t, len(positions)) for t in cleaned]
+            embeddings = self._encode_unique(list(positions))
+            if len(positions) == len(cleaned):
+                return embeddings
+            return embeddings[inverse]
         except Exception as e:
             logger.error(f"Failed to encode: {e}")
             return None
 
+    def _encode_unique(self, texts: List[str]) -> np.ndarray:
+        """Encode distinct normalized texts, serving what it can from the embedding cache."""
+        if self._cache is None:
+            return self._run_model(texts)
+
+        keys = [EmbeddingCache.make_key(self.model_version, t) for t in texts]
+        cached = [self._cache.get(k) for k in keys]
+        missing = [i for i, emb in enumerate(cached) if emb is None]
+        if missing:
+            encoded = self._run_model([texts[i] for i in missing])
+            for row, i in enumerate(missing):
+                # Copy so a cached row does not pin the whole batch array
+                cached[i] = encoded[row].copy()
+                self._cache.put(keys[i], cached[i])
+        return np.stack(cached)
+
+    def _run_model(self, cleaned: List[str]) -> np.ndarray:
+        """
+        Tokenize and run the ONNX session, returning L2-normalized embeddings.
+
+        Texts are sorted by token length and grouped into buckets that are each
+        padded only to their own longest member, so short answers never pay for
+        a long definition's sequence length. Output rows follow input order.
+        """
+        enc = self._tokenizer(cleaned, padding=False, truncation=True, max_length=self.MAX_SEQ_LENGTH)
+        token_ids = enc["input_ids"]
+        lengths = [max(len(ids), 1) for ids in token_ids]
+        order = sorted(range(len(cleaned)), key=lengths.__getitem__)
+
+        embeddings = None
+        for bucket in self._length_buckets(order, lengths):
+            seq_len = lengths[bucket[-1]]  # bucket is sorted, last member is longest
+            input_ids = np.full((len(bucket), seq_len), self.PAD_TOKEN_ID, dtype=np.int64)
+            attention_mask = np.zeros((len(bucket), seq_len), dtype=np.int64)
+            for row, i in enumerate(bucket):
+                input_ids[row, :len(token_ids[i])] = token_ids[i]
+                attention_mask[row, :lengths[i]] = 1
+
+            outputs = self._session.run(None, {
+                "input_ids": input_ids,
+                "attention_mask": attention_mask,
+            })
+            pooled = self._mean_pool(outputs[0], attention_mask)
+            if embeddings is None:
+                embeddings = np.empty((len(cleaned), pooled.shape[1]), dtype=np.float32)
+            embeddings[bucket] = pooled
+
+        # L2 normalize
+        norms = np.linalg.norm(embeddings, axis=1, keepdims=True).clip(min=1e-9)
+        return embeddings / norms
+
+    def _length_buckets(self, order: List[int], lengths: List[int]) -> List[List[int]]:
+        """Split length-sorted indices into buckets within the padded-token budget."""
+        buckets: List[List[int]] = []
+        current: List[int] = []
+        for i in order:
+            if current and (len(current) + 1) * lengths[i] > self.max_tokens_per_batch:
+                buckets.append(current)
+                current = []
+            current.append(i)
+        if current:
+            buckets.append(current)
+        return buckets
+
     def calculate_similarity(self, text1: str, text2: str) -> Optional[float]:
         embeddings = self.encode_batch([text1, text2])
         if embeddings is None:
             return None
-        sim = cosine_similarity(embeddings[0:1], embeddings[1:2])[0][0]
-        return float(max(0.0, min(1.0, sim)))
+        return float(pairwise_similarity(embeddings[0:1], embeddings[1:2])[0])
+
+    def calculate_similarity_to_reference(self, text: str, reference_embedding: np.ndarray) -> Optional[float]:
+        """Score text against a precomputed reference embedding, encoding only the text."""
+        embeddings = self.encode_batch([text])
+        if embeddings is None:
+            return None
+        # Stored references are float16, so renormalize before the dot product
+        reference = np.asarray(reference_embedding, dtype=np.float32)
+        reference = reference / max(float(np.linalg.norm(reference)), 1e-9)
+        return float(one_to_many_similarity(reference, embeddings)[0])
 
     def calculate_batch_similarity(self, student_answers: List[str], correct_answers: List[str]) -> List[Optional[float]]:
         if len(student_answers) != len(correct_answers):
@@ -107,11 +510,7 @@ class ModelManager:
         if embeddings is None:
             return [None] * len(student_answers)
         n = len(student_answers)
-        results = []
-        for i in range(n):
-            sim = cosine_similarity(embeddings[i:i+1], embeddings[n+i:n+i+1])[0][0]
-            results.append(float(max(0.0, min(1.0, sim))))
-        return results
+        return pairwise_similarity(embeddings[:n], embeddings[n:]).tolist()
 
     def health_check(self) -> bool:
         try:
@@ -125,7 +524,17 @@ class ModelManager:
         return {
             'loaded': self._model_loaded,
             'model_path': self.model_path,
+            'model_version': self.model_version,
+            'precision': self.precision,
             'backend': 'onnxruntime',
+            'session': {
+                'graph_optimization': self.graph_optimization,
+                'optimized_graph_loaded': self._optimized_graph_loaded,
+                'intra_op_threads': self.intra_op_threads,
+                'inter_op_threads': self.inter_op_threads,
+                'execution_mode': self.execution_mode,
+            },
+            'embedding_cache': self._cache.stats() if self._cache else None,
         }
 
 
@@ -0,0 +1,44 @@
+"""
+Seeded Question Order
+A quiz session's order is a snapshot version of the domain's term list plus an
+affine permutation position(i) = (stride * i + offset) mod total derived from a
+seed, so sessions store a few integers instead of every term ID. Must match the
+quiz_session_term() SQL function (migration 011).
+"""
+import math
+import random
+import hashlib
+from typing import Any, Dict, List, Optional
+
+
+def snapshot_version(term_ids: List[str]) -> str:
+    """Stable version of an ordered term list; changes when terms are added, removed or reordered"""
+    digest = hashlib.sha256()
+    for term_id in term_ids:
+        digest.update(str(term_id).encode('utf-8'))
+        digest.update(b'\x00')
+    return digest.hexdigest()[:32]
+
+
+def new_order(total: int, shuffle: bool = False, seed: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Permutation parameters for a session over total terms
+
+    Returns:
+        {'seed', 'stride', 'offset'}; stride is coprime to total so every term
+        is asked exactly once. Without shuffle the order is the snapshot order.
+    """
+    if not shuffle or total <= 1:
+        return {'seed': None, 'stride': 1, 'offset': 0}
+    if seed is None:
+        seed = random.SystemRandom().randrange(2 ** 31)
+    rng = random.Random(seed)
+    stride = rng.randrange(1, total)
+    while math.gcd(stride, total) != 1:
+        stride = stride % (total - 1) + 1
+    return {'seed': seed, 'stride': stride, 'offset': rng.randrange(total)}
+
+
+def term_position(order: Dict[str, Any], index: int, total: int) -> int:
+    """Snapshot position of the index-th question"""
+    return (int(order['stride']) * index + int(order['offset'])) % total
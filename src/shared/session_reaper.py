@@ -0,0 +1,128 @@
+"""
+Stale Session Reaper
+Marks active/paused quiz sessions with no activity for a while as abandoned,
+in bounded keyset batches over idx_quiz_sessions_live_activity. Each batch is
+its own short transaction with a lock timeout and skips rows that a live
+request holds, so reaping never queues behind (or stalls) quiz traffic.
+Afterwards it prunes term snapshots that no live session uses any more.
+"""
+import os
+import time
+import logging
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_STALE_AFTER_HOURS = 24 * 7
+DEFAULT_BATCH_SIZE = 500
+DEFAULT_LOCK_TIMEOUT_MS = 2000
+DEFAULT_TIME_BUDGET_SECONDS = 20.0
+DEFAULT_SNAPSHOT_IDLE_HOURS = 1.0
+
+# Oldest-first keyset batch; rows already abandoned leave the partial index,
+# and the (last_activity_at, id) cursor moves past rows skipped as locked.
+# The threshold is scaled from a float (double precision) parameter because
+# make_interval(hours => ...) only accepts an integer.
+REAP_BATCH_QUERY = """
+    WITH stale AS (
+        SELECT id FROM quiz_sessions
+        WHERE status IN ('active', 'paused')
+          AND last_activity_at < NOW() - %s * INTERVAL '1 hour'
+          AND (last_activity_at, id) > (%s::timestamptz, %s::uuid)
+        ORDER BY last_activity_at, id
+        LIMIT %s
+        FOR UPDATE SKIP LOCKED
+    ),
+    reaped AS (
+        UPDATE quiz_sessions qs
+        SET status = 'abandoned'
+        FROM stale
+        WHERE qs.id = stale.id
+        RETURNING qs.last_activity_at, qs.id
+    )
+    SELECT COUNT(*), MAX(last_activity_at),
+           (ARRAY_AGG(id ORDER BY last_activity_at DESC, id DESC))[1]
+    FROM reaped
+"""
+
+# Snapshot versions no active/paused session points at and that no session has
+# been started from recently; their term rows cascade. A start that touched the
+# version row first holds its lock, and the delete re-checks last_used_at.
+PRUNE_SNAPSHOTS_QUERY = """
+    WITH pruned AS (
+        DELETE FROM quiz_term_snapshot_versions v
+        WHERE v.last_used_at < NOW() - %s * INTERVAL '1 hour'
+          AND NOT EXISTS (
+              SELECT 1 FROM quiz_sessions qs
+              WHERE qs.domain_id = v.domain_id
+                AND qs.status IN ('active', 'paused')
+                AND qs.session_data->>'snapshot' = v.version
+          )
+        RETURNING 1
+    )
+    SELECT COUNT(*) FROM pruned
+"""
+
+_KEYSET_START = ('-infinity', '00000000-0000-0000-0000-000000000000')
+
+
+def _default_cursor_factory():
+    from database import get_db_cursor
+    return get_db_cursor()
+
+
+def reap_stale_sessions(stale_after_hours: Optional[float] = None, batch_size: Optional[int] = None,
+                        lock_timeout_ms: Optional[int] = None, time_budget_seconds: Optional[float] = None,
+                        cursor_factory: Callable[[], Any] = _default_cursor_factory) -> Dict[str, Any]:
+    """
+    Abandon stale sessions until a batch comes back short or the time budget runs out
+
+    Returns:
+        {'reaped', 'batches', 'complete', 'elapsed_ms'}; complete is False when
+        the budget ran out first (the next run continues from the oldest rows)
+    """
+    stale_after_hours = stale_after_hours or float(
+        os.environ.get('STALE_SESSION_HOURS', DEFAULT_STALE_AFTER_HOURS))
+    batch_size = batch_size or int(os.environ.get('REAPER_BATCH_SIZE', DEFAULT_BATCH_SIZE))
+    lock_timeout_ms = lock_timeout_ms or DEFAULT_LOCK_TIMEOUT_MS
+    time_budget_seconds = time_budget_seconds or DEFAULT_TIME_BUDGET_SECONDS
+
+    started = time.monotonic()
+    after_ts, after_id = _KEYSET_START
+    reaped = batches = 0
+    complete = False
+
+    while time.monotonic() - started < time_budget_seconds:
+        with cursor_factory() as cursor:
+            cursor.execute("SELECT set_config('lock_timeout', %s, true)", (f"{int(lock_timeout_ms)}ms",))
+            cursor.execute(REAP_BATCH_QUERY, (stale_after_hours, after_ts, after_id, batch_size))
+            count, last_ts, last_id = cursor.fetchone()
+        batches += 1
+        reaped += count
+        if count < batch_size:
+            complete = True
+            break
+        after_ts, after_id = last_ts, last_id
+
+    elapsed_ms = round((time.monotonic() - started) * 1000, 1)
+    logger.info(f"Reaped {reaped} stale quiz sessions in {batches} batches ({elapsed_ms}ms)")
+    return {'reaped': reaped, 'batches': batches, 'complete': complete, 'elapsed_ms': elapsed_ms}
+
+
+def prune_term_snapshots(idle_hours: Optional[float] = None, lock_timeout_ms: Optional[int] = None,
+                         cursor_factory: Callable[[], Any] = _default_cursor_factory) -> int:
+    """
+    Delete quiz term snapshots left behind by completed and reaped sessions
+
+    Returns:
+        Number of snapshot versions deleted
+    """
+    idle_hours = idle_hours or float(os.environ.get('SNAPSHOT_IDLE_HOURS', DEFAULT_SNAPSHOT_IDLE_HOURS))
+    lock_timeout_ms = lock_timeout_ms or DEFAULT_LOCK_TIMEOUT_MS
+
+    with cursor_factory() as cursor:
+        cursor.execute("SELECT set_config('lock_timeout', %s, true)", (f"{int(lock_timeout_ms)}ms",))
+        cursor.execute(PRUNE_SNAPSHOTS_QUERY, (idle_hours,))
+        pruned = cursor.fetchone()[0]
+    logger.info(f"Pruned {pruned} unused quiz term snapshots")
+    return pruned
@@ -0,0 +1,239 @@
+"""
+Shared Similarity Cache
+Cross-container cache of model similarity scores keyed by a hash of the
+normalized (answer, reference) pair and the model version, so recurring pairs
+across students and retakes skip ONNX entirely.
+"""
+import os
+import time
+import hashlib
+import logging
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def make_cache_key(model_version: str, answer: str, reference: str) -> str:
+    """Hash of model version and whitespace-normalized texts (same normalization as ModelManager)"""
+    digest = hashlib.sha256()
+    for part in (model_version, ' '.join(answer.split()), ' '.join(reference.split())):
+        digest.update(part.encode('utf-8'))
+        digest.update(b'\x00')
+    return digest.hexdigest()
+
+
+class SimilarityCacheBackend(ABC):
+    """Key-value storage for cached scores"""
+
+    @abstractmethod
+    def get_many(self, keys: List[str]) -> Dict[str, float]:
+        """Unexpired score per key; missing keys are left out"""
+
+    @abstractmethod
+    def put_many(self, entries: Dict[str, float], model_version: str, ttl_seconds: int) -> None:
+        """Upsert scores for the given model version"""
+
+    @abstractmethod
+    def purge(self, model_version: Optional[str]) -> int:
+        """Drop expired entries and, when model_version is given, entries from other model versions"""
+
+
+class InMemorySimilarityBackend(SimilarityCacheBackend):
+    """Process-local backend for tests and local development"""
+
+    def __init__(self):
+        self._entries: Dict[str, tuple] = {}
+
+    def get_many(self, keys: List[str]) -> Dict[str, float]:
+        now = time.time()
+        found = {}
+        for key in keys:
+            entry = self._entries.get(key)
+            if entry and entry[2] > now:
+                found[key] = entry[0]
+        return found
+
+    def put_many(self, entries: Dict[str, float], model_version: str, ttl_seconds: int) -> None:
+        expires_at = time.time() + ttl_seconds
+        for key, similarity in entries.items():
+            self._entries[key] = (similarity, model_version, expires_at)
+
+    def purge(self, model_version: Optional[str]) -> int:
+        now = time.time()
+        stale = [k for k, (_, version, expires_at) in self._entries.items()
+                 if (model_version is not None and version != model_version) or expires_at <= now]
+        for key in stale:
+            del self._entries[key]
+        return len(stale)
+
+
+class PostgresSimilarityBackend(SimilarityCacheBackend):
+    """similarity_cache table (migration 008) accessed through DBProxyClient"""
+
+    def __init__(self, db_proxy: Any):
+        self.db_proxy = db_proxy
+
+    def get_many(self, keys: List[str]) -> Dict[str, float]:
+        rows = self.db_proxy.execute_query(
+            """
+            SELECT cache_key, similarity FROM similarity_cache
+            WHERE cache_key = ANY(%s) AND expires_at > NOW()
+            """,
+            params=[keys]
+        )
+        return {row[0]: float(row[1]) for row in rows or []}
+
+    def put_many(self, entries: Dict[str, float], model_version: str, ttl_seconds: int) -> None:
+        keys = list(entries)
+        self.db_proxy.execute_query(
+            """
+            INSERT INTO similarity_cache (cache_key, similarity, model_version, expires_at)
+            SELECT k, s, %s, NOW() + make_interval(secs => %s)
+            FROM unnest(%s::text[], %s::real[]) AS v(k, s)
+            ON CONFLICT (cache_key) DO UPDATE
+            SET similarity = EXCLUDED.similarity, expires_at = EXCLUDED.expires_at
+            """,
+            params=[model_version, ttl_seconds, keys, [entries[k] for k in keys]]
+        )
+
+    def purge(self, model_version: Optional[str]) -> int:
+        # execute_query only fetches for SELECT statements; execute_query_one always fetches
+        row = self.db_proxy.execute_query_one(
+            """
+            WITH deleted AS (
+                DELETE FROM similarity_cache
+                WHERE expires_at <= NOW() OR model_version <> %s
+                RETURNING 1
+            )
+            SELECT COUNT(*) FROM deleted
+            """,
+            # NULL never matches <>, so without a version only expired rows go
+            params=[model_version]
+        )
+        return int(row[0]) if row else 0
+
+
+class SimilarityCache:
+    """
+    Read-through cache in front of the model tier
+
+    Lookups are synchronous; write-backs run on a single background thread so
+    they overlap the rest of the request, and the handler calls flush() before
+    returning because Lambda freezes the sandbox (and any pending write) once
+    the response is sent. Failures in either direction are
+    logged and treated as misses - the cache is an optimization only - and a
+    failed lookup bypasses the backend for FAILURE_COOLDOWN_SECONDS so an
+    unreachable database does not add a connect timeout to every evaluation.
+    """
+
+    DEFAULT_TTL_SECONDS = 30 * 24 * 3600
+    FAILURE_COOLDOWN_SECONDS = 60
+    DEFAULT_FLUSH_TIMEOUT_SECONDS = 0.5
+
+    def __init__(self, backend: SimilarityCacheBackend, model_version: Callable[[], str],
+                 ttl_seconds: Optional[int] = None):
+        self.backend = backend
+        self._model_version = model_version
+        self.ttl_seconds = ttl_seconds or int(
+            os.environ.get('SIMILARITY_CACHE_TTL_SECONDS', self.DEFAULT_TTL_SECONDS))
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix='similarity-cache')
+        self._pending = []
+        self._bypass_until = 0.0
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def model_version(self) -> str:
+        return self._model_version()
+
+    def get(self, answer: str, reference: str) -> Optional[float]:
+        return self.get_many([(answer, reference)])[0]
+
+    def get_many(self, pairs: List[tuple]) -> List[Optional[float]]:
+        """Cached similarity per (answer, reference) pair, None on a miss"""
+        found: Dict[str, float] = {}
+        keys: List[Optional[str]] = [None] * len(pairs)
+        if time.time() >= self._bypass_until:
+            try:
+                model_version = self.model_version
+                keys = [make_cache_key(model_version, a, r) for a, r in pairs]
+                found = self.backend.get_many(list(dict.fromkeys(keys)))
+            except Exception as e:
+                logger.warning(f"Similarity cache lookup failed, bypassing for "
+                               f"{self.FAILURE_COOLDOWN_SECONDS}s: {e}")
+                self._bypass_until = time.time() + self.FAILURE_COOLDOWN_SECONDS
+
+        results = [found.get(k) for k in keys]
+        hits = sum(1 for r in results if r is not None)
+        self.hits += hits
+        self.misses += len(results) - hits
+        return results
+
+    def put(self, answer: str, reference: str, similarity: float) -> None:
+        self.put_many([(answer, reference, similarity)])
+
+    def put_many(self, scored: List[tuple]) -> None:
+        """Queue (answer, reference, similarity) write-backs"""
+        if not scored or time.time() < self._bypass_until:
+            return
+        model_version = self.model_version
+        entries = {make_cache_key(model_version, a, r): float(s) for a, r, s in scored}
+        self._pending = [f for f in self._pending if not f.done()]
+        self._pending.append(self._writer.submit(self._write, entries, model_version))
+
+    def _write(self, entries: Dict[str, float], model_version: str) -> None:
+        try:
+            self.backend.put_many(entries, model_version, self.ttl_seconds)
+        except Exception as e:
+            logger.warning(f"Similarity cache write-back failed: {e}")
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait up to timeout seconds (None waits indefinitely) for queued write-backs
+
+        Returns:
+            True if every write-back finished; unfinished ones are dropped from
+            tracking and logged, since the score is recomputed on a later miss
+        """
+        done, not_done = wait(self._pending, timeout=timeout)
+        self._pending = []
+        if not_done:
+            logger.warning(f"{len(not_done)} similarity cache write-backs still pending after {timeout}s")
+        return not not_done
+
+    def purge(self) -> int:
+        return self.backend.purge(self.model_version)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+            'ttl_seconds': self.ttl_seconds,
+        }
+
+
+def purge_expired(db_proxy: Any) -> int:
+    """
+    Delete expired rows from the shared table (scheduled from the quiz engine).
+    Rows of a replaced model version are never refreshed, so they expire too.
+    """
+    purged = PostgresSimilarityBackend(db_proxy).purge(None)
+    logger.info(f"Purged {purged} expired similarity cache entries")
+    return purged
+
+
+def create_similarity_cache(db_proxy: Any, model_version: Callable[[], str]) -> Optional[SimilarityCache]:
+    """
+    Build the cache selected by SIMILARITY_CACHE_BACKEND: postgres (default),
+    memory, or none to disable it
+    """
+    backend_name = os.environ.get('SIMILARITY_CACHE_BACKEND', 'postgres').lower()
+    if backend_name == 'postgres' and db_proxy is not None:
+        return SimilarityCache(PostgresSimilarityBackend(db_proxy), model_version)
+    if backend_name == 'memory':
+        return SimilarityCache(InMemorySimilarityBackend(), model_version)
+    return None
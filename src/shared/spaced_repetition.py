@@ -0,0 +1,61 @@
+"""
+Spaced Repetition Scheduling
+SM-2 style per-user, per-term schedule (ease, interval, due_at) kept in the
+term_schedules table and advanced incrementally on every graded answer, so
+adaptive quizzes pick terms from an indexed due queue instead of replaying
+progress_records history.
+"""
+from typing import Any, Dict, Optional
+
+DEFAULT_EASE = 2.5
+MIN_EASE = 1.3
+
+# Missed terms come back within the same study sitting rather than tomorrow
+RELEARN_INTERVAL_DAYS = 10 / (24 * 60)
+FIRST_INTERVAL_DAYS = 1.0
+SECOND_INTERVAL_DAYS = 6.0
+
+SECONDS_PER_DAY = 24 * 3600
+
+
+def answer_quality(similarity_score: float, threshold: float) -> int:
+    """
+    SM-2 response quality (0-5) from an evaluation score
+
+    Incorrect answers grade 0-1 (1 when "close"), correct answers 3-5 by how
+    close they are to the reference.
+    """
+    if similarity_score < threshold:
+        return 1 if similarity_score >= 0.5 else 0
+    if similarity_score >= 0.95:
+        return 5
+    if similarity_score >= 0.85:
+        return 4
+    return 3
+
+
+def review(quality: int, ease: Optional[float] = None, interval_days: Optional[float] = None,
+           repetitions: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Next schedule state after one graded review (None fields mean a new term)
+
+    Returns:
+        {'ease', 'interval_days', 'repetitions', 'lapsed'}
+    """
+    ease = DEFAULT_EASE if ease is None else float(ease)
+    interval_days = 0.0 if interval_days is None else float(interval_days)
+    repetitions = 0 if repetitions is None else int(repetitions)
+
+    miss = 5 - quality
+    ease = max(MIN_EASE, ease + 0.1 - miss * (0.08 + miss * 0.02))
+
+    if quality < 3:
+        return {'ease': ease, 'interval_days': RELEARN_INTERVAL_DAYS, 'repetitions': 0, 'lapsed': True}
+
+    if repetitions == 0:
+        interval_days = FIRST_INTERVAL_DAYS
+    elif repetitions == 1:
+        interval_days = SECOND_INTERVAL_DAYS
+    else:
+        interval_days = max(interval_days, FIRST_INTERVAL_DAYS) * ease
+    return {'ease': ease, 'interval_days': interval_days, 'repetitions': repetitions + 1, 'lapsed': False}
@@ -4,6 +4,7 @@ Unit tests use mocking, integration tests use LocalStack
 """
 import os
 import sys
+import tempfile
 import pytest
 from pathlib import Path
 from unittest.mock import MagicMock, patch
@@ -13,6 +14,10 @@ os.environ.setdefault('USER_POOL_ID', 'us-east-1_test123456')
 os.environ.setdefault('USER_POOL_CLIENT_ID', 'test-client-id-123456')
 os.environ.setdefault('AWS_REGION', 'us-east-1')
 os.environ.setdefault('ENVIRONMENT', 'test')
+# Unit tests use the in-memory similarity cache instead of the Postgres table
+os.environ.setdefault('SIMILARITY_CACHE_BACKEND', 'memory')
+# Optimized ONNX graphs go to a temp dir, never next to the model in the source tree
+os.environ.setdefault('ONNX_OPTIMIZED_MODEL_DIR', tempfile.mkdtemp(prefix='onnx-optimized-'))
 
 # Add src directories to Python path for imports
 project_root = Path(__file__).parent.parent
@@ -0,0 +1,103 @@
+"""
+Unit tests for the answer evaluator business-logic Lambda
+Tests that batch evaluation sends whole chunks to the inference Lambda
+"""
+import pytest
+import importlib.util
+import io
+import json
+import sys
+import os
+from unittest.mock import patch, MagicMock
+
+HANDLER_DIR = os.path.join(os.path.dirname(__file__), '..', 'src', 'lambda_functions', 'answer_evaluator')
+
+
+def load_handler():
+    """Import the handler with its own config module (src/shared also has a config.py)"""
+    config_spec = importlib.util.spec_from_file_location('config', os.path.join(HANDLER_DIR, 'config.py'))
+    config = importlib.util.module_from_spec(config_spec)
+    config_spec.loader.exec_module(config)
+
+    handler_spec = importlib.util.spec_from_file_location('answer_evaluator_handler',
+                                                          os.path.join(HANDLER_DIR, 'handler.py'))
+    handler = importlib.util.module_from_spec(handler_spec)
+    with patch.dict(sys.modules, {'config': config}), patch('boto3.client'):
+        handler_spec.loader.exec_module(handler)
+    return handler
+
+
+handler = load_handler()
+
+
+def inference_response(payload):
+    return {'Payload': io.BytesIO(json.dumps(payload).encode())}
+
+
+def fake_inference(**kwargs):
+    """Inference stub: similarity is 0.9 when the texts match, otherwise 0.2"""
+    pairs = json.loads(kwargs['Payload'])['pairs']
+    return inference_response({
+        'statusCode': 200,
+        'similarities': [0.9 if p['answer'] == p['correct_answer'] else 0.2 for p in pairs]
+    })
+
+
+@pytest.mark.unit
+class TestBatchEvaluation:
+    """Test single-invocation batch inference"""
+
+    def test_batch_uses_one_invocation(self):
+        """Test a 100-pair batch makes one inference call"""
+        pairs = [{'answer': 'a' if i % 2 else 'b', 'correct_answer': 'a'} for i in range(100)]
+
+        with patch.object(handler, 'lambda_client') as mock_client:
+            mock_client.invoke.side_effect = fake_inference
+            response = handler.handle_batch_evaluation({'answer_pairs': pairs})
+
+        assert mock_client.invoke.call_count == 1
+        results = json.loads(response['body'])['results']
+        assert len(results) == 100
+        assert results[1]['similarity'] == 0.9
+        assert results[0]['similarity'] == 0.2
+        assert not any(r['error'] for r in results)
+
+    def test_invalid_pairs_keep_their_position(self):
+        """Test malformed pairs are reported in place and not sent to inference"""
+        pairs = [{'answer': 'a', 'correct_answer': 'a'}, {'answer': 'only'}, {'answer': 'b', 'correct_answer': 'a'}]
+
+        with patch.object(handler, 'lambda_client') as mock_client:
+            mock_client.invoke.side_effect = fake_inference
+            response = handler.handle_batch_evaluation({'answer_pairs': pairs})
+
+        sent = json.loads(mock_client.invoke.call_args[1]['Payload'])['pairs']
+        assert len(sent) == 2
+        results = json.loads(response['body'])['results']
+        assert results[1] == {'error': True, 'message': 'Invalid pair format at index 1'}
+        assert results[2]['similarity'] == 0.2
+
+    def test_chunks_respect_pair_and_payload_limits(self):
+        """Test chunking by pair count and by serialized size"""
+        items = [(i, {'answer': 'x' * 50, 'correct_answer': 'y'}) for i in range(10)]
+
+        with patch.object(handler, 'INFERENCE_MAX_BATCH_PAIRS', 4):
+            assert [len(c) for c in handler.chunk_pairs(items)] == [4, 4, 2]
+
+        pair_bytes = len(json.dumps(items[0][1])) + 2
+        with patch.object(handler, 'INFERENCE_MAX_PAYLOAD_BYTES', pair_bytes * 3):
+            assert [len(c) for c in handler.chunk_pairs(items)] == [3, 3, 3, 1]
+
+    def test_failed_chunk_marks_only_its_pairs(self):
+        """Test an inference failure errors that chunk's pairs and keeps the others"""
+        pairs = [{'answer': 'a', 'correct_answer': 'a'} for _ in range(4)]
+        responses = [inference_response({'statusCode': 500, 'error': 'boom'}),
+                     inference_response({'statusCode': 200, 'similarities': [0.9, 0.9]})]
+
+        with patch.object(handler, 'lambda_client') as mock_client, \
+                patch.object(handler, 'INFERENCE_MAX_BATCH_PAIRS', 2):
+            mock_client.invoke.side_effect = responses
+            response = handler.handle_batch_evaluation({'answer_pairs': pairs})
+
+        results = json.loads(response['body'])['results']
+        assert [r['error'] for r in results] == [True, True, False, False]
+        assert 'boom' in results[0]['message']
@@ -0,0 +1,41 @@
+"""
+Unit tests for the container answer evaluator (lambda/answer-evaluator)
+Tests its copy of the evaluation cascade's lexical tier
+"""
+import pytest
+import importlib.util
+import os
+
+pytest.importorskip('onnxruntime')
+pytest.importorskip('tokenizers')
+
+HANDLER_PATH = os.path.join(os.path.dirname(__file__), '..', 'lambda', 'answer-evaluator', 'lambda_function.py')
+
+
+def load_handler():
+    spec = importlib.util.spec_from_file_location('answer_evaluator_container', HANDLER_PATH)
+    handler = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(handler)
+    return handler
+
+
+handler = load_handler()
+
+
+@pytest.mark.unit
+class TestLexicalTier:
+    """Test the lexical accept band matches src/shared/evaluation_cascade.py"""
+
+    def test_near_copy_accepted(self):
+        """Test an answer with the same content words in the same order is accepted"""
+        answer = "Converts the integer to a string"
+        assert handler._lexical_tier(answer, "Converts an integer to a string") == pytest.approx(1.0)
+
+    @pytest.mark.parametrize('answer, definition', [
+        ("Converts an integer to a string", "Converts a string to an integer"),
+        ("Copies data from the cache into the database", "Copies data from the database into the cache"),
+        ("Moves messages from the queue to the worker", "Moves messages to the queue from the worker"),
+    ])
+    def test_reversed_arguments_deferred(self, answer, definition):
+        """Test swapped arguments or direction go to the model instead of scoring 1.0"""
+        assert handler._lexical_tier(answer, definition) is None
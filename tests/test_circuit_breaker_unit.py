@@ -0,0 +1,64 @@
+"""
+Unit tests for circuit_breaker module
+Tests state transitions and fail-fast behaviour
+"""
+import pytest
+from unittest.mock import patch, MagicMock
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from shared.circuit_breaker import CircuitBreaker, CircuitOpenError
+
+
+def failing():
+    raise TimeoutError("deadline exceeded")
+
+
+@pytest.mark.unit
+class TestCircuitBreaker:
+    """Test closed/open/half-open transitions"""
+
+    def test_opens_after_threshold(self):
+        """Test consecutive failures open the circuit and later calls fail fast"""
+        breaker = CircuitBreaker('test', failure_threshold=2, reset_timeout=30)
+        func = MagicMock(side_effect=failing)
+
+        for _ in range(2):
+            with pytest.raises(TimeoutError):
+                breaker.call(func)
+        with pytest.raises(CircuitOpenError):
+            breaker.call(func)
+
+        assert func.call_count == 2
+        assert breaker.state == CircuitBreaker.OPEN
+
+    def test_success_resets_failure_count(self):
+        """Test failures must be consecutive to open the circuit"""
+        breaker = CircuitBreaker('test', failure_threshold=2)
+        with pytest.raises(TimeoutError):
+            breaker.call(failing)
+        assert breaker.call(lambda: 'ok') == 'ok'
+        with pytest.raises(TimeoutError):
+            breaker.call(failing)
+
+        assert breaker.state == CircuitBreaker.CLOSED
+
+    def test_half_open_trial(self):
+        """Test one trial call after the reset timeout closes or re-opens the circuit"""
+        breaker = CircuitBreaker('test', failure_threshold=1, reset_timeout=10)
+        with patch('shared.circuit_breaker.time.monotonic', return_value=100.0):
+            with pytest.raises(TimeoutError):
+                breaker.call(failing)
+
+        with patch('shared.circuit_breaker.time.monotonic', return_value=111.0):
+            assert breaker.state == CircuitBreaker.HALF_OPEN
+            assert breaker.allow_request() is True
+            # Only one trial at a time
+            assert breaker.allow_request() is False
+            breaker.record_failure()
+            assert breaker.state == CircuitBreaker.OPEN
+
+        with patch('shared.circuit_breaker.time.monotonic', return_value=122.0):
+            assert breaker.call(lambda: 'ok') == 'ok'
+            assert breaker.state == CircuitBreaker.CLOSED
@@ -0,0 +1,141 @@
+"""
+Unit tests for DBProxyClient and shared database helpers
+Tests row-factory result mapping and prepared named queries
+"""
+import pytest
+import sys
+import os
+from contextlib import contextmanager
+from unittest.mock import patch, MagicMock
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+
+from psycopg.rows import tuple_row, dict_row, namedtuple_row
+
+from shared import database
+from shared.db_proxy_client import DBProxyClient
+
+
+class TermRow:
+    __slots__ = ('id', 'term')
+
+    def __init__(self, id, term):
+        self.id = id
+        self.term = term
+
+
+def fake_connection(cursor):
+    connection = MagicMock()
+    connection.cursor.return_value = cursor
+
+    @contextmanager
+    def get_connection():
+        yield connection
+
+    return connection, get_connection
+
+
+@pytest.mark.unit
+class TestRowFactories:
+    """Test row factory resolution"""
+
+    def test_named_factories(self):
+        """Test names map to psycopg row factories"""
+        assert database.resolve_row_factory(None) is tuple_row
+        assert database.resolve_row_factory('dict') is dict_row
+        assert database.resolve_row_factory('namedtuple') is namedtuple_row
+
+    def test_unknown_name_rejected(self):
+        """Test an unknown row factory name raises"""
+        with pytest.raises(ValueError):
+            database.resolve_row_factory('json')
+
+    def test_class_uses_class_rows(self):
+        """Test a slotted class is built by psycopg's class_row"""
+        with patch.object(database, 'class_row', return_value='term-row-factory') as class_row:
+            assert database.resolve_row_factory(TermRow) == 'term-row-factory'
+        class_row.assert_called_once_with(TermRow)
+
+    def test_factory_passed_through(self):
+        """Test an existing row factory is used as is"""
+        assert database.resolve_row_factory(dict_row) is dict_row
+
+
+@pytest.mark.unit
+class TestDBProxyClient:
+    """Test DBProxyClient maps rows with psycopg row factories"""
+
+    def test_return_dict_uses_dict_rows(self):
+        """Test return_dict selects dict_row instead of zipping columns"""
+        cursor = MagicMock()
+        cursor.fetchall.return_value = [{'id': 'term-1'}]
+        connection, get_connection = fake_connection(cursor)
+
+        with patch('shared.db_proxy_client.get_db_connection', get_connection):
+            rows = DBProxyClient().execute_query('SELECT id FROM tree_nodes', return_dict=True)
+
+        assert rows == [{'id': 'term-1'}]
+        connection.cursor.assert_called_once_with(row_factory=dict_row)
+
+    def test_row_factory_overrides_return_dict(self):
+        """Test an explicit row factory wins over return_dict"""
+        cursor = MagicMock()
+        connection, get_connection = fake_connection(cursor)
+
+        with patch('shared.db_proxy_client.get_db_connection', get_connection):
+            DBProxyClient().execute_query_one('SELECT 1', return_dict=True, row_factory='namedtuple')
+
+        connection.cursor.assert_called_once_with(row_factory=namedtuple_row)
+
+
+@pytest.mark.unit
+class TestQueryRegistry:
+    """Test named queries are prepared once per connection"""
+
+    def test_register_is_idempotent(self):
+        """Test re-registering the same SQL returns the registered query"""
+        registry = database.QueryRegistry()
+        query = registry.register('users.by_sub', 'SELECT id FROM users WHERE cognito_sub = %s')
+
+        assert registry.register('users.by_sub', 'SELECT id FROM users WHERE cognito_sub = %s') is query
+        assert registry['users.by_sub'] == 'SELECT id FROM users WHERE cognito_sub = %s'
+        with pytest.raises(ValueError):
+            registry.register('users.by_sub', 'SELECT email FROM users WHERE cognito_sub = %s')
+
+    def test_named_query_prepared_per_connection(self):
+        """Test prepares are counted on first use per connection, executions on every call"""
+        registry = database.QueryRegistry()
+        query = registry.register('users.by_sub', 'SELECT id FROM users WHERE cognito_sub = %s')
+        first, second = MagicMock(), MagicMock()
+
+        with patch.object(database, 'query_registry', registry):
+            database.execute_statement(first, query, ('sub-1',))
+            database.execute_statement(first, query, ('sub-2',))
+            database.execute_statement(second, query, ('sub-3',))
+
+        first.execute.assert_called_with(query, ('sub-2',), prepare=True)
+        stats = registry.stats()
+        assert stats['queries']['users.by_sub'] == {'executions': 3, 'prepares': 2}
+        assert stats['reuse_rate'] == pytest.approx(1 / 3, abs=1e-4)
+
+    def test_plain_sql_not_prepared(self):
+        """Test ad-hoc SQL text keeps psycopg's default preparation"""
+        cursor = MagicMock()
+
+        database.execute_statement(cursor, 'SELECT 1', None)
+
+        cursor.execute.assert_called_once_with('SELECT 1', None)
+
+    def test_client_prepares_registered_query(self):
+        """Test DBProxyClient executes registered queries prepared"""
+        registry = database.QueryRegistry()
+        query = registry.register('terms.count', 'SELECT COUNT(*) FROM tree_nodes WHERE parent_id = %s')
+        cursor = MagicMock()
+        connection, get_connection = fake_connection(cursor)
+
+        with patch.object(database, 'query_registry', registry), \
+                patch('shared.db_proxy_client.get_db_connection', get_connection):
+            DBProxyClient().execute_query_one(query, ('domain-1',))
+
+        cursor.execute.assert_called_once_with(query, ('domain-1',), prepare=True)
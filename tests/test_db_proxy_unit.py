@@ -5,6 +5,7 @@ Tests database proxy operations
 import pytest
 import json
 from unittest.mock import patch, MagicMock
+from contextlib import contextmanager
 from datetime import datetime
 from decimal import Decimal
 from uuid import UUID
@@ -162,3 +163,126 @@ class TestDbProxyHandler:
         uid = UUID('12345678-1234-5678-1234-567812345678')
         result = json_serial(uid)
         assert result == '12345678-1234-5678-1234-567812345678'
+
+
+def column(name):
+    description = MagicMock()
+    description.name = name
+    return description
+
+
+def cursor_context(cursor, exits):
+    """get_db_cursor stand-in that records how each transaction ended"""
+    @contextmanager
+    def get_db_cursor():
+        try:
+            yield cursor
+        except Exception as e:
+            exits.append('rollback')
+            raise
+        exits.append('commit')
+    return get_db_cursor
+
+
+@pytest.mark.unit
+class TestDbProxyResultEncoding:
+    """Test single-execution result encodings and batched statements"""
+    
+    @patch('lambda_functions.db_proxy.handler.get_db_cursor')
+    @patch('lambda_functions.db_proxy.handler.execute_query')
+    def test_return_dict_executes_once(self, mock_execute, mock_cursor):
+        """Test dict rows come from the one execution, not a second query for column names"""
+        from lambda_functions.db_proxy.handler import lambda_handler
+        
+        mock_execute.return_value = [{'id': 'user1', 'email': 'test@example.com'}]
+        
+        event = {
+            'operation': 'execute_query',
+            'query': 'INSERT INTO users (email) VALUES (%s) RETURNING id, email',
+            'params': ['test@example.com'],
+            'return_dict': True
+        }
+        response = lambda_handler(event, None)
+        
+        body = json.loads(response['body'])
+        assert body['result'] == [{'id': 'user1', 'email': 'test@example.com'}]
+        mock_execute.assert_called_once_with(event['query'], ('test@example.com',), row_factory='dict')
+        mock_cursor.assert_not_called()
+    
+    def test_columnar_result(self):
+        """Test columnar encoding sends column names once"""
+        from lambda_functions.db_proxy import handler
+        
+        cursor = MagicMock()
+        cursor.description = [column('id'), column('email')]
+        cursor.fetchall.return_value = [('user1', 'a@example.com'), ('user2', 'b@example.com')]
+        exits = []
+        
+        with patch.object(handler, 'get_db_cursor', cursor_context(cursor, exits)):
+            response = handler.lambda_handler({
+                'operation': 'execute_query',
+                'query': 'SELECT id, email FROM users',
+                'result_format': 'columnar'
+            }, None)
+        
+        body = json.loads(response['body'])
+        assert body == {'columns': ['id', 'email'],
+                        'result': [['user1', 'a@example.com'], ['user2', 'b@example.com']],
+                        'row_count': 2}
+        cursor.execute.assert_called_once()
+    
+    def test_unknown_result_format(self):
+        """Test an unknown result_format is rejected"""
+        from lambda_functions.db_proxy.handler import lambda_handler
+        
+        response = lambda_handler({'operation': 'execute_query', 'query': 'SELECT 1',
+                                   'result_format': 'xml'}, None)
+        
+        assert response['statusCode'] == 400
+    
+    def test_execute_batch_one_transaction(self):
+        """Test batch statements share one cursor and commit once"""
+        from lambda_functions.db_proxy import handler
+        
+        cursor = MagicMock()
+        cursor.description = [column('id')]
+        cursor.fetchone.return_value = ('session1',)
+        cursor.fetchall.return_value = [('session1',)]
+        exits = []
+        
+        with patch.object(handler, 'get_db_cursor', cursor_context(cursor, exits)):
+            response = handler.lambda_handler({
+                'operation': 'execute_batch',
+                'statements': [
+                    {'query': 'UPDATE quiz_sessions SET status = %s RETURNING id', 'params': ['paused'],
+                     'one': True},
+                    {'query': 'SELECT id FROM quiz_sessions', 'result_format': 'columnar'},
+                ]
+            }, None)
+        
+        body = json.loads(response['body'])
+        assert response['statusCode'] == 200
+        assert body['results'][0] == {'result': ['session1']}
+        assert body['results'][1]['columns'] == ['id']
+        assert cursor.execute.call_count == 2
+        assert exits == ['commit']
+    
+    def test_execute_batch_failure_rolls_back(self):
+        """Test a failing statement rolls back the batch and reports its index"""
+        from lambda_functions.db_proxy import handler
+        
+        cursor = MagicMock()
+        cursor.description = None
+        cursor.execute.side_effect = [None, Exception('duplicate key')]
+        exits = []
+        
+        with patch.object(handler, 'get_db_cursor', cursor_context(cursor, exits)):
+            response = handler.lambda_handler({
+                'operation': 'execute_batch',
+                'statements': [{'query': 'DELETE FROM a'}, {'query': 'INSERT INTO b VALUES (1)'}]
+            }, None)
+        
+        body = json.loads(response['body'])
+        assert response['statusCode'] == 500
+        assert body['statement_index'] == 1
+        assert exits == ['rollback']
@@ -0,0 +1,130 @@
+"""
+Unit tests for embedding_store module
+Tests reference embedding precomputation, storage and backfill
+"""
+import pytest
+import numpy as np
+from unittest.mock import patch, MagicMock
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import embedding_store
+import model_utils
+from model_utils import serialize_embedding, deserialize_embedding
+
+
+def make_model_manager(embeddings, version='v1'):
+    manager = MagicMock()
+    manager.encode_batch.return_value = embeddings
+    manager.model_version = version
+    return manager
+
+
+@pytest.mark.unit
+class TestEmbeddingSerialization:
+    """Test compact embedding storage format"""
+
+    def test_round_trip_is_float16(self):
+        """Embeddings are stored as 2 bytes per dimension and restored as float32"""
+        vector = np.random.rand(768).astype(np.float32)
+        blob = serialize_embedding(vector)
+
+        assert len(blob) == 768 * 2
+        restored = deserialize_embedding(blob)
+        assert restored.dtype == np.float32
+        assert np.allclose(restored, vector, atol=1e-3)
+
+
+@pytest.mark.unit
+class TestStoreTermEmbeddings:
+    """Test write-time embedding precomputation"""
+
+    def test_store_writes_single_batched_update(self):
+        """All terms are encoded in one pass and written in one statement"""
+        db_proxy = MagicMock()
+        manager = make_model_manager(np.ones((2, 4), dtype=np.float32))
+
+        with patch.object(model_utils, 'get_model_manager', return_value=manager):
+            stored = embedding_store.store_term_embeddings(db_proxy, [('t1', 'def one'), ('t2', 'def two')])
+
+        assert stored == 2
+        manager.encode_batch.assert_called_once_with(['def one', 'def two'])
+        assert db_proxy.execute_query.call_count == 1
+        params = db_proxy.execute_query.call_args.kwargs['params']
+        assert params[0] == 'v1'
+        assert params[1] == ['t1', 't2']
+        assert len(params[2]) == 2
+
+    def test_store_deferred_when_model_unavailable(self):
+        """Nothing is written when the model cannot encode"""
+        db_proxy = MagicMock()
+        manager = make_model_manager(None)
+
+        with patch.object(model_utils, 'get_model_manager', return_value=manager):
+            stored = embedding_store.store_term_embeddings(db_proxy, [('t1', 'def one')])
+
+        assert stored == 0
+        db_proxy.execute_query.assert_not_called()
+
+    def test_store_swallows_database_errors(self):
+        """Embedding storage never fails the calling write path"""
+        db_proxy = MagicMock()
+        db_proxy.execute_query.side_effect = Exception("db down")
+        manager = make_model_manager(np.ones((1, 4), dtype=np.float32))
+
+        with patch.object(model_utils, 'get_model_manager', return_value=manager):
+            stored = embedding_store.store_term_embeddings(db_proxy, [('t1', 'def one')])
+
+        assert stored == 0
+
+    def test_store_empty_terms(self):
+        """No work for an empty term list"""
+        db_proxy = MagicMock()
+        assert embedding_store.store_term_embeddings(db_proxy, []) == 0
+        db_proxy.execute_query.assert_not_called()
+
+
+@pytest.mark.unit
+class TestGetReferenceEmbedding:
+    """Test evaluation-time embedding lookup"""
+
+    def test_returns_stored_embedding_for_current_model(self):
+        """A matching stored embedding is used without encoding"""
+        vector = np.array([0.5, 0.5, 0.0, 0.0], dtype=np.float32)
+        db_proxy = MagicMock()
+        db_proxy.execute_query_one.return_value = ('the definition', serialize_embedding(vector), 'v1')
+        manager = make_model_manager(None)
+
+        with patch.object(model_utils, 'get_model_manager', return_value=manager):
+            result = embedding_store.get_reference_embedding(db_proxy, 't1', 'the definition')
+
+        assert np.allclose(result, vector)
+        manager.encode_batch.assert_not_called()
+
+    def test_backfills_stale_embedding(self):
+        """An embedding from another model version is recomputed and written back"""
+        vector = np.array([0.5, 0.5, 0.0, 0.0], dtype=np.float32)
+        db_proxy = MagicMock()
+        db_proxy.execute_query_one.return_value = ('the definition', serialize_embedding(vector), 'old')
+        manager = make_model_manager(np.array([[1.0, 0.0, 0.0, 0.0]], dtype=np.float32))
+
+        with patch.object(model_utils, 'get_model_manager', return_value=manager):
+            result = embedding_store.get_reference_embedding(db_proxy, 't1', 'the definition')
+
+        assert np.allclose(result, [1.0, 0.0, 0.0, 0.0])
+        manager.encode_batch.assert_called_once_with(['the definition'])
+        db_proxy.execute_query.assert_called_once()
+
+    def test_ignores_mismatched_reference_text(self):
+        """A caller-supplied text that differs from the stored definition is never used or persisted"""
+        db_proxy = MagicMock()
+        db_proxy.execute_query_one.return_value = ('the definition', None, None)
+        manager = make_model_manager(np.ones((1, 4), dtype=np.float32))
+
+        with patch.object(model_utils, 'get_model_manager', return_value=manager):
+            result = embedding_store.get_reference_embedding(db_proxy, 't1', 'something else')
+
+        assert result is None
+        manager.encode_batch.assert_not_called()
+        db_proxy.execute_query.assert_not_called()
@@ -0,0 +1,136 @@
+"""
+Unit tests for evaluation_cascade module
+Tests the exact-match and lexical tiers and the model fallback
+"""
+import pytest
+from unittest.mock import MagicMock
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from shared.evaluation_cascade import (
+    EvaluationCascade, NormalizedMatchTier, LexicalOverlapTier, CascadeTier, normalize_answer
+)
+
+DEFINITION = "A serverless compute service that runs code in response to events"
+
+
+@pytest.mark.unit
+class TestNormalizedMatchTier:
+    """Test exact-match and non-answer detection"""
+
+    def test_normalized_copy_scores_one(self):
+        """Test case, punctuation and whitespace differences still match"""
+        tier = NormalizedMatchTier()
+        assert tier.score("  a SERVERLESS compute service, that runs code in response to events. ", DEFINITION, 0.7) == 1.0
+
+    @pytest.mark.parametrize('answer', ["idk", "I don't know", "???", "the", "No idea!"])
+    def test_non_answers_score_zero(self, answer):
+        """Test empty and non-answers are rejected"""
+        assert NormalizedMatchTier().score(answer, DEFINITION, 0.7) == 0.0
+
+    def test_other_answers_deferred(self):
+        """Test real answers are left to later tiers"""
+        assert NormalizedMatchTier().score("It runs code when events happen", DEFINITION, 0.7) is None
+
+    def test_contractions_expanded(self):
+        """Test n't is normalized to a separate 'not'"""
+        assert normalize_answer("Isn't it?") == "is not it"
+
+
+@pytest.mark.unit
+class TestLexicalOverlapTier:
+    """Test lexical accept/reject bands"""
+
+    def test_near_copy_accepted(self):
+        """Test an answer with the same content words is accepted"""
+        answer = "Serverless compute service which runs code in response to the events"
+        score = LexicalOverlapTier(accept_threshold=0.9).score(answer, DEFINITION, 0.7)
+        assert score == pytest.approx(1.0)
+
+    def test_negation_difference_deferred(self):
+        """Test an added negation is never accepted lexically"""
+        definition = "Mitochondria produce energy for the cell through cellular respiration in eukaryotic organisms"
+        answer = "Mitochondria do not produce energy for the cell through cellular respiration in eukaryotic organisms"
+        assert LexicalOverlapTier(accept_threshold=0.9).score(answer, definition, 0.7) is None
+
+    def test_unrelated_single_word_rejected(self):
+        """Test a one-word answer sharing nothing with the definition is rejected"""
+        assert LexicalOverlapTier().score("banana", DEFINITION, 0.7) == 0.0
+
+    def test_short_reference_not_rejected(self):
+        """Test synonyms for one-word definitions go to the model"""
+        assert LexicalOverlapTier().score("big", "Large", 0.7) is None
+
+    def test_accept_respects_high_threshold(self):
+        """Test lexical scores below a strict threshold are deferred"""
+        answer = "A serverless compute service that runs code in response to many events"
+        assert LexicalOverlapTier(accept_threshold=0.9).score(answer, DEFINITION, 0.99) is None
+
+    @pytest.mark.parametrize('answer, definition', [
+        ("Converts an integer to a string", "Converts a string to an integer"),
+        ("Copies data from the cache into the database", "Copies data from the database into the cache"),
+        ("Moves messages from the queue to the worker", "Moves messages to the queue from the worker"),
+    ])
+    def test_reversed_arguments_deferred(self, answer, definition):
+        """Test swapped arguments or direction are never accepted on word overlap alone"""
+        assert LexicalOverlapTier(accept_threshold=0.9).score(answer, definition, 0.7) is None
+
+    def test_paraphrase_deferred(self):
+        """Test partial overlap goes to the model"""
+        assert LexicalOverlapTier().score("It executes functions when triggered by events", DEFINITION, 0.7) is None
+
+
+@pytest.mark.unit
+class TestEvaluationCascade:
+    """Test stage selection, timings and model fallback"""
+
+    def test_exact_match_skips_model(self):
+        """Test the model scorer is not called for decided answers"""
+        model_scorer = MagicMock(return_value=0.5)
+
+        result = EvaluationCascade().evaluate(DEFINITION, DEFINITION, 0.7, model_scorer)
+
+        model_scorer.assert_not_called()
+        assert result['similarity_score'] == 1.0
+        assert result['stage'] == 'exact_match'
+        assert set(result['timings_ms']) == {'exact_match'}
+
+    def test_ambiguous_answer_uses_model(self):
+        """Test undecided answers fall through every tier to the model"""
+        model_scorer = MagicMock(return_value=0.82)
+
+        result = EvaluationCascade().evaluate("It executes functions when triggered", DEFINITION, 0.7, model_scorer)
+
+        model_scorer.assert_called_once()
+        assert result['stage'] == 'model'
+        assert result['similarity_score'] == 0.82
+        assert set(result['timings_ms']) == {'exact_match', 'lexical', 'model'}
+
+    def test_model_failure_returns_none(self):
+        """Test a failed model call fails the evaluation"""
+        assert EvaluationCascade().evaluate("something else", DEFINITION, 0.7, lambda: None) is None
+
+    def test_failing_tier_defers(self):
+        """Test a tier that raises is skipped rather than failing the evaluation"""
+        broken = MagicMock(spec=CascadeTier)
+        broken.name = 'broken'
+        broken.score.side_effect = ValueError("bad tier")
+
+        result = EvaluationCascade(tiers=[broken]).evaluate("a", "b", 0.7, lambda: 0.4)
+
+        assert result['stage'] == 'model'
+        assert result['similarity_score'] == 0.4
+
+    def test_empty_cascade_is_model_only(self):
+        """Test a cascade without tiers always uses the model"""
+        result = EvaluationCascade(tiers=[]).evaluate(DEFINITION, DEFINITION, 0.7, lambda: 0.99)
+        assert result['stage'] == 'model'
+
+    def test_tier_requires_score(self):
+        """Test a tier without score() cannot be instantiated"""
+        class Unfinished(CascadeTier):
+            name = 'unfinished'
+
+        with pytest.raises(TypeError):
+            Unfinished()
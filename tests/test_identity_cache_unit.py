@@ -0,0 +1,108 @@
+"""
+Unit tests for identity_cache module
+Tests positive/negative caching, TTL and LRU bounds, groups and invalidation
+"""
+import pytest
+from unittest.mock import patch, MagicMock
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from shared.identity_cache import IdentityResolver, parse_group_claims
+
+
+def make_resolver(rows=None, **kwargs):
+    """Resolver over a db_proxy stub mapping cognito_sub -> user id"""
+    rows = rows if rows is not None else {'sub-1': 'user-1', 'sub-2': 'user-2'}
+    db_proxy = MagicMock()
+    db_proxy.execute_query_one.side_effect = lambda query, params: (rows[params[0]],) if params[0] in rows else None
+    return IdentityResolver(db_proxy, **kwargs), db_proxy
+
+
+def cognito_event(sub, groups=None):
+    claims = {'sub': sub}
+    if groups is not None:
+        claims['cognito:groups'] = groups
+    return {'requestContext': {'authorizer': {'claims': claims}}}
+
+
+@pytest.mark.unit
+class TestIdentityResolver:
+    """Test cached cognito_sub resolution"""
+
+    def test_positive_entry_cached(self):
+        """Test a known sub hits the database once"""
+        resolver, db_proxy = make_resolver()
+
+        assert resolver.resolve('sub-1')['user_id'] == 'user-1'
+        assert resolver.resolve('sub-1')['user_id'] == 'user-1'
+
+        assert db_proxy.execute_query_one.call_count == 1
+        assert resolver.stats()['hits'] == 1
+
+    def test_negative_entry_expires_quickly(self):
+        """Test unknown subs are cached briefly so new sign-ups resolve soon"""
+        rows = {}
+        resolver, db_proxy = make_resolver(rows, ttl_seconds=300, negative_ttl_seconds=10)
+        with patch('shared.identity_cache.time.monotonic', return_value=100.0):
+            assert resolver.resolve('new-sub') is None
+            assert resolver.resolve('new-sub') is None
+        assert db_proxy.execute_query_one.call_count == 1
+
+        rows['new-sub'] = 'user-3'
+        with patch('shared.identity_cache.time.monotonic', return_value=111.0):
+            assert resolver.resolve('new-sub')['user_id'] == 'user-3'
+
+    def test_positive_entry_staleness_capped(self):
+        """Test a configured TTL cannot keep a deleted or re-linked sub cached past the cap"""
+        with patch.dict(os.environ, {'IDENTITY_CACHE_TTL_SECONDS': '86400'}):
+            resolver, _ = make_resolver()
+        assert resolver.ttl_seconds == IdentityResolver.MAX_TTL_SECONDS
+
+        rows = {'sub-1': 'user-1'}
+        resolver, db_proxy = make_resolver(rows)
+        with patch('shared.identity_cache.time.monotonic', return_value=100.0):
+            resolver.resolve('sub-1')
+        del rows['sub-1']
+        with patch('shared.identity_cache.time.monotonic', return_value=100.0 + IdentityResolver.DEFAULT_TTL_SECONDS):
+            assert resolver.resolve('sub-1') is None
+        assert db_proxy.execute_query_one.call_count == 2
+
+    def test_lru_bound(self):
+        """Test the least recently used sub is evicted past max_entries"""
+        resolver, db_proxy = make_resolver(max_entries=1)
+        resolver.resolve('sub-1')
+        resolver.resolve('sub-2')
+        resolver.resolve('sub-1')
+
+        assert db_proxy.execute_query_one.call_count == 3
+        assert resolver.stats()['entries'] == 1
+
+    def test_invalidate(self):
+        """Test an invalidated sub is looked up again"""
+        resolver, db_proxy = make_resolver()
+        resolver.resolve('sub-1')
+        resolver.invalidate('sub-1')
+        resolver.resolve('sub-1')
+
+        assert db_proxy.execute_query_one.call_count == 2
+
+    def test_groups_follow_token_claims(self):
+        """Test token groups replace cached groups, which are served when a token has none"""
+        resolver, _ = make_resolver()
+
+        assert resolver.resolve_event(cognito_event('sub-1', 'instructor,admin'))['groups'] == ['instructor', 'admin']
+        assert resolver.resolve_event(cognito_event('sub-1'))['groups'] == ['instructor', 'admin']
+        assert resolver.resolve_event(cognito_event('sub-1', '[student]'))['groups'] == ['student']
+
+    def test_event_without_sub(self):
+        """Test events without a Cognito sub do not query the database"""
+        resolver, db_proxy = make_resolver()
+        assert resolver.resolve_event({'requestContext': {}}) is None
+        db_proxy.execute_query_one.assert_not_called()
+
+    def test_parse_group_claims(self):
+        """Test the claim formats API Gateway produces"""
+        assert parse_group_claims({}) is None
+        assert parse_group_claims({'cognito:groups': '[admin instructor]'}) == ['admin', 'instructor']
+        assert parse_group_claims({'cognito:groups': ['student']}) == ['student']
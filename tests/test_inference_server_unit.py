@@ -0,0 +1,143 @@
+"""
+Unit tests for inference_server module
+Tests request coalescing in MicroBatcher and the HTTP routes
+"""
+import pytest
+import asyncio
+import json
+import numpy as np
+from unittest.mock import MagicMock
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src', 'shared'))
+
+from shared.inference_server import MicroBatcher, InferenceServer
+
+
+def make_model_manager():
+    """ModelManager stand-in whose embedding for a text is a one-hot of its length"""
+    manager = MagicMock()
+
+    def encode_batch(texts):
+        embeddings = np.zeros((len(texts), 16), dtype=np.float32)
+        for i, text in enumerate(texts):
+            embeddings[i, len(text) % 16] = 1.0
+        return embeddings
+
+    manager.encode_batch.side_effect = encode_batch
+    manager.get_model_info.return_value = {'loaded': True}
+    return manager
+
+
+@pytest.mark.unit
+class TestMicroBatcher:
+    """Test MicroBatcher request coalescing"""
+
+    def test_concurrent_requests_coalesced(self):
+        """Test concurrent requests share one encode_batch call"""
+        manager = make_model_manager()
+
+        async def run():
+            batcher = MicroBatcher(manager, max_batch_size=64, max_wait_ms=50)
+            scores = await asyncio.gather(*[batcher.similarity('abc', 'xyz' if i % 2 else 'abcd') for i in range(10)])
+            await batcher.stop()
+            return scores, batcher.stats()
+
+        scores, stats = asyncio.run(run())
+
+        assert manager.encode_batch.call_count == 1
+        assert len(manager.encode_batch.call_args[0][0]) == 20
+        # Each request gets its own rows back
+        assert scores == [1.0 if i % 2 else 0.0 for i in range(10)]
+        assert stats['requests'] == 10
+        assert stats['batches'] == 1
+
+    def test_max_batch_size_splits_batches(self):
+        """Test a full batch is dispatched without waiting for more requests"""
+        manager = make_model_manager()
+
+        async def run():
+            batcher = MicroBatcher(manager, max_batch_size=4, max_wait_ms=50)
+            await asyncio.gather(*[batcher.similarity('a', 'b') for _ in range(6)])
+            await batcher.stop()
+
+        asyncio.run(run())
+
+        assert [len(c[0][0]) for c in manager.encode_batch.call_args_list] == [4, 4, 4]
+
+    def test_encoding_failure_propagates(self):
+        """Test every request in a failed batch raises"""
+        manager = make_model_manager()
+        manager.encode_batch.side_effect = None
+        manager.encode_batch.return_value = None
+
+        async def run():
+            batcher = MicroBatcher(manager, max_wait_ms=10)
+            results = await asyncio.gather(batcher.similarity('a', 'b'), batcher.similarity('c', 'd'),
+                                           return_exceptions=True)
+            await batcher.stop()
+            return results
+
+        results = asyncio.run(run())
+
+        assert all(isinstance(r, RuntimeError) for r in results)
+
+    def test_batch_similarity(self):
+        """Test pairwise scores for a multi-pair request"""
+        manager = make_model_manager()
+
+        async def run():
+            batcher = MicroBatcher(manager, max_wait_ms=1)
+            scores = await batcher.batch_similarity(['ab', 'abc'], ['cd', 'a'])
+            await batcher.stop()
+            return scores
+
+        assert asyncio.run(run()) == [1.0, 0.0]
+
+
+@pytest.mark.unit
+class TestInferenceServer:
+    """Test the HTTP front end"""
+
+    @staticmethod
+    async def request(port, method, path, body=None):
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        data = json.dumps(body).encode() if body is not None else b''
+        writer.write(f"{method} {path} HTTP/1.1\r\nContent-Length: {len(data)}\r\n"
+                     f"Connection: close\r\n\r\n".encode() + data)
+        await writer.drain()
+        response = await reader.read()
+        writer.close()
+        head, _, payload = response.partition(b'\r\n\r\n')
+        return int(head.split(b' ')[1]), json.loads(payload)
+
+    def test_routes(self):
+        """Test similarity, batch, health and error responses over HTTP"""
+        manager = make_model_manager()
+
+        async def run():
+            batcher = MicroBatcher(manager, max_wait_ms=1)
+            server = await InferenceServer(batcher).serve('127.0.0.1', 0)
+            port = server.sockets[0].getsockname()[1]
+            try:
+                return [
+                    await self.request(port, 'POST', '/similarity', {'answer': 'ab', 'correct_answer': 'cd'}),
+                    await self.request(port, 'POST', '/batch',
+                                       {'pairs': [{'answer': 'ab', 'correct_answer': 'abc'}]}),
+                    await self.request(port, 'POST', '/similarity', {'answer': ''}),
+                    await self.request(port, 'GET', '/health'),
+                    await self.request(port, 'GET', '/missing'),
+                ]
+            finally:
+                server.close()
+                await server.wait_closed()
+                await batcher.stop()
+
+        similarity, batch, invalid, health, missing = asyncio.run(run())
+
+        assert similarity == (200, {'similarity': 1.0})
+        assert batch == (200, {'similarities': [0.0]})
+        assert invalid[0] == 400
+        assert health[0] == 200 and health[1]['batching']['requests'] == 2
+        assert missing[0] == 404
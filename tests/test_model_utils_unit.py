@@ -9,7 +9,9 @@ import sys
 import os
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
 
-from shared.model_utils import ModelManager
+from shared.model_utils import (
+    write_model_hash, ModelManager, EmbeddingCache, FastTokenizer, pairwise_similarity, one_to_many_similarity, similarity_matrix
+)
 
 
 @pytest.mark.unit
@@ -46,13 +48,14 @@ class TestModelManager:
     @patch('shared.model_utils._get_tokenizer_lib')
     @patch('shared.model_utils._get_ort')
     @patch('shared.model_utils.os.path.exists')
-    def test_load_model_already_loaded(self, mock_exists, mock_get_ort, mock_get_tokenizer):
+    def test_load_model_already_loaded(self, mock_exists, mock_get_ort, mock_get_tokenizer, tmp_path):
         """Test that loading a second time short-circuits without reloading"""
         mock_exists.return_value = True
         mock_get_ort.return_value = MagicMock()
         mock_get_tokenizer.return_value = MagicMock()
 
-        manager = ModelManager()
+        with patch.dict(os.environ, {'ONNX_OPTIMIZED_MODEL_DIR': str(tmp_path)}):
+            manager = ModelManager()
         manager.load_model()
         result = manager.load_model()  # second call
 
@@ -142,13 +145,14 @@ class TestModelManager:
     @patch('shared.model_utils._get_tokenizer_lib')
     @patch('shared.model_utils._get_ort')
     @patch('shared.model_utils.os.path.exists')
-    def test_health_check_success(self, mock_exists, mock_get_ort, mock_get_tokenizer):
+    def test_health_check_success(self, mock_exists, mock_get_ort, mock_get_tokenizer, tmp_path):
         """Test health check when model is loaded"""
         mock_exists.return_value = True
         mock_get_ort.return_value = MagicMock()
         mock_get_tokenizer.return_value = MagicMock()
 
-        manager = ModelManager()
+        with patch.dict(os.environ, {'ONNX_OPTIMIZED_MODEL_DIR': str(tmp_path)}):
+            manager = ModelManager()
         manager.load_model()
 
         with patch.object(manager, 'calculate_similarity', return_value=1.0):
@@ -162,3 +166,473 @@ class TestModelManager:
         result = manager.health_check()
 
         assert result is False
+
+    def test_calculate_similarity_to_reference_encodes_only_text(self):
+        """Test scoring against a precomputed reference embedding"""
+        manager = ModelManager()
+        manager._model_loaded = True
+
+        with patch.object(manager, 'encode_batch') as mock_encode:
+            mock_encode.return_value = np.array([[1.0, 0.0, 0.0]])
+            result = manager.calculate_similarity_to_reference("text1", np.array([1.0, 0.0, 0.0]))
+
+        mock_encode.assert_called_once_with(["text1"])
+        assert result == pytest.approx(1.0)
+
+    @patch.dict(os.environ, {'MODEL_VERSION': 'release-42'})
+    def test_model_version_from_environment(self):
+        """Test model version override via MODEL_VERSION"""
+        manager = ModelManager(model_path='/nonexistent')
+        assert manager.model_version == 'release-42'
+        assert manager.get_model_info()['model_version'] == 'release-42'
+
+    @patch.dict(os.environ, {}, clear=False)
+    def test_model_version_fingerprint_missing_files(self):
+        """Test model version falls back when model files are missing"""
+        os.environ.pop('MODEL_VERSION', None)
+        manager = ModelManager(model_path='/nonexistent')
+        assert manager.model_version == 'unknown'
+
+    @patch.dict(os.environ, {}, clear=False)
+    def test_model_version_uses_build_time_fingerprint(self, tmp_path):
+        """Test a .sha256 sidecar is used without reading the model file"""
+        os.environ.pop('MODEL_VERSION', None)
+        (tmp_path / 'config.json').write_text('{"hidden_size": 4}')
+        (tmp_path / 'model.onnx').write_bytes(b'weights-a')
+        write_model_hash(str(tmp_path / 'model.onnx'))
+        expected = ModelManager(model_path=str(tmp_path)).model_version
+
+        with patch('shared.model_utils._file_content_hash') as file_hash:
+            assert ModelManager(model_path=str(tmp_path)).model_version == expected
+        file_hash.assert_not_called()
+
+    @patch.dict(os.environ, {}, clear=False)
+    def test_model_hashed_once_without_fingerprint(self, tmp_path):
+        """Test the fallback hash reads the model file once per process"""
+        os.environ.pop('MODEL_VERSION', None)
+        (tmp_path / 'config.json').write_text('{"hidden_size": 4}')
+        (tmp_path / 'model.onnx').write_bytes(b'weights-a')
+        onnx_path = str(tmp_path / 'model.onnx')
+
+        with patch('shared.model_utils.open', side_effect=open, create=True) as opened:
+            manager = ModelManager(model_path=str(tmp_path))
+            manager.model_version
+            manager._optimized_model_paths(onnx_path)
+            ModelManager(model_path=str(tmp_path)).model_version
+
+        assert [c[0][:2] for c in opened.call_args_list].count((onnx_path, 'rb')) == 1
+
+    @patch.dict(os.environ, {}, clear=False)
+    def test_model_version_tracks_weight_contents(self, tmp_path):
+        """Test retrained weights of the same size and file name get a new model version"""
+        os.environ.pop('MODEL_VERSION', None)
+        (tmp_path / 'config.json').write_text('{"hidden_size": 4}')
+        (tmp_path / 'model.onnx').write_bytes(b'weights-a')
+        before = ModelManager(model_path=str(tmp_path)).model_version
+
+        (tmp_path / 'model.onnx').write_bytes(b'weights-b')
+        os.utime(tmp_path / 'model.onnx', ns=(0, 0))
+        after = ModelManager(model_path=str(tmp_path)).model_version
+
+        assert before != after
+
+
+def make_loaded_manager(**kwargs):
+    """Build a ModelManager with a mock tokenizer/session that echoes batch size"""
+    manager = ModelManager(model_path='/test/model', **kwargs)
+    manager._model_loaded = True
+    manager._model_version = 'v1'
+
+    def tokenize(texts, **_):
+        n = len(texts)
+        return {'input_ids': np.ones((n, 2), dtype=np.int64), 'attention_mask': np.ones((n, 2), dtype=np.int64)}
+
+    def run(_, feeds):
+        n = feeds['input_ids'].shape[0]
+        return [np.random.rand(n, 2, 4).astype(np.float32)]
+
+    manager._tokenizer = MagicMock(side_effect=tokenize)
+    manager._session = MagicMock()
+    manager._session.run.side_effect = run
+    return manager
+
+
+@pytest.mark.unit
+class TestEmbeddingCache:
+    """Test the byte-budgeted LRU embedding cache"""
+
+    def test_repeated_texts_served_from_cache(self):
+        """Second encode of the same (normalized) text skips the ONNX session"""
+        manager = make_loaded_manager()
+
+        first = manager.encode_batch(["I don't know"])
+        second = manager.encode_batch(["  I don't   know "])
+
+        assert manager._session.run.call_count == 1
+        assert np.allclose(first, second)
+        stats = manager.get_model_info()['embedding_cache']
+        assert stats['hits'] == 1
+        assert stats['misses'] == 1
+
+    def test_only_misses_are_encoded(self):
+        """A partially cached batch encodes just the uncached texts"""
+        manager = make_loaded_manager()
+        manager.encode_batch(["alpha"])
+
+        result = manager.encode_batch(["alpha", "beta"])
+
+        assert result.shape == (2, 4)
+        last_feed = manager._session.run.call_args[0][1]
+        assert last_feed['input_ids'].shape[0] == 1
+
+    def test_model_version_is_part_of_key(self):
+        """Entries cached under one model version are not served for another"""
+        assert EmbeddingCache.make_key('v1', 'text') != EmbeddingCache.make_key('v2', 'text')
+
+    def test_lru_eviction_respects_byte_budget(self):
+        """Least recently used entries are evicted once the budget is exceeded"""
+        entry = np.zeros(4, dtype=np.float32)
+        entry_size = entry.nbytes + EmbeddingCache.ENTRY_OVERHEAD_BYTES
+        cache = EmbeddingCache(max_bytes=entry_size * 2)
+
+        cache.put(b'a', entry)
+        cache.put(b'b', entry)
+        cache.get(b'a')  # 'b' becomes least recently used
+        cache.put(b'c', entry)
+
+        assert cache.get(b'b') is None
+        assert cache.get(b'a') is not None
+        stats = cache.stats()
+        assert stats['evictions'] == 1
+        assert stats['bytes'] <= stats['max_bytes']
+
+    def test_cache_disabled_with_zero_budget(self):
+        """A zero budget disables caching entirely"""
+        manager = make_loaded_manager(cache_max_bytes=0)
+
+        manager.encode_batch(["alpha"])
+        manager.encode_batch(["alpha"])
+
+        assert manager._session.run.call_count == 2
+        assert manager.get_model_info()['embedding_cache'] is None
+
+
+@pytest.mark.unit
+class TestInBatchDeduplication:
+    """Test identical texts within one batch are encoded once"""
+
+    def test_duplicates_encoded_once(self):
+        """Test only distinct normalized texts reach the tokenizer"""
+        manager = make_loaded_manager(cache_max_bytes=0)
+
+        result = manager.encode_batch(["photosynthesis", " photosynthesis ", "osmosis", "photosynthesis"])
+
+        assert result.shape == (4, 4)
+        assert manager._tokenizer.call_args[0][0] == ["photosynthesis", "osmosis"]
+        assert np.array_equal(result[0], result[1])
+        assert np.array_equal(result[0], result[3])
+        assert not np.array_equal(result[0], result[2])
+
+    def test_batch_against_one_definition(self):
+        """Test a 100-pair batch sharing one definition encodes at most 101 texts"""
+        manager = make_loaded_manager()
+        students = [f"answer {i % 40}" for i in range(100)]
+
+        scores = manager.calculate_batch_similarity(students, ["the definition"] * 100)
+
+        assert len(scores) == 100
+        assert len(manager._tokenizer.call_args[0][0]) == 41
+        assert scores[0] == scores[40]
+        assert manager.get_model_info()['embedding_cache']['misses'] == 41
+
+
+@pytest.mark.unit
+class TestLengthBucketedBatching:
+    """Test length-bucketed dynamic batching in encode_batch"""
+
+    @staticmethod
+    def make_manager(max_tokens_per_batch):
+        manager = ModelManager(model_path='/test/model', cache_max_bytes=0,
+                               max_tokens_per_batch=max_tokens_per_batch)
+        manager._model_loaded = True
+        # One token per word; the token id encodes the word length so rows are distinguishable
+        manager._tokenizer = MagicMock(side_effect=lambda texts, **_: {
+            'input_ids': [[len(w) for w in t.split()] for t in texts]
+        })
+
+        def run(_, feeds):
+            # Hidden state = token id, so the pooled embedding reflects the input row
+            ids = feeds['input_ids'].astype(np.float32)
+            return [np.stack([ids, np.ones_like(ids)], axis=-1)]
+
+        manager._session = MagicMock()
+        manager._session.run.side_effect = run
+        return manager
+
+    def test_buckets_padded_to_own_length(self):
+        """Short texts are not padded to the longest text in the batch"""
+        manager = self.make_manager(max_tokens_per_batch=8)
+        long_text = ' '.join(['word'] * 8)
+
+        manager.encode_batch(['a b', long_text, 'c d'])
+
+        seq_lengths = sorted(call[0][1]['input_ids'].shape[1] for call in manager._session.run.call_args_list)
+        assert seq_lengths == [2, 8]
+
+    def test_original_order_restored(self):
+        """Output rows line up with input texts regardless of bucket order"""
+        manager = self.make_manager(max_tokens_per_batch=4)
+        texts = ['xxxx yyyy zzzz', 'a', 'bb cc']
+
+        result = manager.encode_batch(texts)
+        reference = np.stack([manager._run_model([t])[0] for t in texts])
+
+        assert np.allclose(result, reference)
+
+    def test_single_bucket_within_budget(self):
+        """Everything fits in one session call when under the token budget"""
+        manager = self.make_manager(max_tokens_per_batch=4096)
+
+        manager.encode_batch(['a b', 'c d e', 'f'])
+
+        assert manager._session.run.call_count == 1
+
+
+@pytest.mark.unit
+class TestModelPrecision:
+    """Test MODEL_PRECISION selection of the ONNX variant"""
+
+    @patch('shared.model_utils._get_tokenizer_lib')
+    @patch('shared.model_utils._get_ort')
+    @patch('shared.model_utils.os.path.exists')
+    def test_int8_model_selected(self, mock_exists, mock_get_ort, mock_get_tokenizer):
+        """Test loading the INT8 file when MODEL_PRECISION=int8"""
+        mock_exists.return_value = True
+        mock_ort = MagicMock()
+        mock_get_ort.return_value = mock_ort
+
+        manager = ModelManager(model_path='/test/model', precision='int8')
+        assert manager.load_model() is True
+
+        loaded_path = mock_ort.InferenceSession.call_args[0][0]
+        assert loaded_path == os.path.join('/test/model', 'model_int8.onnx')
+        assert manager.get_model_info()['precision'] == 'int8'
+
+    @patch('shared.model_utils._get_tokenizer_lib')
+    @patch('shared.model_utils._get_ort')
+    @patch('shared.model_utils.os.path.exists')
+    def test_int8_falls_back_to_fp32(self, mock_exists, mock_get_ort, mock_get_tokenizer):
+        """Test fallback to fp32 when the INT8 file was not built"""
+        mock_exists.side_effect = lambda path: not path.endswith('model_int8.onnx')
+        mock_ort = MagicMock()
+        mock_get_ort.return_value = mock_ort
+
+        manager = ModelManager(model_path='/test/model', precision='int8')
+        assert manager.load_model() is True
+
+        loaded_path = mock_ort.InferenceSession.call_args[0][0]
+        assert loaded_path == os.path.join('/test/model', 'model.onnx')
+        assert manager.precision == 'fp32'
+
+    @patch.dict(os.environ, {'MODEL_PRECISION': 'fp8'})
+    def test_unknown_precision_defaults_to_fp32(self):
+        """Test unknown MODEL_PRECISION values are ignored"""
+        manager = ModelManager(model_path='/test/model')
+        assert manager.precision == 'fp32'
+
+
+def _unit_rows(rows):
+    rows = np.asarray(rows, dtype=np.float32)
+    return rows / np.linalg.norm(rows, axis=1, keepdims=True)
+
+
+@pytest.mark.unit
+class TestSimilarityKernels:
+    """Test the dot-product similarity kernels against a reference cosine"""
+
+    def test_pairwise_matches_cosine(self):
+        """Test row-wise similarity equals cosine for normalized rows"""
+        rng = np.random.default_rng(0)
+        a = _unit_rows(rng.random((5, 8)))
+        b = _unit_rows(rng.random((5, 8)))
+
+        expected = [float(np.dot(x, y)) for x, y in zip(a, b)]
+        assert pairwise_similarity(a, b) == pytest.approx(expected, abs=1e-6)
+
+    def test_scores_clipped(self):
+        """Test opposite vectors score 0 rather than negative"""
+        a = _unit_rows([[1.0, 0.0]])
+        b = _unit_rows([[-1.0, 0.0]])
+
+        assert pairwise_similarity(a, b)[0] == 0.0
+        assert similarity_matrix(a, a)[0, 0] == pytest.approx(1.0)
+
+    def test_one_to_many_and_matrix_agree(self):
+        """Test one-to-many rows match the corresponding similarity matrix row"""
+        rng = np.random.default_rng(1)
+        queries = _unit_rows(rng.random((3, 8)))
+        candidates = _unit_rows(rng.random((4, 8)))
+
+        matrix = similarity_matrix(queries, candidates)
+        assert matrix.shape == (3, 4)
+        for i, query in enumerate(queries):
+            assert one_to_many_similarity(query, candidates) == pytest.approx(matrix[i], abs=1e-6)
+
+    def test_batch_similarity_vectorized(self):
+        """Test calculate_batch_similarity scores each pair from one encode call"""
+        manager = ModelManager(model_path='/test/model')
+        embeddings = _unit_rows([[1, 0, 0], [0, 1, 0], [1, 0, 0], [1, 1, 0]])
+        with patch.object(manager, 'encode_batch', return_value=embeddings) as mock_encode:
+            scores = manager.calculate_batch_similarity(['a', 'b'], ['c', 'd'])
+
+        mock_encode.assert_called_once()
+        assert scores == pytest.approx([1.0, np.sqrt(0.5)], abs=1e-6)
+
+
+@pytest.mark.unit
+class TestTokenizerLoading:
+    """Test the tokenizers-first tokenizer path"""
+
+    @patch('shared.model_utils._get_tokenizer_lib')
+    @patch('shared.model_utils._get_fast_tokenizer_lib')
+    @patch('shared.model_utils._get_ort')
+    @patch('shared.model_utils.os.path.exists')
+    def test_fast_tokenizer_preferred(self, mock_exists, mock_get_ort, mock_get_fast, mock_get_auto):
+        """Test tokenizer.json is loaded without importing transformers"""
+        mock_exists.return_value = True
+        mock_get_ort.return_value = MagicMock()
+
+        manager = ModelManager(model_path='/test/model')
+        assert manager.load_model() is True
+
+        mock_get_fast.return_value.from_file.assert_called_once_with(os.path.join('/test/model', 'tokenizer.json'))
+        mock_get_auto.assert_not_called()
+        assert isinstance(manager._tokenizer, FastTokenizer)
+
+    @patch('shared.model_utils._get_tokenizer_lib')
+    @patch('shared.model_utils._get_fast_tokenizer_lib')
+    @patch('shared.model_utils._get_ort')
+    @patch('shared.model_utils.os.path.exists')
+    def test_falls_back_to_transformers(self, mock_exists, mock_get_ort, mock_get_fast, mock_get_auto):
+        """Test AutoTokenizer is used when the tokenizers runtime is missing"""
+        mock_exists.return_value = True
+        mock_get_ort.return_value = MagicMock()
+        mock_get_fast.side_effect = ImportError("No module named 'tokenizers'")
+
+        manager = ModelManager(model_path='/test/model')
+        assert manager.load_model() is True
+
+        mock_get_auto.return_value.from_pretrained.assert_called_once_with('/test/model')
+        assert manager._tokenizer is mock_get_auto.return_value.from_pretrained.return_value
+
+    def test_fast_tokenizer_overrides_export_settings(self):
+        """Test padding is disabled and truncation uses MAX_SEQ_LENGTH"""
+        raw = MagicMock()
+        raw.encode_batch.return_value = [MagicMock(ids=[101, 7, 102]), MagicMock(ids=[101, 102])]
+
+        tokenizer = FastTokenizer(raw, max_length=ModelManager.MAX_SEQ_LENGTH)
+        result = tokenizer(['hello', ''], padding=False, truncation=True)
+
+        raw.no_padding.assert_called_once()
+        raw.enable_truncation.assert_called_once_with(max_length=ModelManager.MAX_SEQ_LENGTH)
+        assert result == {'input_ids': [[101, 7, 102], [101, 102]]}
+
+
+@pytest.mark.unit
+class TestSessionOptions:
+    """Test persisted graph optimization and session tuning"""
+
+    @staticmethod
+    def make_model_dir(tmp_path):
+        (tmp_path / 'config.json').write_text('{"hidden_size": 4}')
+        (tmp_path / 'model.onnx').write_bytes(b'onnx')
+        return str(tmp_path)
+
+    @patch.dict(os.environ, {'AWS_LAMBDA_FUNCTION_MEMORY_SIZE': '2048'})
+    @patch('shared.model_utils.os.cpu_count', return_value=6)
+    def test_threads_follow_lambda_memory(self, mock_cpu_count):
+        """Test intra-op threads match the vCPUs allocated for the memory size"""
+        assert ModelManager(model_path='/test/model').intra_op_threads == 2
+
+        with patch.dict(os.environ, {'AWS_LAMBDA_FUNCTION_MEMORY_SIZE': '1024'}):
+            assert ModelManager(model_path='/test/model').intra_op_threads == 1
+
+    @patch.dict(os.environ, {'ONNX_INTRA_OP_THREADS': '3', 'ONNX_EXECUTION_MODE': 'parallel',
+                             'ONNX_GRAPH_OPTIMIZATION': 'basic'})
+    def test_env_overrides(self):
+        """Test session settings are taken from the environment"""
+        mock_ort = MagicMock()
+        manager = ModelManager(model_path='/test/model')
+
+        opts = manager._session_options(mock_ort, manager.graph_optimization)
+
+        assert opts.intra_op_num_threads == 3
+        assert opts.execution_mode == mock_ort.ExecutionMode.ORT_PARALLEL
+        assert opts.graph_optimization_level == mock_ort.GraphOptimizationLevel.ORT_ENABLE_BASIC
+
+    @patch('shared.model_utils._get_tokenizer_lib')
+    @patch('shared.model_utils._get_ort')
+    def test_optimized_graph_persisted_and_reused(self, mock_get_ort, mock_get_tokenizer, tmp_path, monkeypatch):
+        """Test the first load serializes the optimized graph and the next one loads it"""
+        monkeypatch.delenv('ONNX_OPTIMIZED_MODEL_DIR', raising=False)
+        model_dir = self.make_model_dir(tmp_path)
+        mock_ort = MagicMock()
+        mock_get_ort.return_value = mock_ort
+
+        first = ModelManager(model_path=model_dir)
+        assert first.load_model() is True
+        source_path, kwargs = mock_ort.InferenceSession.call_args[0][0], mock_ort.InferenceSession.call_args[1]
+        optimized_path = kwargs['sess_options'].optimized_model_filepath
+        assert source_path == os.path.join(model_dir, 'model.onnx')
+        assert optimized_path.startswith(os.path.join(model_dir, 'optimized'))
+
+        # onnxruntime writes the file during session creation
+        open(optimized_path, 'wb').close()
+        second = ModelManager(model_path=model_dir)
+        assert second.load_model() is True
+
+        assert mock_ort.InferenceSession.call_args[0][0] == optimized_path
+        assert (mock_ort.InferenceSession.call_args[1]['sess_options'].graph_optimization_level
+                == mock_ort.GraphOptimizationLevel.ORT_DISABLE_ALL)
+        assert second.get_model_info()['session']['optimized_graph_loaded'] is True
+
+    def test_optimized_graph_keyed_on_model_contents(self, tmp_path):
+        """Test replaced weights of the same size map to a different optimized graph"""
+        model_dir = self.make_model_dir(tmp_path)
+        onnx_path = os.path.join(model_dir, 'model.onnx')
+        manager = ModelManager(model_path=model_dir)
+        before = manager._optimized_model_paths(onnx_path)
+
+        (tmp_path / 'model.onnx').write_bytes(b'ONNX')
+        os.utime(onnx_path, ns=(0, 0))
+        after = manager._optimized_model_paths(onnx_path)
+
+        assert before and after
+        assert set(before).isdisjoint(after)
+
+    def test_optimized_graph_named_from_fingerprint(self, tmp_path):
+        """Test the optimized graph name comes from MODEL_VERSION or the sidecar, not a file hash"""
+        model_dir = self.make_model_dir(tmp_path)
+        onnx_path = os.path.join(model_dir, 'model.onnx')
+        content_hash = write_model_hash(onnx_path)
+        manager = ModelManager(model_path=model_dir)
+
+        with patch('shared.model_utils._file_content_hash') as file_hash:
+            with patch.dict(os.environ, {'MODEL_VERSION': 'release/42'}):
+                assert os.path.basename(manager._optimized_model_paths(onnx_path)[0]) == 'model.extended.release_42.onnx'
+            with patch.dict(os.environ, {}, clear=False):
+                os.environ.pop('MODEL_VERSION', None)
+                assert content_hash[:16] in manager._optimized_model_paths(onnx_path)[0]
+        file_hash.assert_not_called()
+
+    @patch.dict(os.environ, {'ONNX_GRAPH_OPTIMIZATION': 'disable'})
+    @patch('shared.model_utils._get_tokenizer_lib')
+    @patch('shared.model_utils._get_ort')
+    def test_nothing_persisted_when_disabled(self, mock_get_ort, mock_get_tokenizer, tmp_path, monkeypatch):
+        """Test no optimized graph is written with optimization disabled"""
+        monkeypatch.delenv('ONNX_OPTIMIZED_MODEL_DIR', raising=False)
+        model_dir = self.make_model_dir(tmp_path)
+        mock_get_ort.return_value = MagicMock()
+
+        assert ModelManager(model_path=model_dir).load_model() is True
+        assert not os.path.exists(os.path.join(model_dir, 'optimized'))
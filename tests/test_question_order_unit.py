@@ -0,0 +1,38 @@
+"""
+Unit tests for question_order module
+Tests snapshot versions and seeded permutations
+"""
+import pytest
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from shared.question_order import snapshot_version, new_order, term_position
+
+
+@pytest.mark.unit
+class TestQuestionOrder:
+    """Test compact session ordering"""
+
+    def test_snapshot_version_tracks_term_list(self):
+        """Test the version changes with membership and order only"""
+        assert snapshot_version(['a', 'b']) == snapshot_version(['a', 'b'])
+        assert snapshot_version(['a', 'b']) != snapshot_version(['b', 'a'])
+        assert snapshot_version(['ab']) != snapshot_version(['a', 'b'])
+
+    def test_unshuffled_is_snapshot_order(self):
+        """Test sequential sessions ask terms in snapshot order"""
+        order = new_order(5)
+        assert [term_position(order, i, 5) for i in range(5)] == [0, 1, 2, 3, 4]
+
+    @pytest.mark.parametrize('total', [2, 7, 12, 100, 1024])
+    def test_shuffle_is_permutation(self, total):
+        """Test every term is asked exactly once"""
+        order = new_order(total, shuffle=True, seed=42)
+        assert sorted(term_position(order, i, total) for i in range(total)) == list(range(total))
+
+    def test_seed_is_reproducible(self):
+        """Test the same seed gives the same order and different seeds differ"""
+        assert new_order(50, shuffle=True, seed=7) == new_order(50, shuffle=True, seed=7)
+        orders = {tuple(sorted(new_order(50, shuffle=True, seed=s).items())) for s in range(10)}
+        assert len(orders) > 1
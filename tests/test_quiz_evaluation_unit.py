@@ -0,0 +1,511 @@
+"""
+Unit tests for quiz engine answer evaluation
+Tests the evaluator deadline, lexical fallback and background re-score
+"""
+import pytest
+import io
+import json
+import time
+import sys
+import os
+from unittest.mock import patch, MagicMock
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+
+from lambda_functions.quiz_engine import handler
+from shared.circuit_breaker import CircuitBreaker
+
+STUDENT_ANSWER = 'runs code without servers'
+DEFINITION = 'A serverless compute service that runs code in response to events'
+
+
+def evaluator_response(similarity):
+    body = json.dumps({'similarity': similarity})
+    return {'Payload': io.BytesIO(json.dumps({'statusCode': 200, 'body': body}).encode())}
+
+
+def submit_event(idempotency_key=None, **fields):
+    return {
+        'httpMethod': 'POST',
+        'path': '/quiz/answer',
+        'headers': {'Idempotency-Key': idempotency_key} if idempotency_key else {},
+        'body': json.dumps({'session_id': 'session-1', 'answer': STUDENT_ANSWER, **fields}),
+    }
+
+
+def current_question_row(**schedule):
+    """Submit's first read: session state, current term and its schedule (none by default)"""
+    row = {'status': 'active', 'current_term_index': 0, 'total_questions': 2, 'correct_answers': 0,
+           'domain_id': 'domain-1', 'term_id': 'term-1', 'term': 'Lambda', 'definition': DEFINITION,
+           'ease': None, 'interval_days': None, 'repetitions': None, 'prior_id': None}
+    row.update(schedule)
+    return row
+
+
+def session_db(completed=False, **schedule):
+    """db_proxy stub: the current-question read, then the submit statement's row"""
+    db_proxy = MagicMock()
+    db_proxy.execute_query_one.side_effect = [
+        current_question_row(**schedule),
+        {'current_term_index': 1, 'total_questions': 2, 'correct_answers': 1, 'completed': completed,
+         'progress_record_id': 'progress-1', 'next_term_id': None if completed else 'term-2',
+         'next_term': None if completed else 'S3'},
+    ]
+    return db_proxy
+
+
+def progress_insert_params(db_proxy):
+    return db_proxy.execute_query_one.call_args_list[1][0][1][4:15]
+
+
+def schedule_params(db_proxy):
+    return db_proxy.execute_query_one.call_args_list[1][0][1][15:23]
+
+
+@pytest.fixture
+def quiz(monkeypatch):
+    monkeypatch.setattr(handler, 'ANSWER_EVALUATOR_FUNCTION_NAME', 'evaluator')
+    monkeypatch.setattr(handler, 'evaluator_breaker', CircuitBreaker('test', failure_threshold=2, reset_timeout=30))
+    monkeypatch.setattr(handler, 'evaluator_client', MagicMock())
+    monkeypatch.setattr(handler, 'lambda_client', MagicMock())
+    monkeypatch.setattr(handler, 'db_proxy', session_db())
+    monkeypatch.setenv('AWS_LAMBDA_FUNCTION_NAME', 'quiz-engine')
+    return handler
+
+
+@pytest.mark.unit
+class TestSubmitAnswerEvaluation:
+    """Test semantic evaluation with a deadline and lexical fallback"""
+
+    def test_semantic_score_used_within_deadline(self, quiz):
+        """Test the evaluator's score is final when it answers in time"""
+        quiz.evaluator_client.invoke.return_value = evaluator_response(0.86)
+
+        response = quiz.handle_submit_answer(submit_event(), 'user-1')
+        evaluation = json.loads(response['body'])['evaluation']
+
+        assert evaluation['is_correct'] is True
+        assert evaluation['provisional'] is False
+        assert evaluation['evaluation_method'] == 'semantic'
+        assert progress_insert_params(quiz.db_proxy)[-3:] == ('semantic', False, None)
+        quiz.lambda_client.invoke.assert_not_called()
+
+    def test_timeout_falls_back_to_provisional_lexical(self, quiz, monkeypatch):
+        """Test a slow evaluator yields a provisional lexical score and a queued re-score"""
+        monkeypatch.setattr(quiz, 'EVALUATOR_DEADLINE_SECONDS', 0.05)
+        quiz.evaluator_client.invoke.side_effect = lambda **kwargs: time.sleep(0.3) or evaluator_response(0.9)
+
+        started = time.perf_counter()
+        response = quiz.handle_submit_answer(submit_event(), 'user-1')
+        elapsed = time.perf_counter() - started
+        evaluation = json.loads(response['body'])['evaluation']
+
+        assert elapsed < 0.25
+        assert evaluation['provisional'] is True
+        assert evaluation['evaluation_method'] == 'lexical'
+        assert evaluation['similarity_score'] == round(
+            quiz.calculate_simple_similarity(STUDENT_ANSWER, DEFINITION.lower()), 2)
+        assert progress_insert_params(quiz.db_proxy)[-3:] == ('lexical', True, None)
+
+        rescore = quiz.lambda_client.invoke.call_args[1]
+        assert rescore['FunctionName'] == 'quiz-engine'
+        assert rescore['InvocationType'] == 'Event'
+        assert json.loads(rescore['Payload'])['progress_record_id'] == 'progress-1'
+
+    def test_open_circuit_skips_evaluator(self, quiz):
+        """Test the evaluator is not called while the breaker is open"""
+        quiz.evaluator_breaker.record_failure()
+        quiz.evaluator_breaker.record_failure()
+
+        response = quiz.handle_submit_answer(submit_event(), 'user-1')
+
+        quiz.evaluator_client.invoke.assert_not_called()
+        assert json.loads(response['body'])['evaluation']['provisional'] is True
+
+    def test_deadline_bounded_by_remaining_time(self, quiz):
+        """Test no evaluator call is made when the Lambda is about to time out"""
+        context = MagicMock()
+        context.get_remaining_time_in_millis.return_value = 1500
+
+        assert quiz.evaluate_with_deadline(STUDENT_ANSWER, DEFINITION, context) is None
+        quiz.evaluator_client.invoke.assert_not_called()
+
+
+@pytest.mark.unit
+class TestSubmitAnswerRoundTrips:
+    """Test submission uses one read and one data-modifying statement"""
+
+    def test_two_statements_per_submit(self, quiz):
+        """Test the answer is recorded and the session advanced in one statement"""
+        quiz.evaluator_client.invoke.return_value = evaluator_response(0.86)
+
+        response = quiz.handle_submit_answer(submit_event(), 'user-1')
+        body = json.loads(response['body'])
+
+        assert quiz.db_proxy.execute_query_one.call_count == 2
+        quiz.db_proxy.execute_query.assert_not_called()
+        submit_query, params = quiz.db_proxy.execute_query_one.call_args_list[1][0]
+        assert 'UPDATE quiz_sessions' in submit_query and 'INSERT INTO progress_records' in submit_query
+        # Increment, then the session guard on the evaluated index
+        assert params[:4] == (1, 'session-1', 'user-1', 0)
+        assert body['next_question'] == {'term_id': 'term-2', 'term': 'S3',
+                                         'question_number': 2, 'total_questions': 2}
+        assert body['progress']['correct_answers'] == 1
+
+    def test_last_question_completes(self, quiz, monkeypatch):
+        """Test the final answer reports completion without a next question"""
+        monkeypatch.setattr(quiz, 'db_proxy', session_db(completed=True))
+        quiz.evaluator_client.invoke.return_value = evaluator_response(0.86)
+
+        body = json.loads(quiz.handle_submit_answer(submit_event(), 'user-1')['body'])
+
+        assert body['quiz_completed'] is True
+        assert body['next_question'] is None
+        quiz.db_proxy.execute_query.assert_called_once_with(quiz.MATERIALIZE_SUMMARY_QUERY, ('session-1',))
+
+    def test_concurrent_submit_conflicts(self, quiz):
+        """Test a submit that lost the race for the question is rejected"""
+        quiz.evaluator_client.invoke.return_value = evaluator_response(0.86)
+        quiz.db_proxy.execute_query_one.side_effect = [
+            current_question_row(),
+            None,
+        ]
+
+        response = quiz.handle_submit_answer(submit_event(), 'user-1')
+
+        assert response['statusCode'] == 409
+
+
+@pytest.mark.unit
+class TestQuestionPrefetch:
+    """Test question windows from GET /quiz/questions and piggybacked on submit"""
+
+    def questions_event(self, **params):
+        return {'httpMethod': 'GET', 'path': '/quiz/questions',
+                'queryStringParameters': {'session_id': 'session-1', **params}}
+
+    def test_window_in_one_query(self, quiz):
+        """Test the session and its next questions are read in a single statement"""
+        window = [{'term_id': 'term-1', 'term': 'Lambda', 'question_number': 1, 'total_questions': 2},
+                  {'term_id': 'term-2', 'term': 'S3', 'question_number': 2, 'total_questions': 2}]
+        quiz.db_proxy.execute_query_one.side_effect = [
+            {'status': 'active', 'current_term_index': 0, 'total_questions': 2,
+             'domain_name': 'AWS', 'questions': json.dumps(window)},
+        ]
+
+        response = quiz.handle_get_questions(self.questions_event(count='5'), 'user-1')
+        body = json.loads(response['body'])
+
+        query, params = quiz.db_proxy.execute_query_one.call_args[0]
+        assert params == (5, 'session-1', 'user-1')
+        assert 'definition' not in query
+        assert body['questions'] == window
+        assert quiz.db_proxy.execute_query_one.call_count == 1
+
+    def test_count_is_bounded(self, quiz):
+        """Test window sizes outside 0..MAX_PREFETCH_QUESTIONS are rejected"""
+        for count in ('abc', '-1', str(quiz.MAX_PREFETCH_QUESTIONS + 1)):
+            response = quiz.handle_get_questions(self.questions_event(count=count), 'user-1')
+            assert response['statusCode'] == 400
+        quiz.db_proxy.execute_query_one.assert_not_called()
+
+    def test_routed_before_single_question(self, quiz, monkeypatch):
+        """Test /quiz/questions is not handled as /quiz/question"""
+        monkeypatch.setattr(quiz, 'extract_user_from_cognito_event',
+                            lambda event: {'valid': True, 'user_id': 'sub-1', 'claims': {'sub': 'sub-1'}})
+        monkeypatch.setattr(quiz.identity_resolver, 'resolve', lambda sub, groups: {'user_id': 'user-1'})
+        with patch.object(quiz, 'handle_get_questions', return_value='window') as get_questions:
+            assert quiz.lambda_handler(self.questions_event(), None) == 'window'
+        get_questions.assert_called_once()
+
+    def test_submit_piggybacks_window(self, quiz):
+        """Test a submit with prefetch returns the upcoming questions from the same statement"""
+        window = [{'term_id': 'term-2', 'term': 'S3', 'question_number': 2, 'total_questions': 2}]
+        quiz.evaluator_client.invoke.return_value = evaluator_response(0.86)
+        quiz.db_proxy.execute_query_one.side_effect = [
+            current_question_row(),
+            {'current_term_index': 1, 'total_questions': 2, 'correct_answers': 1, 'completed': False,
+             'progress_record_id': 'progress-1', 'next_term_id': 'term-2', 'next_term': 'S3',
+             'upcoming_questions': window},
+        ]
+
+        body = json.loads(quiz.handle_submit_answer(submit_event(prefetch=10), 'user-1')['body'])
+
+        assert quiz.db_proxy.execute_query_one.call_args_list[1][0][1][-2:] == (10, 10)
+        assert body['upcoming_questions'] == window
+
+    def test_submit_without_prefetch_omits_window(self, quiz):
+        """Test the submit response is unchanged when no window is requested"""
+        quiz.evaluator_client.invoke.return_value = evaluator_response(0.86)
+
+        body = json.loads(quiz.handle_submit_answer(submit_event(), 'user-1')['body'])
+
+        assert quiz.db_proxy.execute_query_one.call_args_list[1][0][1][-2:] == (0, 0)
+        assert 'upcoming_questions' not in body
+
+
+@pytest.mark.unit
+class TestIdempotentSubmit:
+    """Test retried submissions are replayed from the stored record"""
+
+    def prior_row(self, **overrides):
+        row = current_question_row(
+            current_term_index=1, correct_answers=1, term_id='term-2', term='S3', prior_id='progress-1',
+            prior_is_correct=True, prior_similarity_score=0.86, prior_feedback='Correct! Well done.',
+            prior_correct_answer=DEFINITION, prior_is_provisional=False, prior_evaluation_method='semantic')
+        row.update(overrides)
+        return row
+
+    def test_key_stored_with_record(self, quiz):
+        """Test the key is looked up and stored with the progress record"""
+        quiz.evaluator_client.invoke.return_value = evaluator_response(0.86)
+
+        quiz.handle_submit_answer(submit_event('key-1'), 'user-1')
+
+        assert quiz.db_proxy.execute_query_one.call_args_list[0][0][1] == ('key-1', 'session-1', 'user-1')
+        assert progress_insert_params(quiz.db_proxy)[-1] == 'key-1'
+
+    def test_retry_replays_without_evaluating(self, quiz):
+        """Test a retry returns the stored result and writes nothing"""
+        quiz.db_proxy.execute_query_one.side_effect = [self.prior_row()]
+
+        body = json.loads(quiz.handle_submit_answer(submit_event('key-1'), 'user-1')['body'])
+
+        quiz.evaluator_client.invoke.assert_not_called()
+        assert quiz.db_proxy.execute_query_one.call_count == 1
+        assert body['evaluation']['is_correct'] is True
+        assert body['evaluation']['similarity_score'] == 0.86
+        assert body['progress'] == {'current_index': 1, 'total_questions': 2, 'correct_answers': 1,
+                                    'completed': False}
+        assert body['next_question']['term_id'] == 'term-2'
+
+    def test_concurrent_duplicate_replays(self, quiz):
+        """Test a duplicate that loses the advance race replays the winner's result"""
+        quiz.evaluator_client.invoke.return_value = evaluator_response(0.86)
+        quiz.db_proxy.execute_query_one.side_effect = [current_question_row(), None, self.prior_row()]
+
+        response = quiz.handle_submit_answer(submit_event('key-1'), 'user-1')
+
+        assert response['statusCode'] == 200
+        assert json.loads(response['body'])['evaluation']['feedback'] == 'Correct! Well done.'
+
+
+@pytest.mark.unit
+class TestAdaptiveScheduling:
+    """Test spaced-repetition updates and adaptive question order"""
+
+    def test_submit_advances_stored_schedule(self, quiz, monkeypatch):
+        """Test the term's schedule is advanced from its stored state in the submit statement"""
+        monkeypatch.setattr(quiz, 'db_proxy', session_db(ease=2.5, interval_days=6.0, repetitions=2))
+        quiz.evaluator_client.invoke.return_value = evaluator_response(0.9)
+
+        quiz.handle_submit_answer(submit_event(), 'user-1')
+
+        user_id, term_id, domain_id, ease, interval_days, repetitions, lapses, due_in = \
+            schedule_params(quiz.db_proxy)
+        assert (user_id, term_id, domain_id) == ('user-1', 'term-1', 'domain-1')
+        assert interval_days == pytest.approx(15.0)
+        assert (repetitions, lapses) == (3, 0)
+        assert due_in == pytest.approx(15.0 * 86400)
+
+    def test_adaptive_start_uses_due_queue(self, quiz):
+        """Test adaptive sessions take their order from the due-soonest query"""
+        quiz.db_proxy.execute_query_one.side_effect = [
+            {'id': 'domain-1', 'name': 'AWS', 'user_id': 'user-1', 'is_public': False},
+            None,
+        ]
+        quiz.db_proxy.execute_query.side_effect = [
+            [{'id': 'term-1', 'term': 'Lambda'}, {'id': 'term-2', 'term': 'S3'}],
+            [{'id': 'term-2', 'term': 'S3'}],
+            None,
+        ]
+        event = {'body': json.dumps({'domain_id': 'domain-1', 'mode': 'adaptive'})}
+
+        body = json.loads(quiz.handle_start_quiz(event, 'user-1')['body'])
+
+        adaptive_query, params = quiz.db_proxy.execute_query.call_args_list[1][0]
+        assert adaptive_query is quiz.ADAPTIVE_TERMS_QUERY
+        assert params == {'user_id': 'user-1', 'domain_id': 'domain-1', 'limit': quiz.ADAPTIVE_SESSION_SIZE}
+        assert 'ORDER BY q.bucket, q.due_at, t.created_at, q.term_id' in adaptive_query
+        assert body['mode'] == 'adaptive'
+        assert body['current_question']['term_id'] == 'term-2'
+        assert body['progress']['total_questions'] == 1
+
+    def test_sequential_start_stores_seeded_order(self, quiz):
+        """Test sequential sessions store a snapshot version and permutation, not the term list"""
+        terms = [{'id': f'term-{i}', 'term': f'T{i}'} for i in range(6)]
+        quiz.db_proxy.execute_query_one.side_effect = [
+            {'id': 'domain-1', 'name': 'AWS', 'user_id': 'user-1', 'is_public': False},
+            None,
+        ]
+        quiz.db_proxy.execute_query.side_effect = [terms, None]
+        event = {'body': json.dumps({'domain_id': 'domain-1', 'shuffle': True, 'seed': 3})}
+
+        body = json.loads(quiz.handle_start_quiz(event, 'user-1')['body'])
+
+        query, params = quiz.db_proxy.execute_query.call_args_list[1][0]
+        session_data = json.loads(params[-1])
+        assert 'INSERT INTO quiz_term_snapshot_versions' in query
+        assert 'INSERT INTO quiz_term_snapshots' in query
+        assert params[4] == [t['id'] for t in terms]
+        assert 'term_order' not in session_data
+        assert session_data['snapshot'] == quiz.snapshot_version(params[4]) == params[1]
+        assert session_data['seed'] == 3
+        first = quiz.term_position(session_data, 0, len(terms))
+        assert body['current_question']['term_id'] == f'term-{first}'
+
+    @pytest.mark.parametrize('seed', ['3', 1.5, True, [3]])
+    def test_non_integer_seed_rejected(self, quiz, seed):
+        """Test a seed that is not an integer is a client error, not a server error"""
+        event = {'body': json.dumps({'domain_id': 'domain-1', 'shuffle': True, 'seed': seed})}
+
+        response = quiz.handle_start_quiz(event, 'user-1')
+
+        assert response['statusCode'] == 400
+        assert 'seed' in json.loads(response['body'])['error']
+        quiz.db_proxy.execute_query_one.assert_not_called()
+
+    def test_unknown_mode_rejected(self, quiz):
+        """Test only sequential and adaptive modes are accepted"""
+        event = {'body': json.dumps({'domain_id': 'domain-1', 'mode': 'random'})}
+        assert quiz.handle_start_quiz(event, 'user-1')['statusCode'] == 400
+
+
+@pytest.mark.unit
+class TestRescoreAnswer:
+    """Test the background re-score of provisional answers"""
+
+    def rescore_event(self):
+        return {
+            'action': 'rescore_answer', 'progress_record_id': 'progress-1', 'session_id': 'session-1',
+            'student_answer': STUDENT_ANSWER, 'correct_answer': DEFINITION,
+        }
+
+    def test_rescore_updates_record_and_session(self, quiz):
+        """Test the record and the session's correct count change in one conditional statement"""
+        quiz.lambda_client.invoke.return_value = evaluator_response(0.81)
+        quiz.db_proxy.execute_query_one.side_effect = None
+        quiz.db_proxy.execute_query_one.return_value = {'was_correct': False}
+
+        result = quiz.lambda_handler(self.rescore_event(), None)
+
+        assert result == {'statusCode': 200, 'rescored': True, 'is_correct': True}
+        query, params = quiz.db_proxy.execute_query_one.call_args[0]
+        assert query is quiz.RESCORE_ANSWER_QUERY
+        assert 'is_provisional = TRUE' in query and 'FOR UPDATE' in query
+        assert params['is_correct'] is True and params['session_id'] == 'session-1'
+        quiz.db_proxy.execute_query.assert_called_once_with(quiz.MATERIALIZE_SUMMARY_QUERY, ('session-1',))
+
+    def test_rescore_skips_finalized_record(self, quiz):
+        """Test a duplicate delivery does not touch an already re-scored record"""
+        quiz.lambda_client.invoke.return_value = evaluator_response(0.81)
+        quiz.db_proxy.execute_query_one.side_effect = None
+        quiz.db_proxy.execute_query_one.return_value = None
+
+        result = quiz.lambda_handler(self.rescore_event(), None)
+
+        assert result['rescored'] is False
+        assert quiz.db_proxy.execute_query_one.call_count == 1
+        quiz.db_proxy.execute_query.assert_not_called()
+
+    def test_rescore_failure_raises_for_retry(self, quiz):
+        """Test a failed re-score fails the async invocation instead of returning an error response"""
+        quiz.lambda_client.invoke.side_effect = RuntimeError('evaluator unavailable')
+
+        with pytest.raises(RuntimeError):
+            quiz.lambda_handler(self.rescore_event(), None)
+        quiz.db_proxy.execute_query_one.assert_not_called()
+
+
+@pytest.mark.unit
+class TestCompletionSummary:
+    """Test summaries are served from the materialized row"""
+
+    def summary_row(self, **overrides):
+        row = {'domain_name': 'AWS', 'total_questions': 2, 'total_attempts': 2, 'correct_count': 1,
+               'average_similarity': 0.655, 'completed_at': None, 'total_seconds': 125,
+               'detailed_results_total': 2,
+               'detailed_results': [{'term': 'Lambda', 'is_correct': True, 'similarity_score': 0.86}]}
+        row.update(overrides)
+        return row
+
+    def summary_event(self, **params):
+        return {'queryStringParameters': dict({'session_id': 'session-1'}, **params)}
+
+    def test_single_read(self, quiz):
+        """Test a materialized summary is one query with the requested page"""
+        quiz.db_proxy.execute_query_one.side_effect = [self.summary_row()]
+
+        body = json.loads(quiz.handle_complete_quiz(self.summary_event(offset='1', limit='1'), 'user-1')['body'])
+
+        assert quiz.db_proxy.execute_query_one.call_count == 1
+        assert quiz.db_proxy.execute_query_one.call_args[0][1] == (1, 1, 1, 1, 'session-1', 'user-1')
+        assert body['performance']['accuracy_percentage'] == 50.0
+        assert body['performance']['average_similarity_score'] == 0.66
+        assert body['timing'] == {'time_taken_minutes': 2, 'time_taken_seconds': 5, 'total_seconds': 125}
+        assert body['detailed_results_page'] == {'offset': 1, 'limit': 1, 'total': 2}
+
+    def test_missing_summary_materialized(self, quiz):
+        """Test sessions completed before summaries existed are materialized on first read"""
+        quiz.db_proxy.execute_query_one.side_effect = [
+            None,
+            {'status': 'completed', 'current_term_index': 2, 'total_questions': 2},
+            self.summary_row(),
+        ]
+
+        response = quiz.handle_complete_quiz(self.summary_event(), 'user-1')
+
+        assert response['statusCode'] == 200
+        quiz.db_proxy.execute_query.assert_called_once_with(quiz.MATERIALIZE_SUMMARY_QUERY, ('session-1',))
+
+    def test_incomplete_session_rejected(self, quiz):
+        """Test no summary is built while questions remain"""
+        quiz.db_proxy.execute_query_one.side_effect = [
+            None,
+            {'status': 'active', 'current_term_index': 1, 'total_questions': 2},
+        ]
+
+        assert quiz.handle_complete_quiz(self.summary_event(), 'user-1')['statusCode'] == 400
+        quiz.db_proxy.execute_query.assert_not_called()
+
+
+@pytest.mark.unit
+class TestMaintenanceEvents:
+    """Test scheduled maintenance events bypass API routing"""
+
+    def test_reaper_event_uses_remaining_time(self, quiz):
+        """Test the reaper runs within the invocation's remaining time"""
+        context = MagicMock()
+        context.get_remaining_time_in_millis.return_value = 30000
+        with patch.object(quiz, 'reap_stale_sessions', return_value={'reaped': 3}) as reaper, \
+                patch.object(quiz, 'prune_term_snapshots', return_value=2) as prune:
+            result = quiz.lambda_handler({'action': 'reap_stale_sessions'}, context)
+
+        assert result == {'statusCode': 200, 'reaped': 3, 'snapshots_pruned': 2}
+        prune.assert_called_once_with()
+        assert reaper.call_args[1]['time_budget_seconds'] == pytest.approx(28.0)
+
+    def test_similarity_cache_purge_event(self, quiz):
+        """Test the scheduled purge event deletes expired similarity cache rows"""
+        with patch.object(quiz, 'purge_similarity_cache', return_value=7) as purge:
+            result = quiz.lambda_handler({'action': 'purge_similarity_cache'}, None)
+
+        assert result == {'statusCode': 200, 'purged': 7}
+        purge.assert_called_once_with(quiz.db_proxy)
+
+
+@pytest.mark.unit
+class TestIdentityResolution:
+    """Test API requests resolve the database user from the authenticated sub"""
+
+    def test_localstack_request_without_claims_resolves(self, quiz, monkeypatch):
+        """Test the LocalStack no-claims test user is resolved instead of rejected"""
+        monkeypatch.setenv('LOCALSTACK_ENDPOINT', 'http://localhost:4566')
+        resolver = MagicMock()
+        resolver.resolve.return_value = None
+        monkeypatch.setattr(quiz, 'identity_resolver', resolver)
+
+        quiz.lambda_handler({'httpMethod': 'GET', 'path': '/quiz/unknown'}, None)
+
+        assert resolver.resolve.call_args[0] == ('550e8400-e29b-41d4-a716-446655440000', None)
@@ -0,0 +1,94 @@
+"""
+Unit tests for session_reaper module
+Tests keyset batching, lock timeout, the time budget and snapshot pruning
+"""
+import pytest
+from contextlib import contextmanager
+from unittest.mock import MagicMock
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from shared.session_reaper import reap_stale_sessions, prune_term_snapshots, REAP_BATCH_QUERY, PRUNE_SNAPSHOTS_QUERY
+
+
+def cursor_factory(batches):
+    """Factory yielding one cursor per transaction; each returns the next batch result"""
+    cursors = []
+    results = iter(batches)
+
+    @contextmanager
+    def factory():
+        cursor = MagicMock()
+        cursor.fetchone.return_value = next(results)
+        cursors.append(cursor)
+        yield cursor
+
+    return factory, cursors
+
+
+@pytest.mark.unit
+class TestSessionReaper:
+    """Test bounded, keyset-driven reaping"""
+
+    def test_batches_until_short(self):
+        """Test batches continue from the last reaped key and stop on a short batch"""
+        factory, cursors = cursor_factory([(2, 't1', 'id-1'), (2, 't2', 'id-2'), (1, 't3', 'id-3')])
+
+        result = reap_stale_sessions(stale_after_hours=24, batch_size=2, cursor_factory=factory)
+
+        assert result['reaped'] == 5
+        assert result['batches'] == 3
+        assert result['complete'] is True
+        keysets = [c.execute.call_args_list[1][0][1][1:3] for c in cursors]
+        assert keysets == [('-infinity', '00000000-0000-0000-0000-000000000000'), ('t1', 'id-1'), ('t2', 'id-2')]
+
+    def test_lock_timeout_set_per_batch(self):
+        """Test each batch transaction sets a local lock timeout before reaping"""
+        factory, cursors = cursor_factory([(0, None, None)])
+
+        reap_stale_sessions(lock_timeout_ms=1500, cursor_factory=factory)
+
+        set_timeout, batch = cursors[0].execute.call_args_list
+        assert set_timeout[0] == ("SELECT set_config('lock_timeout', %s, true)", ('1500ms',))
+        assert batch[0][0] is REAP_BATCH_QUERY
+        assert 'FOR UPDATE SKIP LOCKED' in REAP_BATCH_QUERY
+
+    def test_time_budget_stops_early(self):
+        """Test an exhausted budget ends the run as incomplete"""
+        factory, cursors = cursor_factory([(2, 't1', 'id-1')] * 100)
+
+        result = reap_stale_sessions(batch_size=2, time_budget_seconds=1e-9, cursor_factory=factory)
+
+        assert result['complete'] is False
+        assert result['batches'] <= 1
+
+    def test_stale_threshold_binds_as_float_interval(self):
+        """Test the threshold is scaled against an interval, not passed to make_interval's integer hours"""
+        factory, cursors = cursor_factory([(0, None, None)])
+
+        with pytest.MonkeyPatch.context() as mp:
+            mp.setenv('STALE_SESSION_HOURS', '36.5')
+            reap_stale_sessions(cursor_factory=factory)
+
+        params = cursors[0].execute.call_args_list[1][0][1]
+        assert params[0] == 36.5
+        assert "NOW() - %s * INTERVAL '1 hour'" in REAP_BATCH_QUERY
+        assert 'make_interval(hours' not in REAP_BATCH_QUERY
+
+
+@pytest.mark.unit
+class TestSnapshotPrune:
+    """Test snapshots of finished sessions are deleted"""
+
+    def test_prunes_versions_without_live_sessions(self):
+        """Test only idle versions no active/paused session uses are deleted, under a lock timeout"""
+        factory, cursors = cursor_factory([(4,)])
+
+        assert prune_term_snapshots(idle_hours=2, cursor_factory=factory) == 4
+
+        set_timeout, prune = cursors[0].execute.call_args_list
+        assert set_timeout[0] == ("SELECT set_config('lock_timeout', %s, true)", ('2000ms',))
+        assert prune[0] == (PRUNE_SNAPSHOTS_QUERY, (2,))
+        assert 'DELETE FROM quiz_term_snapshot_versions' in PRUNE_SNAPSHOTS_QUERY
+        assert "status IN ('active', 'paused')" in PRUNE_SNAPSHOTS_QUERY
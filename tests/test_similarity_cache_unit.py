@@ -0,0 +1,183 @@
+"""
+Unit tests for similarity_cache module
+Tests cache keys, backends, write-back and the cascade cache tier
+"""
+import pytest
+from unittest.mock import patch, MagicMock
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from shared.similarity_cache import (
+    SimilarityCache, SimilarityCacheBackend, InMemorySimilarityBackend, PostgresSimilarityBackend, make_cache_key,
+    create_similarity_cache, purge_expired
+)
+from shared.evaluation_cascade import EvaluationCascade, SimilarityCacheTier
+
+
+def make_cache(version='v1', ttl_seconds=3600):
+    versions = {'current': version}
+    cache = SimilarityCache(InMemorySimilarityBackend(), lambda: versions['current'], ttl_seconds=ttl_seconds)
+    return cache, versions
+
+
+@pytest.mark.unit
+class TestCacheKey:
+    """Test cache key construction"""
+
+    def test_whitespace_normalized(self):
+        """Test whitespace differences map to the same key"""
+        assert make_cache_key('v1', ' a  b ', 'c') == make_cache_key('v1', 'a b', 'c')
+
+    def test_version_and_order_matter(self):
+        """Test model version and answer/reference order change the key"""
+        assert make_cache_key('v1', 'a', 'b') != make_cache_key('v2', 'a', 'b')
+        assert make_cache_key('v1', 'a', 'b') != make_cache_key('v1', 'b', 'a')
+        assert make_cache_key('v1', 'ab', 'c') != make_cache_key('v1', 'a', 'bc')
+
+
+@pytest.mark.unit
+class TestSimilarityCache:
+    """Test read-through and write-back behaviour"""
+
+    def test_write_back_then_hit(self):
+        """Test a written score is served on the next lookup"""
+        cache, _ = make_cache()
+        assert cache.get('answer', 'reference') is None
+
+        cache.put('answer', 'reference', 0.83)
+        cache.flush()
+
+        assert cache.get(' answer ', 'reference') == pytest.approx(0.83)
+        assert cache.stats()['hits'] == 1
+        assert cache.stats()['misses'] == 1
+
+    def test_model_version_change_misses(self):
+        """Test scores from another model version are not served and are purged"""
+        cache, versions = make_cache()
+        cache.put('answer', 'reference', 0.5)
+        cache.flush()
+
+        versions['current'] = 'v2'
+        assert cache.get('answer', 'reference') is None
+        assert cache.purge() == 1
+
+    def test_expired_entries_miss(self):
+        """Test entries past their TTL are not served"""
+        cache, _ = make_cache(ttl_seconds=10)
+        with patch('shared.similarity_cache.time.time', return_value=1000.0):
+            cache.put('answer', 'reference', 0.5)
+            cache.flush()
+        with patch('shared.similarity_cache.time.time', return_value=1011.0):
+            assert cache.get('answer', 'reference') is None
+
+    def test_backend_failure_bypasses_cache(self):
+        """Test a failed lookup is a miss and skips the backend during the cooldown"""
+        backend = MagicMock()
+        backend.get_many.side_effect = Exception("connection refused")
+        cache = SimilarityCache(backend, lambda: 'v1')
+
+        assert cache.get_many([('a', 'b'), ('c', 'd')]) == [None, None]
+        assert cache.get('a', 'b') is None
+        cache.put('a', 'b', 0.4)
+        cache.flush()
+
+        assert backend.get_many.call_count == 1
+        backend.put_many.assert_not_called()
+
+    def test_write_failure_is_swallowed(self):
+        """Test write-back errors do not surface to the caller"""
+        backend = MagicMock()
+        backend.put_many.side_effect = Exception("disk full")
+        cache = SimilarityCache(backend, lambda: 'v1')
+
+        cache.put('a', 'b', 0.4)
+        cache.flush()
+
+        backend.put_many.assert_called_once()
+
+    def test_flush_timeout_reports_pending_writes(self):
+        """Test flush gives up after its timeout instead of blocking the response"""
+        import threading
+        release = threading.Event()
+        backend = MagicMock()
+        backend.put_many.side_effect = lambda *args: release.wait(5)
+        cache = SimilarityCache(backend, lambda: 'v1')
+
+        cache.put('a', 'b', 0.4)
+        assert cache.flush(timeout=0.01) is False
+        release.set()
+        assert cache.flush(timeout=1) is True
+
+    def test_backend_is_abstract(self):
+        """Test a backend missing an operation cannot be instantiated"""
+        class Partial(SimilarityCacheBackend):
+            def get_many(self, keys):
+                return {}
+
+        with pytest.raises(TypeError):
+            Partial()
+
+
+@pytest.mark.unit
+class TestPostgresBackend:
+    """Test the Postgres backend queries"""
+
+    def test_purge_expired_keeps_other_versions_until_expiry(self):
+        """Test the scheduled purge deletes only expired rows"""
+        db_proxy = MagicMock()
+        db_proxy.execute_query_one.return_value = (3,)
+
+        assert purge_expired(db_proxy) == 3
+        query, kwargs = db_proxy.execute_query_one.call_args[0][0], db_proxy.execute_query_one.call_args[1]
+        assert 'DELETE FROM similarity_cache' in query
+        assert kwargs['params'] == [None]
+
+    def test_get_many(self):
+        """Test keys are looked up in one query, skipping expired rows"""
+        db_proxy = MagicMock()
+        db_proxy.execute_query.return_value = [('k1', 0.75)]
+
+        found = PostgresSimilarityBackend(db_proxy).get_many(['k1', 'k2'])
+
+        query, kwargs = db_proxy.execute_query.call_args[0][0], db_proxy.execute_query.call_args[1]
+        assert 'ANY(%s)' in query and 'expires_at > NOW()' in query
+        assert kwargs['params'] == [['k1', 'k2']]
+        assert found == {'k1': 0.75}
+
+    def test_put_many_upserts(self):
+        """Test scores are upserted with version and TTL"""
+        db_proxy = MagicMock()
+
+        PostgresSimilarityBackend(db_proxy).put_many({'k1': 0.5, 'k2': 0.25}, 'v1', 60)
+
+        query, kwargs = db_proxy.execute_query.call_args[0][0], db_proxy.execute_query.call_args[1]
+        assert 'ON CONFLICT (cache_key) DO UPDATE' in query
+        assert kwargs['params'] == ['v1', 60, ['k1', 'k2'], [0.5, 0.25]]
+
+    def test_create_from_environment(self):
+        """Test SIMILARITY_CACHE_BACKEND selects the backend"""
+        with patch.dict(os.environ, {'SIMILARITY_CACHE_BACKEND': 'postgres'}):
+            assert isinstance(create_similarity_cache(MagicMock(), lambda: 'v1').backend, PostgresSimilarityBackend)
+        with patch.dict(os.environ, {'SIMILARITY_CACHE_BACKEND': 'none'}):
+            assert create_similarity_cache(MagicMock(), lambda: 'v1') is None
+
+
+@pytest.mark.unit
+class TestSimilarityCacheTier:
+    """Test the cache as a cascade tier"""
+
+    def test_model_score_recorded_then_served(self):
+        """Test the second evaluation of a pair is served from the cache"""
+        cache, _ = make_cache()
+        cascade = EvaluationCascade(tiers=[SimilarityCacheTier(cache)])
+        model_scorer = MagicMock(return_value=0.66)
+
+        first = cascade.evaluate('it runs code on events', 'a compute service', 0.7, model_scorer)
+        cache.flush()
+        second = cascade.evaluate('it runs code on events', 'a compute service', 0.7, model_scorer)
+
+        assert model_scorer.call_count == 1
+        assert first['stage'] == 'model'
+        assert second['stage'] == 'cache'
+        assert second['similarity_score'] == pytest.approx(0.66)
@@ -0,0 +1,51 @@
+"""
+Unit tests for spaced_repetition module
+Tests answer grading and SM-2 schedule transitions
+"""
+import pytest
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from shared.spaced_repetition import (
+    answer_quality, review, DEFAULT_EASE, MIN_EASE, RELEARN_INTERVAL_DAYS
+)
+
+
+@pytest.mark.unit
+class TestAnswerQuality:
+    """Test evaluation scores map to SM-2 grades"""
+
+    @pytest.mark.parametrize('score,quality', [(0.2, 0), (0.6, 1), (0.72, 3), (0.9, 4), (0.97, 5)])
+    def test_grades(self, score, quality):
+        """Test incorrect answers grade below 3 and correct ones 3-5"""
+        assert answer_quality(score, 0.7) == quality
+
+
+@pytest.mark.unit
+class TestReview:
+    """Test schedule state transitions"""
+
+    def test_new_term_intervals(self):
+        """Test consecutive correct reviews step through 1 day, 6 days, then ease growth"""
+        first = review(4)
+        second = review(4, first['ease'], first['interval_days'], first['repetitions'])
+        third = review(4, second['ease'], second['interval_days'], second['repetitions'])
+
+        assert (first['interval_days'], first['repetitions']) == (1.0, 1)
+        assert (second['interval_days'], second['repetitions']) == (6.0, 2)
+        assert third['interval_days'] == pytest.approx(6.0 * DEFAULT_EASE)
+        assert first['ease'] == pytest.approx(DEFAULT_EASE)
+
+    def test_lapse_resets(self):
+        """Test a missed term is relearned soon and loses ease"""
+        state = review(0, ease=2.5, interval_days=15.0, repetitions=4)
+
+        assert state['lapsed'] is True
+        assert state['repetitions'] == 0
+        assert state['interval_days'] == RELEARN_INTERVAL_DAYS
+        assert state['ease'] < 2.5
+
+    def test_ease_floor(self):
+        """Test ease never drops below the SM-2 minimum"""
+        assert review(0, ease=MIN_EASE)['ease'] == MIN_EASE